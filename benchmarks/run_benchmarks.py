@@ -0,0 +1,349 @@
+"""
+Benchmarks for the resolution hot paths of Call Map
+
+Generates fixed synthetic corpora in a temporary directory, times the
+functions that resolve the call graph, and writes the results as JSON, so
+that runs before and after a change (or a jedi upgrade) can be compared::
+
+  python benchmarks/run_benchmarks.py -o before.json
+  python benchmarks/run_benchmarks.py -o after.json
+
+The corpora are
+
+- `deep`: a package nested `--scale * 10` levels deep, each level calling into
+  the next,
+- `wide`: one module of `--scale * 200` functions, all called by `hub`,
+- `shared`: `--scale * 50` modules that all import and call the same name,
+  `shared`, and use it as a prefix of their own names.
+
+Caches are cleared before each repeat, except for benchmarks named `warm`, so
+the timings are those of a first visit. Each result has the best and median
+time of the repeats, the throughput in operations per second based on the best
+time, and the peak memory allocated by Python during one extra run.
+
+"""
+
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import jedi
+
+from call_map.jedi_dump import JediCodeElementNode, get_module_node, dump_module_nodes, \
+    dump_script_nodes, path_to_module_name, module_node_cache, scope_table_cache, \
+    call_site_table_cache
+from call_map.cache import read_text_cached, clear_text_cache
+from call_map.name_index import name_index
+from call_map.sys_path_index import sys_path_index
+from call_map.import_graph import import_graph
+from call_map.syntactic import syntax_cache
+from call_map import syntactic
+from call_map.config import user_config
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+Benchmark = NamedTuple('Benchmark', [('name', str),
+                                     ('corpus', str),
+                                     ('operations', int),
+                                     ('setup', Callable[[], object]),
+                                     ('run', Callable[[object], object]),
+                                     ('cold', bool)])
+
+
+# Corpora
+
+def write_deep_corpus(root: Path, depth: int) -> List[str]:
+    '''Package `deep_package.l1.l2...` where each level calls into the next'''
+    module_names = []
+    directory = root.joinpath('deep_package')
+    name = 'deep_package'
+
+    for level in range(depth + 1):
+        directory.mkdir()
+        if level < depth:
+            source = ('from .l{next} import f{next}\n\n\n'
+                      'def f{level}():\n'
+                      '    return f{next}()\n').format(level=level, next=level + 1)
+        else:
+            source = 'def f{level}():\n    return {level}\n'.format(level=level)
+        directory.joinpath('__init__.py').write_text(source)
+        module_names.append(name)
+
+        name += '.l{}'.format(level + 1)
+        directory = directory.joinpath('l{}'.format(level + 1))
+
+    return module_names
+
+
+def write_wide_corpus(root: Path, width: int) -> str:
+    '''Module `wide_module` with `width` functions called by `hub`'''
+    lines = []
+    for ii in range(width):
+        lines.append('def f{ii}(x):\n    return x + {ii}\n\n'.format(ii=ii))
+
+    lines.append('def hub(x):\n')
+    for ii in range(width):
+        lines.append('    x = f{ii}(x)\n'.format(ii=ii))
+    lines.append('    return x\n')
+
+    root.joinpath('wide_module.py').write_text(''.join(lines))
+    return 'wide_module'
+
+
+def write_chain_corpus(root: Path, length: int) -> str:
+    '''Module `chain_module` with `length` functions, each calling the one before'''
+    lines = ['def f0(x):\n    return x\n\n']
+    for ii in range(1, length):
+        lines.append('def f{ii}(x):\n    return f{previous}(x) + 1\n\n'.format(ii=ii, previous=ii - 1))
+
+    root.joinpath('chain_module.py').write_text(''.join(lines))
+    return 'chain_module'
+
+
+def write_dense_corpus(root: Path, n_calls: int, n_callers: int) -> str:
+    '''Module `dense_module` whose `n_callers` functions call `target` `n_calls` times in all'''
+    lines = ['def target(x):\n    return x\n\n']
+    for ii in range(n_callers):
+        lines.append('\ndef caller_{ii}(x):\n'.format(ii=ii))
+        for jj in range(n_calls // n_callers):
+            lines.append('    x = target(x) + {jj}\n'.format(jj=jj))
+        lines.append('    return x\n\n')
+
+    root.joinpath('dense_module.py').write_text(''.join(lines))
+    return 'dense_module'
+
+
+def write_shared_corpus(root: Path, n_modules: int) -> List[str]:
+    '''Package `shared_package` whose modules all call `common.shared`'''
+    directory = root.joinpath('shared_package')
+    directory.mkdir()
+    directory.joinpath('__init__.py').write_text('')
+    directory.joinpath('common.py').write_text('def shared(value):\n    return value\n')
+
+    module_names = ['shared_package.common']
+    for ii in range(n_modules):
+        directory.joinpath('m{}.py'.format(ii)).write_text(
+            'from .common import shared\n\n\n'
+            'def shared_user_{ii}(shared_value):\n'
+            '    shared_copy = shared(shared_value)\n'
+            '    return shared(shared_copy)\n\n\n'
+            'def other_{ii}():\n'
+            '    return shared_user_{ii}({ii})\n'.format(ii=ii))
+        module_names.append('shared_package.m{}'.format(ii))
+
+    return module_names
+
+
+# Helpers
+
+def reset_caches():
+    from jedi.parser.cache import parser_cache
+
+    parser_cache.clear()
+    clear_text_cache()
+    name_index.clear()
+    sys_path_index.clear()
+    import_graph.clear()
+    module_node_cache.clear()
+    scope_table_cache.clear()
+    call_site_table_cache.clear()
+    syntax_cache.clear()
+    JediCodeElementNode.usage_resolution_modules.clear()
+
+
+def find_child(node, name: str):
+    for child in node.children:
+        if child.code_element.name == name:
+            return child
+    raise LookupError('{} not found in {}'.format(name, node.code_element.name))
+
+
+def make_benchmarks(root: Path, scale: int) -> List[Benchmark]:
+    sys_path = [str(root)] + sys.path
+
+    deep_modules = write_deep_corpus(root, depth=10 * scale)
+    wide_module = write_wide_corpus(root, width=200 * scale)
+    shared_modules = write_shared_corpus(root, n_modules=50 * scale)
+    chain_module = write_chain_corpus(root, length=200 * scale)
+    dense_module = write_dense_corpus(root, n_calls=400 * scale, n_callers=4)
+
+    all_files = [str(path) for path in sorted(root.glob('**/*.py'))]
+    shared_files = [Path(path) for path in all_files if 'shared_package' in path]
+
+    JediCodeElementNode.sys_path = sys_path
+
+    def module_node(name):
+        node, err = get_module_node(sys_path, name)
+        if err:
+            raise err
+        return node
+
+    def setup_hub():
+        reset_caches()
+        return find_child(module_node(wide_module), 'hub')
+
+    def setup_shared():
+        reset_caches()
+        dump_module_nodes(sys_path, shared_modules)  # loads the usage search modules
+        return find_child(module_node('shared_package.common'), 'shared')
+
+    def setup_chain():
+        reset_caches()
+        return list(module_node(chain_module).children)
+
+    def children_of_each(nodes):
+        for node in nodes:
+            list(node.children)
+
+    def setup_target():
+        reset_caches()
+        return find_child(module_node(dense_module), 'target')
+
+    shared_directories = sorted({str(path.parent) for path in shared_files})
+
+    def setup_warm_text():
+        clear_text_cache()
+        for path in all_files:
+            read_text_cached(Path(path))
+
+    def read_all(_):
+        for path in all_files:
+            read_text_cached(Path(path))
+
+    def module_names_of_all(_):
+        for path in all_files:
+            path_to_module_name(sys_path, path)
+
+    return [
+        Benchmark('get_module_node', 'deep', 1, reset_caches,
+                  lambda _: module_node(deep_modules[-1]), True),
+        Benchmark('get_module_node', 'wide', 1, reset_caches,
+                  lambda _: module_node(wide_module), True),
+        Benchmark('dump_module_nodes', 'shared', len(shared_modules), reset_caches,
+                  lambda _: dump_module_nodes(sys_path, shared_modules), True),
+        Benchmark('dump_script_nodes', 'shared', len(shared_files), reset_caches,
+                  lambda _: dump_script_nodes(sys_path, shared_files), True),
+        Benchmark('children', 'wide', 1, setup_hub,
+                  lambda hub: list(hub.children), True),
+        Benchmark('children of each', 'chain', 200 * scale, setup_chain,
+                  children_of_each, True),
+        Benchmark('parents', 'shared', 1, setup_shared,
+                  lambda shared: list(shared.parents), True),
+        Benchmark('parents', 'dense', 1, setup_target,
+                  lambda target: list(target.parents), True),
+        Benchmark('syntactic callees', 'wide', 1, setup_hub,
+                  lambda hub: syntactic.callees(hub.code_element, sys_path, []), True),
+        Benchmark('syntactic callers', 'shared', 1, setup_shared,
+                  lambda shared: syntactic.callers(shared.code_element, sys_path, shared_directories), True),
+        Benchmark('path_to_module_name', 'all', len(all_files), reset_caches,
+                  module_names_of_all, True),
+        Benchmark('read_text_cached', 'all', len(all_files), reset_caches,
+                  read_all, True),
+        Benchmark('read_text_cached warm', 'all', len(all_files), setup_warm_text,
+                  read_all, False),
+    ]
+
+
+def run_benchmark(benchmark: Benchmark, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        state = benchmark.setup()
+        start = time.perf_counter()
+        benchmark.run(state)
+        times.append(time.perf_counter() - start)
+
+    state = benchmark.setup()
+    tracemalloc.start()
+    try:
+        benchmark.run(state)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(times)
+    return {'name': benchmark.name,
+            'corpus': benchmark.corpus,
+            'cold': benchmark.cold,
+            'operations': benchmark.operations,
+            'times': times,
+            'best': best,
+            'median': statistics.median(times),
+            'throughput': benchmark.operations / best if best > 0 else None,
+            'peak_memory_bytes': peak}
+
+
+def environment() -> dict:
+    import call_map
+
+    max_rss = None
+    if resource is not None:
+        # kilobytes on Linux, bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != 'darwin':
+            max_rss *= 1024
+
+    return {'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'jedi': jedi.__version__,
+            'call_map': call_map.version,
+            'max_rss_bytes': max_rss}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Time the resolution hot paths of Call Map')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per benchmark. Defaults to 5.')
+    parser.add_argument('--scale', type=int, default=1, help='Size multiplier of the corpora. Defaults to 1.')
+    parser.add_argument('-k', '--filter', metavar='NAME', default=None,
+                        help='Only run benchmarks whose name contains NAME.')
+    parser.add_argument('-o', '--output', metavar='OUT', default='-',
+                        help='Where to write the JSON results. Defaults to standard output.')
+    args = parser.parse_args(argv)
+
+    # measure resolution, not lookups of earlier results
+    user_config.session_overrides['CALL_GRAPH_INDEX'] = False
+    JediCodeElementNode.call_graph_index = None
+
+    with tempfile.TemporaryDirectory(prefix='call_map_benchmarks_') as directory:
+        benchmarks = make_benchmarks(Path(directory).resolve(), args.scale)
+
+        results = []
+        for benchmark in benchmarks:
+            if args.filter and args.filter not in benchmark.name:
+                continue
+            result = run_benchmark(benchmark, args.repeat)
+            results.append(result)
+            print('{name:<24} {corpus:<8} best {best:9.4f} s  median {median:9.4f} s  '
+                  '{throughput:10.1f} ops/s  peak {peak:8.1f} KiB'.format(
+                      peak=result['peak_memory_bytes'] / 1024, **result),
+                  file=sys.stderr)
+
+    report = {'environment': environment(),
+              'scale': args.scale,
+              'repeat': args.repeat,
+              'results': results}
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output == '-':
+        print(text)
+    else:
+        Path(args.output).write_text(text + '\n')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
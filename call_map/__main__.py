@@ -1,3 +1,8 @@
+from sys import argv, exit as sys_exit
+
+if __name__ == '__main__' and argv[1:2] == ['export']:
+    from .export import main
+    sys_exit(main(argv[2:]))
 
 from .gui import main
 
@@ -0,0 +1,71 @@
+"""
+Command line arguments shared by the GUI and the headless export
+
+"""
+
+import os.path
+import logging
+import argparse
+from pathlib import Path
+from typing import List
+
+from .core import UserScopeSettings
+
+logger = logging.getLogger(__name__)
+
+
+def add_scope_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('-m', '--modules', metavar='M', type=str, nargs='+',
+                        help='Modules (e.g. "os.path").',
+                        default=[])
+    parser.add_argument('-f', '--files', metavar='F', type=str, nargs='+',
+                        help='Script or module file names.',
+                        default=[])
+    parser.add_argument('-p', '--add-to-sys-path', metavar='P', type=str,
+                        nargs='+', help='''Directories to add to the analysis
+                        Python module search path ("sys_path"), where modules
+                        will be found during analysis. By default the Python
+                        interpreter's `sys.path` is included. Note that the
+                        module resolution order in Python is first match; earlier items in
+                        `sys_path` have higher priority.''', default=[])
+    parser.add_argument('-d', '--project-directory', metavar='PROJ_DIR', action='store', type=Path,
+                        default=None,
+                        help=('''Where to store `call_map` bookmarks, modules, sys_path, etc.
+                              If not set, these will not be saved.'''))
+    parser.add_argument('--no-interpreter-sys-path', action='store_true',
+                        help='''Tells `call_map` not explicitly include the
+                        `sys.path` from the interpreter in the Python module
+                        search path. (Note that the analysis backend `jedi` as
+                        of v0.10.0 will still fall back to the interpreter's
+                        `sys.path` if it cannot resolve modules using the
+                        `sys_path` that `call_map` passes to it.)
+                        ''')
+    parser.add_argument('-v', '--verbose', action='store_true', help='''Increase
+                        logging verbosity.''')
+
+
+def resolve_robustly(str_paths: List[str]):
+    paths = []
+    for ff in str_paths:
+        try:
+            pp = Path(ff).resolve()
+        except FileNotFoundError as err:
+            logger.error('Could not resolve {} from {}'.format(ff, os.path.realpath('.')))
+        else:
+            paths.append(pp)
+
+    return paths
+
+
+def user_scope_settings_from_args(args: argparse.Namespace) -> UserScopeSettings:
+    module_names = args.modules
+
+    file_names = resolve_robustly(args.files)  # type: List[Path]
+
+    additional_paths = resolve_robustly(args.add_to_sys_path)  # type: List[Path]
+
+    return UserScopeSettings(
+        module_names=module_names,
+        file_names=file_names,
+        include_runtime_sys_path=(not args.no_interpreter_sys_path),
+        add_to_sys_path=additional_paths)
@@ -1,34 +1,261 @@
+import io
+import sys
+import mmap
+import array
+import tokenize
+import threading
+from collections import OrderedDict
 from pathlib import Path
+from typing import Optional, List, Tuple
 
-TEXT_CACHE_SIZE = 100
-_text_cache = {}
-_text_cache_rankings = {}
+TEXT_CACHE_SIZE = 100             # maximum number of cached files
+TEXT_CACHE_BYTES = 256 * 2 ** 20  # maximum memory used by cached text
+SOURCE_STORE_SIZE = 100           # maximum number of memory-mapped files
 
-def read_text_cached(path: Path) -> str:
+_text_cache = OrderedDict()  # maps path to (stat key, text); least recently used first
+_text_cache_bytes = 0
+_text_cache_lock = threading.Lock()
+
+text_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+
+def _stat_key(path: Path) -> Optional[tuple]:
+    try:
+        stat = path.stat()
+    except (AttributeError, OSError):
+        return None
+    else:
+        return (stat.st_mtime_ns, stat.st_size)
+
+
+def source_encoding(data: bytes) -> str:
+    '''Encoding of Python source `data`, from its BOM or coding cookie, as Python reads it
+
+    Defaults to UTF-8, also for invalid cookies.
+
+    '''
     try:
-        text = _text_cache[path]
-        hole = _text_cache_rankings[path]
-        eliminate = True
-    except KeyError:
-        text = path.read_text()
-        _text_cache[path] = text
-        hole = TEXT_CACHE_SIZE
-        eliminate = False
-
-    _text_cache_rankings[path] = 0
-
-    for key, ranking in list(_text_cache_rankings.items()):
-        if key == path:
-            continue
-
-        if ranking < hole:
-            new_ranking = ranking + 1
-            if new_ranking < TEXT_CACHE_SIZE:
-                _text_cache_rankings[key] = new_ranking
+        encoding, _ = tokenize.detect_encoding(io.BytesIO(data).readline)
+    except SyntaxError:
+        return 'utf-8'
+    return encoding
+
+
+def decode_source(data: bytes) -> str:
+    '''Text of Python source `data`, with universal newlines, like `Path.read_text`'''
+    return io.TextIOWrapper(io.BytesIO(data), encoding=source_encoding(data), errors='replace').read()
+
+
+def _evict(path):
+    global _text_cache_bytes
+
+    stat_key, text = _text_cache.pop(path)
+    _text_cache_bytes -= sys.getsizeof(text)
+
+
+def read_text_cached(path: Path) -> str:
+    '''Read text from `path`, caching the most recently used files
+
+    The text is decoded like Python source, see `decode_source`. Cached text is
+    re-read if the modification time or size of the file changed.
+
+    '''
+    global _text_cache_bytes
+
+    stat_key = _stat_key(path)
+
+    with _text_cache_lock:
+        try:
+            cached_stat_key, text = _text_cache[path]
+        except KeyError:
+            pass
+        else:
+            if cached_stat_key == stat_key:
+                _text_cache.move_to_end(path)
+                text_cache_stats['hits'] += 1
+                return text
+            else:
+                _evict(path)
+                text_cache_stats['invalidations'] += 1
+
+    text = decode_source(path.read_bytes())
+
+    with _text_cache_lock:
+        text_cache_stats['misses'] += 1
+
+        if path in _text_cache:
+            # read concurrently by another thread
+            _evict(path)
+
+        _text_cache[path] = (stat_key, text)
+        _text_cache_bytes += sys.getsizeof(text)
+
+        while len(_text_cache) > 1 and (len(_text_cache) > TEXT_CACHE_SIZE
+                                        or _text_cache_bytes > TEXT_CACHE_BYTES):
+            _evict(next(iter(_text_cache)))
+            text_cache_stats['evictions'] += 1
+
+    return text
+
+
+def invalidate_path(path: Path):
+    '''Forget cached text and memory maps of `path`'''
+    path = Path(path)
+
+    with _text_cache_lock:
+        if path in _text_cache:
+            _evict(path)
+            text_cache_stats['invalidations'] += 1
+
+    with _source_files_lock:
+        stale = _source_files.pop(path, None)
+
+    if stale is not None:
+        stale.close()
+
+
+def clear_text_cache():
+    global _text_cache_bytes
+
+    with _text_cache_lock:
+        _text_cache.clear()
+        _text_cache_bytes = 0
+
+
+class SourceFile:
+    """Memory-mapped source file
+
+    Lines are decoded on demand, in the encoding declared by the file, see
+    `source_encoding`. The table of line offsets is extended lazily, only as
+    far as the lines that have been requested.
+
+    The map is closed when the file is evicted from the store or invalidated,
+    so that it does not pin the file. A thread that still reads it afterwards
+    maps the file again.
+
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self._map()
+
+    def _map(self):
+        self.stat_key = _stat_key(self.path)
+
+        with open(str(self.path), 'rb') as ff:
+            try:
+                self.data = mmap.mmap(ff.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty files cannot be mapped
+                self.data = b''
+
+        self._line_offsets = array.array('Q', [0])  # start of each line found so far
+        self._scanned_to_end = len(self.data) == 0
+
+        # a coding cookie is on one of the first two lines
+        header_end = self._line_start(2)
+        self.encoding = source_encoding(self.data[:header_end if header_end is not None else len(self.data)])
+
+    def _ensure_mapped(self):
+        # call with `self.lock` held
+        if isinstance(self.data, mmap.mmap) and self.data.closed:
+            self._map()
+
+    def __len__(self):
+        with self.lock:
+            self._ensure_mapped()
+            return len(self.data)
+
+    def _scan_to_line(self, line_index: int):
+        offsets = self._line_offsets
+        while not self._scanned_to_end and len(offsets) <= line_index:
+            newline = self.data.find(b'\n', offsets[-1])
+            if newline == -1:
+                self._scanned_to_end = True
             else:
-                _text_cache.pop(key)
-                _text_cache_rankings.pop(key)
+                offsets.append(newline + 1)
+
+    def _line_start(self, line_index: int) -> Optional[int]:
+        self._scan_to_line(line_index)
+        try:
+            return self._line_offsets[line_index]
+        except IndexError:
+            return None
+
+    def lines(self, start: int, stop: int) -> List[str]:
+        '''Decoded lines `start` up to but excluding `stop`, counting from 1 like parser positions'''
+        with self.lock:
+            self._ensure_mapped()
+
+            begin = self._line_start(start - 1)
+            if begin is None or begin >= len(self.data) and start > 1:
+                return []
+
+            end = self._line_start(stop - 1)
+            if end is None:
+                end = len(self.data)
+
+            return self.data[begin:end].decode(self.encoding, errors='replace').splitlines()
+
+    def line(self, lineno: int) -> Optional[str]:
+        lines = self.lines(lineno, lineno + 1)
+        return lines[0] if lines else None
+
+    def window(self, lineno: int, context: int) -> Tuple[int, str]:
+        '''First line number and text of the lines within `context` lines of `lineno`
+
+        Only these lines are decoded.
+
+        '''
+        first = max(1, lineno - context)
+        return first, '\n'.join(self.lines(first, lineno + context + 1))
+
+    def text(self) -> str:
+        with self.lock:
+            self._ensure_mapped()
+            return self.data[:].decode(self.encoding, errors='replace')
+
+    def close(self):
+        with self.lock:
+            if isinstance(self.data, mmap.mmap):
+                self.data.close()
+
+
+_source_files = OrderedDict()  # maps path to SourceFile; least recently used first
+_source_files_lock = threading.Lock()
+
+
+def source_file(path: Path) -> SourceFile:
+    '''Shared memory-mapped `SourceFile` for `path`
+
+    Remapped if the modification time or size of the file changed.
+
+    '''
+    path = Path(path)
+    stat_key = _stat_key(path)
+    stale = []
+
+    with _source_files_lock:
+        try:
+            cached = _source_files[path]
+        except KeyError:
+            cached = None
+        else:
+            if cached.stat_key == stat_key:
+                _source_files.move_to_end(path)
+            else:
+                stale.append(_source_files.pop(path))
+                cached = None
+
+        if cached is None:
+            _source_files[path] = cached = SourceFile(path)
+
+            while len(_source_files) > SOURCE_STORE_SIZE:
+                stale.append(_source_files.popitem(last=False)[1])
 
-    #print('-'*10, list(_text_cache_rankings.values()), len(_text_cache), len(_text_cache_rankings))
+    # Threads that still read them map the files again.
+    for source in stale:
+        source.close()
 
-    return text
\ No newline at end of file
+    return cached
@@ -0,0 +1,185 @@
+"""
+Persistent index of resolved call graph connections
+
+The index maps each definition to the code elements found by
+`JediCodeElementNode.children` and `JediCodeElementNode.parents`, so that
+revisiting a definition does not require another round of jedi resolution. It
+is stored as an SQLite database in the project directory, next to the JSON
+settings files written by `Project`. Without a project directory, the index only
+lives for the session.
+
+Each entry records the content hash of every file it was resolved from (the
+definition itself, the call positions, and the connected definitions). An entry
+is ignored as soon as any of those files change.
+
+Parents are found by searching other files, so a file that was not read for an
+entry can gain a call later. Entries for parents also record the files that
+the search read, as found by the name index, and are ignored once the search
+would read another file. Likewise, entries for the children of a package record
+its submodules, and are ignored once the package has another one.
+
+Callees that jedi only follows to an import statement are not stored, because
+the entry would not notice the imported name appearing in the imported file.
+
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable
+
+from .core import CodeElement
+from .custom_typing import CheckableList
+from . import serialize
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE_NAME = 'call_graph_index.sqlite3'
+
+children = 'children'
+parents = 'parents'
+
+_code_element_list_type = CheckableList(CodeElement)
+
+_digests = {}  # type: Dict[str, tuple]; maps path to ((st_mtime_ns, st_size), digest)
+
+
+def file_digest(path: str) -> Optional[str]:
+    '''Content hash of the file at `path`, or None if it cannot be read
+
+    The hash is recomputed only when the modification time or size of the file
+    changes.
+
+    '''
+    try:
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+    stat_key = (stat.st_mtime_ns, stat.st_size)
+
+    try:
+        cached_stat_key, digest = _digests[path]
+    except KeyError:
+        pass
+    else:
+        if cached_stat_key == stat_key:
+            return digest
+
+    try:
+        with open(path, 'rb') as ff:
+            digest = hashlib.sha1(ff.read()).hexdigest()
+    except OSError:
+        return None
+
+    _digests[path] = (stat_key, digest)
+    return digest
+
+
+def definition_key(code_element: CodeElement) -> str:
+    '''Identifies a definition independently of how it was reached'''
+    return json.dumps([code_element.path, code_element.start_pos, code_element.name, code_element.type])
+
+
+def referenced_paths(code_element: CodeElement, connected: Iterable[CodeElement], searched_paths: Iterable[str]):
+    yield code_element.path
+    for ce in connected:
+        yield ce.path
+        yield ce.call_pos[0]
+    yield from searched_paths
+
+
+class CallGraphIndex:
+    def __init__(self, database: str, sys_path: List[str]):
+        self.database = database
+        self.sys_path_key = hashlib.sha1(json.dumps(list(map(str, sys_path))).encode()).hexdigest()
+        self.lock = threading.Lock()
+
+        self.connection = sqlite3.connect(database, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS edges ('
+                ' sys_path_key TEXT, definition TEXT, direction TEXT,'
+                ' code_elements TEXT, dependencies TEXT,'
+                ' PRIMARY KEY (sys_path_key, definition, direction))')
+
+    @classmethod
+    def for_project_directory(cls, project_directory: Optional[Path], sys_path: List[str]):
+        if project_directory:
+            database = str(project_directory.joinpath(INDEX_FILE_NAME))
+        else:
+            database = ':memory:'
+
+        return cls(database, sys_path)
+
+    def lookup(self, code_element: CodeElement, direction: str,
+               searched_paths: Iterable[str] = ()) -> Optional[List[CodeElement]]:
+        '''Return the stored connections of `code_element`, or None if stale or missing
+
+        The connections are stale if any of the files they were resolved from
+        changed, or if `searched_paths`, the files a new search would read,
+        includes a file that the stored search did not read.
+
+        '''
+        if not code_element.path:
+            return None
+
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT code_elements, dependencies FROM edges'
+                ' WHERE sys_path_key = ? AND definition = ? AND direction = ?',
+                (self.sys_path_key, definition_key(code_element), direction)).fetchone()
+
+        if row is None:
+            return None
+
+        encoded, dependencies = row
+        dependencies = json.loads(dependencies)
+
+        if not all(path in dependencies for path in searched_paths):
+            return None
+
+        for path, digest in dependencies.items():
+            if file_digest(path) != digest:
+                return None
+
+        try:
+            return serialize.decode(_code_element_list_type, json.loads(encoded))
+        except serialize.DecodeError as err:
+            logger.warning('Discarding corrupt call graph index entry; {}'.format(err))
+            return None
+
+    def store(self, code_element: CodeElement, direction: str, connected: List[CodeElement],
+              searched_paths: Iterable[str] = ()):
+        '''Store the connections of `code_element`, found by reading `searched_paths` among others'''
+        if not code_element.path:
+            return
+
+        dependencies = {}
+        for path in referenced_paths(code_element, connected, searched_paths):
+            if path and path not in dependencies:
+                digest = file_digest(path)
+                if digest is None:
+                    # Cannot check later whether the entry is stale.
+                    return
+                dependencies[path] = digest
+
+        encoded = json.dumps(serialize.encode(_code_element_list_type, connected))
+
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO edges VALUES (?, ?, ?, ?, ?)',
+                (self.sys_path_key, definition_key(code_element), direction,
+                 encoded, json.dumps(dependencies, sort_keys=True)))
+
+    def clear(self):
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM edges')
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,169 @@
+"""
+Cancellation of searches, one request at a time
+
+Each search for connected nodes runs in a `scope` of its own cancel event (any
+object with an `is_set` method, such as `threading.Event`) and, optionally, a
+deadline. The analysis backend calls `check` often while it evaluates code;
+`check` raises `Cancelled` in the thread running a search once the event of
+that search is set. Searches in other threads, and later searches in the same
+thread, are not affected.
+
+A deadline does not end the search, but pauses it: searches run their longer
+steps, such as resolving one call site, with `resumable`, and `check` raises
+`DeadlineExceeded` in such a step once the deadline has passed. The search then
+yields `PAUSED` in place of the next item, and repeats the step, without the
+deadline, when it is resumed. Outside of steps, deadlines are not checked, so
+that a search never ends halfway through for lack of time.
+
+Scopes are kept in thread-local storage, and `check` reads them without
+locking.
+
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Generator, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class Cancelled(Exception):
+    """Raised in a search after it was cancelled or ran out of time"""
+    pass
+
+
+class DeadlineExceeded(Cancelled):
+    """Raised in a step of a search that ran out of time; see `resumable`"""
+    pass
+
+
+class _Paused:
+    def __repr__(self):
+        return 'PAUSED'
+
+
+# yielded by searches in place of an item when a step ran out of time
+PAUSED = _Paused()
+
+
+class _Scope:
+    __slots__ = ('cancel_event', 'deadline', 'pause_event')
+
+    def __init__(self, cancel_event, deadline: Optional[float], pause_event):
+        self.cancel_event = cancel_event
+        self.deadline = deadline
+        self.pause_event = pause_event
+
+    def is_set(self) -> bool:
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def is_due(self) -> bool:
+        return ((self.deadline is not None and time.monotonic() > self.deadline)
+                or (self.pause_event is not None and self.pause_event.is_set()))
+
+
+class _Scopes(threading.local):
+    def __init__(self):
+        self.active = []  # type: List[_Scope]; innermost last
+        self.steps = 0  # nesting depth of `resumable` steps, in which deadlines apply
+
+
+_scopes = _Scopes()
+
+
+@contextmanager
+def scope(cancel_event=None, deadline: Optional[float] = None, pause_event=None):
+    '''Make `check` raise in this thread once `cancel_event` is set, or at `deadline` in steps
+
+    :param deadline: in the time of `time.monotonic`; pauses the search in its
+        next `resumable` step after this time
+    :param pause_event: pauses the search like a deadline once it is set, for
+        pausing searches from other threads
+
+    Scopes nest; the search stops when any of the enclosing scopes is
+    cancelled.
+
+    '''
+    entry = _Scope(cancel_event, deadline, pause_event)
+    _scopes.active.append(entry)
+    try:
+        yield
+    finally:
+        active = _scopes.active
+        for ii in range(len(active) - 1, -1, -1):
+            if active[ii] is entry:
+                del active[ii]
+                break
+
+
+def check():
+    '''Raise `Cancelled` if the search running in this thread was cancelled or, in a step, ran out of time'''
+    active = _scopes.active
+    for entry in active:
+        if entry.is_set():
+            raise Cancelled('Search was cancelled.')
+
+    if _scopes.steps and any(entry.is_due() for entry in active):
+        raise DeadlineExceeded('Search ran out of time.')
+
+
+def is_cancelled() -> bool:
+    '''Whether the search running in this thread was cancelled or, in a step, ran out of time'''
+    active = _scopes.active
+    return (any(entry.is_set() for entry in active)
+            or bool(_scopes.steps) and any(entry.is_due() for entry in active))
+
+
+@contextmanager
+def _step():
+    _scopes.steps += 1
+    try:
+        yield
+    finally:
+        _scopes.steps -= 1
+
+
+def resumable(step: Callable[[], T]) -> Generator[object, None, T]:
+    '''Run `step()` as a step of a search, and return its result; use with `yield from`
+
+    If the deadline of the search has passed before or during the step,
+    `PAUSED` is yielded instead, and once the search is resumed, `step()` runs again, this time to
+    the end. `step` is a plain function, so that a pause can only interrupt it
+    as a whole.
+
+    '''
+    try:
+        with _step():
+            check()
+            return step()
+    except DeadlineExceeded:
+        pass
+
+    yield PAUSED
+    return step()
+
+
+def iter_cancellable(iterable: Iterable, cancel_event=None) -> Iterator:
+    '''Iterate over `iterable` in a `scope`, which is only active while items are resolved
+
+    Stops early, without raising, once `cancel_event` is set. The scope is left
+    whenever an item is yielded, so that it does not leak into the code of the
+    consumer, even if the iteration is abandoned. Deadlines are set by the
+    consumer, around the iteration; see `gui.stream_nodes`.
+
+    '''
+    with scope(cancel_event):
+        try:
+            iterator = iter(iterable)
+        except Cancelled:
+            return
+
+    while True:
+        with scope(cancel_event):
+            try:
+                check()
+                item = next(iterator)
+            except (StopIteration, Cancelled):
+                return
+        yield item
@@ -1,7 +1,11 @@
 import os
+import logging
+import threading
+import contextlib
 from pathlib import Path
+from types import MappingProxyType
 from .qt_compatibility import QtCore
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Mapping, Any
 import toolz as tz
 
 # ignore
@@ -177,9 +181,12 @@ class UserConfig:
     """
     Manages user config
 
-    The config file at `$CALL_MAP_RC_DIRECTORY/call_map_rc.py` is watched. If
-    the config file is changed, it will be re-read the next time `get_config` is
-    called.
+    The config file at `$CALL_MAP_RC_DIRECTORY/call_map_rc.py` and its
+    directory are watched. If the config file is changed, created or removed,
+    it will be re-read the next time `get_config` is called. Until then,
+    `get_config` returns the cached settings, so it is cheap enough to call in
+    hot paths. Hot loops can also hold a `snapshot` with `held`, so that
+    `get_config` returns it within the loop.
 
     There are three priority levels for settings: defaults, settings from the
     config file, and the override settings. The overrides are for testing. The
@@ -195,27 +202,54 @@ class UserConfig:
                            'UNICODE_ROLE_MARKERS': True,
                            'EXC_INFO': False,
                            'EXPERIMENTAL_MODE': False,
+                           'CALL_GRAPH_INDEX': True,
+                           'PROCESS_POOL_WORKERS': 0, # needs restart to take effect
+                           'PREFETCH_NEIGHBORS': 2,
+                           'PREFETCH_DEPTH': 1,
+                           'CALLERS_ON_DEMAND': False,
+                           'USAGE_SEARCH_MODULES': 200,
+                           'IMPORT_GRAPH_FILTER': True,
+                           'SYNTACTIC_FIRST_TIER': True,
+                           'SEARCH_TIME_BUDGET': 10,
+                           'SEARCH_ITEM_BUDGET': 1000,
                            'LOG_LEVEL': None, # needs restart to take effect
                            'PROFILING': False} # needs restart to take effect
 
     def __init__(self, rc_dir: Optional[str]):
         self.rc_dir = rc_dir
 
-        self._cache = None    # caches the settings
+        self._cache = None    # caches the defaults merged with the settings from file
 
         self.watcher = QtCore.QFileSystemWatcher()
         self.watcher.fileChanged.connect(self.clear_cache)
+        self.watcher.directoryChanged.connect(self.directory_changed)
         self.start_watcher()
 
         # top priority configuration settings. Used for debugging.
         self.session_overrides = {}
 
-    def clear_cache(self, file_names: Tuple[str]):
+        self._held = threading.local()  # the snapshot of `held` in each thread
+
+    def clear_cache(self, file_names: Tuple[str] = ()):
         self._cache = None
 
+        # Editors that save by replacing the file remove it from the watcher.
+        self.start_watcher()
+
+    def directory_changed(self, directory: str = ''):
+        # Only a config file that appeared or disappeared matters; changes to
+        # its contents are reported by `fileChanged`.
+        rc_path = os.path.join(self.rc_dir, 'call_map_rc.py')
+        if os.path.isfile(rc_path) != (rc_path in self.watcher.files()):
+            self.clear_cache()
+
     def start_watcher(self):
         if self.rc_dir and os.path.isdir(self.rc_dir):
-            self.watcher.addPath(os.path.join(self.rc_dir, 'call_map_rc.py'))
+            if self.rc_dir not in self.watcher.directories():
+                self.watcher.addPath(self.rc_dir)
+            rc_path = os.path.join(self.rc_dir, 'call_map_rc.py')
+            if os.path.isfile(rc_path) and rc_path not in self.watcher.files():
+                self.watcher.addPath(rc_path)
 
     def read_user_config(self):
         """Read the configuration from file"""
@@ -240,15 +274,60 @@ class UserConfig:
         else:
             return {}
 
+    def reload(self):
+        """Re-read the configuration file now"""
+        self.clear_cache()
+        return self.get_config()
+
     def get_config(self):
+        held = getattr(self._held, 'snapshot', None)
+        if held is not None:
+            return held
+
         if self._cache is None:
-            read_result = self.read_user_config()
-            return tz.merge(self.default_user_config,
-                            read_result,
-                            self.session_overrides)
+            try:
+                read_result = self.read_user_config()
+            except Exception:
+                logging.getLogger(__name__).exception(
+                    'Cannot read call_map_rc.py; using default settings until it changes.')
+                read_result = {}
+
+            self._cache = tz.merge(self.default_user_config, read_result)
+
+        if self.session_overrides:
+            return tz.merge(self._cache, self.session_overrides)
         else:
             return self._cache
 
+    def snapshot(self) -> Mapping[str, Any]:
+        """Read-only settings for hot loops to hold
+
+        Unlike `get_config`, the snapshot does not follow later changes to the
+        config file or the overrides.
+
+        """
+        return MappingProxyType(dict(self.get_config()))
+
+    @contextlib.contextmanager
+    def held(self, snapshot: Optional[Mapping[str, Any]] = None):
+        """Make `get_config` return `snapshot` in this thread until the block exits
+
+        Takes a new snapshot if none is given. Nested blocks keep the snapshot
+        of the outermost one.
+
+        """
+        previous = getattr(self._held, 'snapshot', None)
+        if previous is not None:
+            snapshot = previous
+        elif snapshot is None:
+            snapshot = self.snapshot()
+
+        self._held.snapshot = snapshot
+        try:
+            yield self._held.snapshot
+        finally:
+            self._held.snapshot = previous
+
 
 user_config = UserConfig(rc_dir=os.getenv('CALL_MAP_RC_DIRECTORY'))
 get_user_config = user_config.get_config
@@ -24,10 +24,13 @@ class Node(metaclass=abc.ABCMeta):
     """Every node must have attributes `name` and `role`
 
     The Node is responsible for catching all exceptions arising from the
-    analysis backend when searching for connected nodes.
+    analysis backend when searching for connected nodes. Searches are run in a
+    `cancellation.scope`, and should stop once `cancellation.check` raises.
 
     """
 
+    provisional = False  # found without the analysis backend, and shown until it confirms them
+
     @property
     @abc.abstractmethod
     def parents(self):
@@ -38,11 +41,18 @@ class Node(metaclass=abc.ABCMeta):
     def children(self):
         pass
 
-    @property
-    @abc.abstractmethod
-    def cancel_search(self):
-        '''Cancel pending search for related nodes'''
-        pass
+    def iter_parents(self):
+        '''Parents, possibly yielded while the search for more continues'''
+        return iter(self.parents)
+
+    def provisional_neighbors(self, cancel_event) -> List['Node']:
+        '''Approximate children, then parents, found quickly without the analysis backend
+
+        Shown while `children` and `parents` are resolved; must be safe to
+        call from another thread than theirs.
+
+        '''
+        return []
 
 
 class OrganizerNode(Node):
@@ -70,9 +80,6 @@ class OrganizerNode(Node):
     def children(self):
         return self._children
 
-    def cancel_search(self):
-        pass
-
 
 UserScopeSettings = typing.NamedTuple('UserScopeSettings', [('module_names', List[str]),
                                                             ('file_names', List[Path]),
@@ -0,0 +1,225 @@
+"""
+Headless export of the call graph
+
+Walks the call graph breadth first from the root modules and scripts of a
+project, without creating a Qt application, and streams it to a file. Usage::
+
+  python -m call_map export -m toolz --depth 2 -o toolz.jsonl
+
+Two formats are supported.
+
+`jsonl`: one JSON object per line. A node is written once, before the first
+edge that uses it::
+
+  {"node": 0, "name": ..., "type": ..., "module": ..., "path": ..., "start_pos": [...], "end_pos": [...]}
+  {"edge": [0, 1], "role": "child", "call_pos": [path, [line, column], [line, column]]}
+
+Edges point from the expanded node to the connected node. The role is
+`child` when the source calls the target, `parent` when the target calls the
+source, and `definition` when the target is defined inside the source.
+
+`binary`: the magic bytes `CMAP1`, followed by records of a one byte tag and
+a payload, all little endian:
+
+- tag 0 (node): uint32 id, uint32 length, then `length` bytes of the node JSON
+  object above.
+- tag 1 (edge): uint32 source id, uint32 target id, uint8 role index in
+  `ROLES`, int32 call line, int32 call column. Unknown positions are -1.
+
+Only the identities of the visited definitions are kept in memory, so memory
+use is bounded by the size of the graph, not the number of edges.
+
+"""
+
+import sys
+import json
+import struct
+import logging
+import argparse
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple, List, IO
+
+from .core import CodeElement, Node
+from .call_graph_index import definition_key
+from . import serialize
+
+logger = logging.getLogger(__name__)
+
+ROLES = ('child', 'parent', 'definition', 'signature')
+BINARY_MAGIC = b'CMAP1'
+
+children = 'children'
+parents = 'parents'
+both = 'both'
+
+
+def _node_record(code_element: CodeElement) -> dict:
+    encoded = serialize.encode(CodeElement, code_element)
+    return {key: encoded[key] for key in ('name', 'type', 'module', 'path', 'start_pos', 'end_pos')}
+
+
+class JsonLinesWriter:
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+
+    def write_node(self, node_id: int, code_element: CodeElement):
+        record = {'node': node_id}
+        record.update(_node_record(code_element))
+        self.stream.write(json.dumps(record) + '\n')
+
+    def write_edge(self, source_id: int, target_id: int, code_element: CodeElement):
+        record = {'edge': [source_id, target_id],
+                  'role': code_element.role,
+                  'call_pos': code_element.call_pos}
+        self.stream.write(json.dumps(record) + '\n')
+
+
+class BinaryWriter:
+    _node_header = struct.Struct('<BII')
+    _edge = struct.Struct('<BIIBii')
+
+    def __init__(self, stream: IO[bytes]):
+        self.stream = stream
+        self.stream.write(BINARY_MAGIC)
+
+    def write_node(self, node_id: int, code_element: CodeElement):
+        payload = json.dumps(_node_record(code_element)).encode('utf-8')
+        self.stream.write(self._node_header.pack(0, node_id, len(payload)))
+        self.stream.write(payload)
+
+    def write_edge(self, source_id: int, target_id: int, code_element: CodeElement):
+        line, column = code_element.call_pos[1]
+        self.stream.write(self._edge.pack(
+            1, source_id, target_id, ROLES.index(code_element.role),
+            -1 if line is None else line,
+            -1 if column is None else column))
+
+
+writers = {'jsonl': JsonLinesWriter, 'binary': BinaryWriter}
+
+
+def connected_nodes(node: Node, direction: str) -> Iterable[Node]:
+    from .jedi_dump import catch_errors
+
+    if direction in (children, both):
+        yield from catch_errors(lambda: list(node.children), [],
+                                'while finding outbound connections of {}'.format(node))
+    if direction in (parents, both):
+        yield from catch_errors(lambda: list(node.parents), [],
+                                'while finding inbound connections of {}'.format(node))
+
+
+def walk(root_nodes: Iterable[Node], depth: int, direction: str) -> Iterable[Tuple[Node, Node, int]]:
+    '''Breadth first walk of the call graph
+
+    Yields (source, target, level) for every edge found by expanding nodes at
+    most `depth` levels away from `root_nodes`. Each definition is expanded at
+    most once.
+
+    '''
+    seen = set()  # definitions that were queued for expansion
+    queue = deque()
+
+    def enqueue(node: Node, level: int):
+        key = definition_key(node.code_element)
+        if key not in seen:
+            seen.add(key)
+            queue.append((node, level))
+
+    for node in root_nodes:
+        enqueue(node, 0)
+
+    while queue:
+        node, level = queue.popleft()
+        if level >= depth:
+            continue
+
+        for connected in connected_nodes(node, direction):
+            yield node, connected, level + 1
+            if level + 1 < depth:
+                enqueue(connected, level + 1)
+
+
+def export(root_nodes: List[Node], writer, depth: int, direction: str) -> Tuple[int, int]:
+    '''Write the graph around `root_nodes`; return the number of nodes and edges'''
+    node_ids = {}  # type: Dict[str, int]
+    n_edges = 0
+
+    def node_id(code_element: CodeElement) -> int:
+        key = definition_key(code_element)
+        try:
+            return node_ids[key]
+        except KeyError:
+            node_ids[key] = new_id = len(node_ids)
+            writer.write_node(new_id, code_element)
+            return new_id
+
+    for root in root_nodes:
+        node_id(root.code_element)
+
+    for source, target, level in walk(root_nodes, depth, direction):
+        writer.write_edge(node_id(source.code_element), node_id(target.code_element), target.code_element)
+        n_edges += 1
+
+    return len(node_ids), n_edges
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .arguments import add_scope_arguments, user_scope_settings_from_args
+    from .config import get_user_config
+    from .project_settings_module import make_project
+
+    parser = argparse.ArgumentParser(
+        prog='python -m call_map export',
+        description='Export the call graph without starting the GUI')
+    add_scope_arguments(parser)
+    parser.add_argument('--depth', type=int, default=1,
+                        help='How many levels to expand from the root modules and scripts. Defaults to 1.')
+    parser.add_argument('--direction', choices=[children, parents, both], default=children,
+                        help='Follow callees ("children"), callers ("parents"), or both. Defaults to children.')
+    parser.add_argument('--format', choices=sorted(writers), default='jsonl',
+                        help='Output format. Defaults to jsonl.')
+    parser.add_argument('-o', '--output', metavar='OUT', default='-',
+                        help='Output file. Defaults to standard output.')
+
+    args = parser.parse_args(argv)
+
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO)
+    else:
+        logging.basicConfig(level=get_user_config()['LOG_LEVEL'])
+
+    project = make_project(user_scope_settings_from_args(args), args.project_directory)
+
+    # the other roots are still exported
+    for error in project.errors('python'):
+        logger.warning(error)
+
+    root_nodes = project.root_node('python').children
+    if not root_nodes:
+        logger.error('Nothing to export.')
+        return 1
+
+    binary = args.format == 'binary'
+
+    if args.output == '-':
+        stream = sys.stdout.buffer if binary else sys.stdout
+        close = False
+    else:
+        stream = open(args.output, 'wb' if binary else 'w')
+        close = True
+
+    try:
+        n_nodes, n_edges = export(root_nodes, writers[args.format](stream), args.depth, args.direction)
+    except Exception as exc:
+        logger.error('{}; while exporting the call graph.'.format(exc), exc_info=get_user_config()['EXC_INFO'])
+        return 1
+    finally:
+        if close:
+            stream.close()
+        else:
+            stream.flush()
+
+    logger.info('Exported {} nodes and {} edges.'.format(n_nodes, n_edges))
+
+    return 0
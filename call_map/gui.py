@@ -1,9 +1,11 @@
 from .qt_compatibility import QtCore, QtGui, QtWidgets, Qt
 import re
+import time
 import threading
+import collections
 import json
 import logging
-from typing import List, Tuple, Optional, Iterable
+from typing import List, Tuple, Optional, Iterable, Iterator, Dict, Set, NamedTuple
 from concurrent.futures import Executor, ThreadPoolExecutor, wait, Future
 from sys import modules as runtime_sys_modules, argv as sys_argv, platform as sys_platform, version_info as sys_version_info
 
@@ -17,19 +19,30 @@ from pathlib import Path
 
 #from . import wheel_fix
 from .core import OrganizerNode as ONode, Node
-from .config import get_user_config
-from .cache import read_text_cached
+from .config import get_user_config, user_config
+from .cache import read_text_cached, source_file
 
 from .core import UserScopeSettings, ScopeSettings, OrganizerNode, CodeElement
 from .errors import BadArgsError, ModuleResolutionError, ScriptResolutionError
 from .project_settings_module import Project
+from .resolution_pool import resolution_pool
+from .cancellation import iter_cancellable
+from . import cancellation
+from .watcher import ProjectWatcher
 
 from . import serialize
 from . import project_settings_module
+from . import call_graph_index
 
 logger = logging.getLogger(__name__)
 
 COLUMN_WIDTH = 200
+PREFETCH_DELAY = 300  # msecs of idle time before prefetching
+NEXT_NODES_CACHE_SIZE = 256
+STREAM_BATCH_SIZE = 50  # nodes per update of a column that is being resolved
+STREAM_BATCH_INTERVAL = 0.1  # secs between updates of a column that is being resolved
+LARGE_FILE_BYTES = 2 ** 20
+LARGE_FILE_CONTEXT = 1000  # lines shown before and after the target in large files
 
 def make_module(name):
     module = ModuleType(name)
@@ -80,6 +93,8 @@ class CallListItem(QtWidgets.QListWidgetItem):
         'signature': QtGui.QColor('gray'),  # gray
     }
 
+    provisional_foreground_color = QtGui.QColor('gray')
+
     def __init__(self, node: Node):
         """The parents call the node, children are called by the node.
 
@@ -89,15 +104,22 @@ class CallListItem(QtWidgets.QListWidgetItem):
 
         """
         super().__init__()
+        self.setNode(node)
 
+    def setNode(self, node: Node):
+        '''Show `node`, e.g. the one confirming a provisional node'''
         self.node = node
 
         name = self.node.code_element.name
 
-        self.setFont(code_font())
+        font = code_font()
+        font.setItalic(node.provisional)
+        self.setFont(font)
 
         fontMetrics = QtGui.QFontMetrics(self.font())
 
+        self.setData(Qt.Qt.ForegroundRole, None)
+
         icon = self.role_markers[self.node.code_element.role]
 
         try:
@@ -121,6 +143,9 @@ class CallListItem(QtWidgets.QListWidgetItem):
         else:
             self.setForeground(QtGui.QBrush(color))
 
+        if node.provisional:
+            self.setForeground(QtGui.QBrush(self.provisional_foreground_color))
+
         if isinstance(icon, str):
             if self.node.code_element.role == 'signature':
                 fullText = icon + ' ' + '[sig]'
@@ -148,8 +173,8 @@ class CallListItem(QtWidgets.QListWidgetItem):
         for ll in self.listWidget().walk_right():
             yield ll.currentItem()
 
-    def showSource(self, path) -> Tuple[bool, bool, str]:
-        # returns success, reuse, text
+    def showSource(self, path, line: Optional[int] = None) -> Tuple[bool, bool, str, int]:
+        # returns success, reuse, text, and the number of the first line of the text
 
         if path:
             _path = Path(path)
@@ -157,18 +182,29 @@ class CallListItem(QtWidgets.QListWidgetItem):
             main_widget = findParent(self.listWidget(), MainWidget)
 
             text_edit = main_widget.text_edit
-            if _path == text_edit.current_path:
-                return (True, True, '')
-
-            text = read_text_cached(_path)
+            shown_lines = text_edit.current_lines
+            if (_path == text_edit.current_path
+                    and (shown_lines is None or line is not None and shown_lines[0] <= line < shown_lines[1])):
+                return (True, True, '', shown_lines[0] if shown_lines else 1)
+
+            _source_file = source_file(_path)
+            if len(_source_file) > LARGE_FILE_BYTES:
+                # Decode only the lines around the target, and do not keep
+                # another decoded copy of large files in the text cache.
+                first, text = _source_file.window(line or 1, LARGE_FILE_CONTEXT)
+                shown_lines = (first, (line or 1) + LARGE_FILE_CONTEXT + 1)
+            else:
+                first, text = 1, read_text_cached(_path)
+                shown_lines = None
 
             # see http://www.qtcentre.org/archive/index.php/t-52574.html
 
             text_edit.current_path = _path
+            text_edit.current_lines = shown_lines
 
-            return (True, False, text)
+            return (True, False, text, first)
         else:
-            return (False, True, '')
+            return (False, True, '', 1)
 
             #line = node.code_element.start_pos[0] - 1
             #scrollToLine(text_edit, line - 8)
@@ -186,44 +222,163 @@ class CallListItem(QtWidgets.QListWidgetItem):
         #    and self.listWidget().index > 0):
         #    text_edit.highlighter.reset()
         #else:
-        success, reuse, text = self.showSource(self.node.code_element.call_pos[0])
+        call_pos = self.node.code_element.call_pos
+        success, reuse, text, first_line = self.showSource(call_pos[0], call_pos[1][0])
 
         if cancel_event.is_set() or not success:
             text_edit.highlighter.reset()
             return
         else:
-            call_pos = self.node.code_element.call_pos
-            sig.setPlainText_highlight_and_scroll.emit(reuse, text, call_pos)
+            sig.setPlainText_highlight_and_scroll.emit(reuse, text, call_pos, first_line)
 
 
-def next_nodes(node: Node, cancel_event: threading.Event) -> List[Node]:
+def iter_callees(node: Node, cancel_event: threading.Event) -> Iterable[Node]:
+    '''Yield the signature and the children of `node` as they are resolved
+
+    Stops early once `cancel_event` is set, also within the search of `node`.
+
+    '''
     if node.code_element.role == 'signature':
-        return []
+        return
 
-    if (type(node) != ONode
+    if (not isinstance(node, ONode)
         and node.code_element.path != None
         and node.code_element.type != 'module'):
-        signatures = [node.with_new_role('signature')]
-    else:
-        signatures = []
+        yield node.with_new_role('signature')
 
-    if cancel_event.is_set(): return ()
+    if cancel_event.is_set(): return
+
+    if resolution_pool.accepts(node):
+        children = resolution_pool.resolve(node, (call_graph_index.children,), cancel_event)
+        if cancel_event.is_set(): return
+
+        yield from children[call_graph_index.children]
+        return
 
     try:
-        children = list(node.children)
+        yield from iter_cancellable(node.children, cancel_event)
     except Exception as exc:
-        children = []
         logger.error('{}; while finding outbound connections of {}.'.format(exc, node), exc_info=get_user_config()['EXC_INFO'])
-    if cancel_event.is_set(): return ()
+
+
+def iter_callers(node: Node, cancel_event: threading.Event) -> Iterable[Node]:
+    '''Yield the parents of `node` as they are resolved
+
+    Stops early once `cancel_event` is set, also within the search of `node`.
+
+    '''
+    if node.code_element.role == 'signature' or cancel_event.is_set():
+        return
+
+    if resolution_pool.accepts(node):
+        parents = resolution_pool.resolve(node, (call_graph_index.parents,), cancel_event)
+        if cancel_event.is_set(): return
+
+        yield from parents[call_graph_index.parents]
+        return
 
     try:
-        parents = list(node.parents)
+        yield from iter_cancellable(node.iter_parents(), cancel_event)
     except Exception as exc:
-        parents = []
         logger.error('{}; while finding inbound connections of {}.'.format(exc, node), exc_info=get_user_config()['EXC_INFO'])
+
+
+def next_nodes(node: Node, cancel_event: threading.Event) -> List[Node]:
+    nodes = list(tz.concatv(iter_callees(node, cancel_event), iter_callers(node, cancel_event)))
     if cancel_event.is_set(): return ()
 
-    return signatures + children + parents
+    return nodes
+
+
+SearchBudget = NamedTuple('SearchBudget', [('seconds', Optional[float]),
+                                           ('items', Optional[int])])
+
+
+def search_budget() -> SearchBudget:
+    '''Budget of one search for callees or callers, from the user config'''
+    config = get_user_config()
+    return SearchBudget(seconds=config['SEARCH_TIME_BUDGET'] or None, items=config['SEARCH_ITEM_BUDGET'] or None)
+
+
+def stream_nodes(call_list: 'CallList', nodes: Iterable[Node], cancel_event: threading.Event,
+                 strict: bool, budget: Optional[SearchBudget] = None,
+                 pause_event: Optional[threading.Event] = None) -> Optional[List[Node]]:
+    '''Append `nodes` to `call_list` as they are resolved, then finish its stream
+
+    Sends the first node at once, then batches, so that the list neither waits
+    for the whole search nor redraws for every node. Unless `strict`, the
+    nodes are sent through signals, so this can run in a worker thread.
+
+    Once `budget` runs out, the rest of `nodes` is passed to
+    `CallList.truncateNodes` instead, so that the search can be continued from
+    there. The item budget is checked between nodes. The time budget is also a
+    deadline of `cancellation.scope` while nodes are resolved, so that a search
+    that finds no nodes for long pauses in its next resumable step, and yields
+    `cancellation.PAUSED`; see `cancellation.resumable`. Setting `pause_event`
+    stops the search the same way, as if the budget ran out.
+
+    The search reads the user config from one snapshot, taken at the start.
+
+    Returns all nodes, or None if `cancel_event` was set, the budget ran out,
+    or the search was paused.
+
+    '''
+    if strict:
+        append, finish, truncate = call_list.appendNodes, call_list.finishNodes, call_list.truncateNodes
+    else:
+        signaler = Signaler()
+        signaler.appendNodes.connect(call_list.appendNodes)
+        signaler.finishNodes.connect(call_list.finishNodes)
+        signaler.truncateNodes.connect(call_list.truncateNodes)
+        append, finish, truncate = (signaler.appendNodes.emit, signaler.finishNodes.emit,
+                                    signaler.truncateNodes.emit)
+
+    snapshot = user_config.snapshot()
+    started = time.monotonic()
+    deadline = started + budget.seconds if budget is not None and budget.seconds else None
+    iterator = iter(nodes)
+    items = []
+    batch = []
+    last_sent = None
+    while True:
+        with cancellation.scope(deadline=deadline, pause_event=pause_event), user_config.held(snapshot):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+
+        if item is cancellation.PAUSED:
+            if batch:
+                append(cancel_event, batch)
+            truncate(cancel_event, iterator)
+            return None
+
+        items.append(item)
+        batch.append(item)
+        now = time.monotonic()
+        if (last_sent is None
+                or len(batch) >= STREAM_BATCH_SIZE
+                or now - last_sent >= STREAM_BATCH_INTERVAL):
+            append(cancel_event, batch)
+            batch = []
+            last_sent = now
+
+        if ((budget is not None and ((budget.items and len(items) >= budget.items)
+                                     or (budget.seconds and now - started >= budget.seconds)))
+                or (pause_event is not None and pause_event.is_set())):
+            if batch:
+                append(cancel_event, batch)
+            truncate(cancel_event, iterator)
+            return None
+
+    if cancel_event.is_set():
+        return None
+
+    if batch:
+        append(cancel_event, batch)
+    finish(cancel_event)
+
+    return items
 
 
 class UnthreadedExecutor:
@@ -254,6 +409,162 @@ class MuxExecutor(Executor):
 
 executors.highlight_executor = MuxExecutor(max_workers=1, thread_name_prefix='highlight')
 executors.main_executor = MuxExecutor(max_workers=1, thread_name_prefix='main')
+executors.syntactic_executor = MuxExecutor(max_workers=1, thread_name_prefix='syntactic')
+
+
+def definition_key(code_element: CodeElement) -> tuple:
+    '''Identifies the definition of `code_element`, wherever it was reached from'''
+    if code_element.path is None or code_element.start_pos[0] is None:
+        # e.g. organizers and builtins, which cannot be told apart by position
+        return code_element
+
+    return (code_element.path, code_element.start_pos, code_element.type, code_element.role)
+
+
+class NextNodesCache:
+    """Bounded LRU memo of callees or callers of nodes, keyed by `definition_key`
+
+    The same function reached from different callers, by going back and forth
+    between columns, or by following a bookmark, shares one entry.
+
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self._items = collections.OrderedDict()  # type: Dict[tuple, Tuple[CodeElement, List[Node]]]
+
+    def get(self, code_element: CodeElement) -> Optional[List[Node]]:
+        key = definition_key(code_element)
+        with self.lock:
+            try:
+                _, items = self._items[key]
+            except KeyError:
+                return None
+            self._items.move_to_end(key)
+            return items
+
+    def put(self, code_element: CodeElement, items: List[Node]):
+        key = definition_key(code_element)
+        with self.lock:
+            self._items[key] = (code_element, items)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def __contains__(self, code_element: CodeElement):
+        with self.lock:
+            return definition_key(code_element) in self._items
+
+    def __len__(self):
+        with self.lock:
+            return len(self._items)
+
+    def clear(self):
+        with self.lock:
+            self._items.clear()
+
+    def invalidate_paths(self, paths: Set[str]):
+        '''Drop entries that are, or refer to, code in the files `paths`'''
+        with self.lock:
+            for key, (code_element, items) in list(self._items.items()):
+                if (refers_to_paths(code_element, paths)
+                        or any(refers_to_paths(node.code_element, paths) for node in items)):
+                    del self._items[key]
+
+
+def refers_to_paths(code_element: CodeElement, paths: Set[str]) -> bool:
+    return code_element.path in paths or code_element.call_pos[0] in paths
+
+
+class Prefetcher:
+    """Resolves the callees of the neighbors of the current item while the user is idle
+
+    Prefetching runs on `executors.main_executor`, behind the expansion of the
+    current item, and stores results in a `NextNodesCache`. Selecting another
+    item cancels pending prefetches and stops the running one through its
+    cancel event, unless it is resolving the newly selected node.
+
+    """
+
+    def __init__(self, cache: NextNodesCache):
+        self.cache = cache
+        self.futures = []
+
+        self.call_list = None  # type: Optional[CallList]
+
+        self.timer = QtCore.QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.start)
+
+    @property
+    def enabled(self):
+        config = get_user_config()
+        return config['MULTITHREADING'] and config['PREFETCH_NEIGHBORS'] > 0
+
+    def schedule(self, call_list: 'CallList'):
+        '''Prefetch around the current item of `call_list` once the user is idle'''
+        current = call_list.currentItem()
+        self.cancel(keep=getattr(current, 'node', None))
+
+        if self.enabled:
+            self.call_list = call_list
+            self.timer.start(PREFETCH_DELAY)
+
+    def neighbors(self, call_list: 'CallList') -> List[Node]:
+        row = call_list.currentRow()
+        nodes = []
+        for distance in range(1, get_user_config()['PREFETCH_NEIGHBORS'] + 1):
+            for neighbor_row in (row + distance, row - distance):
+                item = call_list.item(neighbor_row) if 0 <= neighbor_row < call_list.count() else None
+                if item is not None and hasattr(item, 'node'):
+                    nodes.append(item.node)
+        return nodes
+
+    def start(self):
+        if self.call_list is None or not self.enabled:
+            return
+
+        depth = get_user_config()['PREFETCH_DEPTH']
+
+        for node in self.neighbors(self.call_list):
+            if node.code_element in self.cache:
+                continue
+            cancel_event = threading.Event()
+            future = executors.main_executor.submit(self.prefetch, node, depth, cancel_event)
+            future.node = node
+            future.cancel_event = cancel_event
+            self.futures.append(future)
+
+    def prefetch(self, node: Node, depth: int, cancel_event: threading.Event):
+        items = self.cache.get(node.code_element)
+        if items is None:
+            items = list(iter_callees(node, cancel_event))
+            if cancel_event.is_set():
+                return
+            self.cache.put(node.code_element, items)
+
+        if depth > 1:
+            breadth = get_user_config()['PREFETCH_NEIGHBORS']
+            for item in [item for item in items if item.code_element.role != 'signature'][:breadth]:
+                if cancel_event.is_set():
+                    return
+                self.prefetch(item, depth - 1, cancel_event)
+
+    def cancel(self, keep: Optional[Node] = None):
+        self.timer.stop()
+        self.call_list = None
+
+        while self.futures:
+            future = self.futures.pop()
+            future.cancel()
+
+            if keep is not None and future.node.code_element == keep.code_element:
+                # about to be needed; let it finish
+                continue
+
+            if future.running():
+                future.cancel_event.set()
 
 
 class Signaler(QtCore.QObject):
@@ -268,9 +579,14 @@ class Signaler(QtCore.QObject):
     insertItem = QtCore.Signal(int, CallListItem)
     insertCallListItem = QtCore.Signal(int, object)
     focus = QtCore.Signal(CallListItem)
-    setPlainText_highlight_and_scroll = QtCore.Signal(bool, str, tuple)
+    setPlainText_highlight_and_scroll = QtCore.Signal(bool, str, tuple, int)
     progress = QtCore.Signal(int)
     setNode = QtCore.Signal(Node, list)
+    startNode = QtCore.Signal(Node, object)
+    appendNodes = QtCore.Signal(object, list)
+    finishNodes = QtCore.Signal(object)
+    truncateNodes = QtCore.Signal(object, object)
+    showProvisional = QtCore.Signal(object, list)
 
 
 class CallList(QtWidgets.QListWidget):
@@ -318,18 +634,289 @@ class CallList(QtWidgets.QListWidget):
 
         self.strict = False
 
+        # identifies the search streaming into this list; see `startNode`
+        self.stream_token = None  # type: Optional[threading.Event]
+        self.progress_item = None  # type: Optional[QtWidgets.QListWidgetItem]
+
+        # callers are searched after callees, in tasks of their own
+        self.callers_token = None  # type: Optional[threading.Event]
+        self.callers_pause = None  # type: Optional[threading.Event]; see `pauseCallers`
+        self.callers_futures = []
+        self.callers_placeholder = None  # type: Optional[QtWidgets.QListWidgetItem]
+        self.caller_nodes = []  # type: List[Node]
+
+        # shown until the search confirms them; see `showProvisional`
+        self.provisional_nodes = []  # type: List[Node]
+
+        # the rest of a search that ran out of its budget; see `truncateNodes`
+        self.continuation = None  # type: Optional[Tuple[threading.Event, Iterator[Node]]]
+        self.continue_placeholder = None  # type: Optional[QtWidgets.QListWidgetItem]
+
+    def resetStream(self):
+        self.stream_token = None
+        self.progress_item = None
+        self.callers_token = None
+        self.callers_pause = None
+        self.callers_placeholder = None
+        self.caller_nodes = []
+        self.provisional_nodes = []
+        self.continuation = None
+        self.continue_placeholder = None
+
+    @property
+    def truncated(self) -> bool:
+        '''Whether the search for nodes of this list stopped early, and can be continued'''
+        return self.continuation is not None
+
     def setNode(self, node: Node, items: List[Node]):
         self.node = node
         self.clear()
         self.nodes_to_items.clear()
+        self.resetStream()
 
-        for ii, item in enumerate(filter(tz.identity, items)):  # filter null items -- TODO: find better place for filter
+        items = list(filter(tz.identity, items))  # filter null items -- TODO: find better place for filter
+        for ii, item in enumerate(items):
             self.insertCallListItem(ii, item)
+        self.watchFiles(items)
 
         # NOTE: previously `setNode` involved submitting a job to an Executor
         # and appending the future to self.populate_futures. Currently
         # self.populate_futures is always empty.
 
+    def _addProgressItem(self, text: str):
+        self.progress_item = QtWidgets.QListWidgetItem(text)
+        self.progress_item.setFlags(QtCore.Qt.ItemNeverHasChildren)
+        self.progress_item.poked = 0
+        self.progress_item.base_text = text
+        self.addItem(self.progress_item)
+
+    def _removeProgressItem(self):
+        self.stream_token = None
+        if self.progress_item is not None:
+            self.takeItem(self.row(self.progress_item))
+            self.progress_item = None
+
+    @QtCore.Slot(Node, object)
+    def startNode(self, node: Node, token: threading.Event):
+        '''Show `node` with no items yet, and a progress indicator
+
+        Callees arrive through `appendNodes` and `finishNodes` with the same
+        `token`. Calls with another token, or after the token is set (i.e. the
+        search was cancelled), are from stale searches and are ignored. Once
+        the callees are finished, the callers are searched, or offered with
+        `callers_placeholder` if the user config sets `CALLERS_ON_DEMAND`.
+
+        '''
+        if token.is_set() or token is self.stream_token:
+            return
+
+        self.setNode(node, [])
+        self.stream_token = token
+        self._addProgressItem('searching . . .')
+
+    @QtCore.Slot(object, list)
+    def appendNodes(self, token: threading.Event, nodes: List[Node]):
+        if token is not self.stream_token or token.is_set():
+            return
+
+        nodes = list(filter(tz.identity, nodes))
+        if token is self.callers_token:
+            self.caller_nodes.extend(nodes)
+
+        if self.provisional_nodes:
+            self._addConfirmingNodes(nodes)
+        else:
+            self.add_nodes(nodes)
+        self.progress_item.setText('{} ({} found)'.format(self.progress_item.base_text, len(self.nodes_to_items)))
+
+    @QtCore.Slot(object)
+    def finishNodes(self, token: threading.Event):
+        if token is not self.stream_token:
+            return
+
+        self._removeProgressItem()
+
+        if token is self.callers_token:
+            self.callers_token = None
+            self._dropProvisional(('parent',))
+        elif get_user_config()['CALLERS_ON_DEMAND']:
+            self._dropProvisional(('child', 'definition', 'parent'))
+
+            if self.node.code_element.role != 'signature' and self.node.code_element.type != 'organizer':
+                self._addCallersPlaceholder()
+        else:
+            self._dropProvisional(('child', 'definition'))
+
+            if self.node.code_element.role != 'signature' and self.node.code_element.type != 'organizer':
+                self.findCallers()
+
+    @QtCore.Slot(object, object)
+    def truncateNodes(self, token: threading.Event, continuation: Iterator[Node]):
+        '''Stop the search with `token`, which ran out of its budget, until `continueSearch`
+
+        Callers are not searched until the callees are finished. Provisional
+        callers are dropped when the search for callers stops.
+
+        '''
+        if token is not self.stream_token or token.is_set():
+            return
+
+        self._removeProgressItem()
+        self.continuation = (token, continuation)
+
+        if token is self.callers_token:
+            # the search will not confirm them before it is continued
+            self._dropProvisional(('parent',))
+
+        self.continue_placeholder = QtWidgets.QListWidgetItem(
+            'stopped at {} found; continue (m)'.format(len(self.nodes_to_items)))
+        self.continue_placeholder.setForeground(QtGui.QColor('gray'))
+        self.continue_placeholder.poked = 0
+        self.addItem(self.continue_placeholder)
+
+    def continueSearch(self):
+        '''Continue the search stopped by `truncateNodes` where it stopped'''
+        if self.continuation is None:
+            return
+
+        token, continuation = self.continuation
+        self.continuation = None
+        self.takeItem(self.row(self.continue_placeholder))
+        self.continue_placeholder = None
+
+        self.stream_token = token
+        self._addProgressItem('searching callers . . .' if token is self.callers_token else 'searching . . .')
+
+        pause_event = None
+        if token is self.callers_token:
+            self.callers_pause = pause_event = threading.Event()
+
+        if self.strict:
+            stream_nodes(self, continuation, token, self.strict, search_budget(), pause_event)
+        else:
+            future = executors.main_executor.submit(stream_nodes, self, continuation, token, self.strict,
+                                                    search_budget(), pause_event)
+            future.node = self.node
+            future.cancel_event = token
+            if token is self.callers_token:
+                self.callers_futures.append(future)
+
+    @QtCore.Slot(object, list)
+    def showProvisional(self, token: threading.Event, nodes: List[Node]):
+        '''Show `nodes` until the search for callees with `token` finishes
+
+        Streamed nodes with the same code element confirm the provisional ones
+        in place. The others are removed when the search for callees, or
+        callers for provisional callers, finishes, unless they are the
+        current item. Provisional callers are not kept if the user config
+        sets `CALLERS_ON_DEMAND`. Nodes arriving after the callees were found
+        are dropped.
+
+        '''
+        if token is not self.stream_token or token is self.callers_token or token.is_set():
+            return
+
+        streamed = {node.code_element for node in self.nodes_to_items}
+        nodes = [node for node in nodes if node.code_element not in streamed]
+
+        self.add_nodes(nodes)
+        self.provisional_nodes.extend(nodes)
+
+    def _addConfirmingNodes(self, nodes: List[Node]):
+        '''Add `nodes`, showing those that confirm a provisional node in its item'''
+        provisional = {node.code_element: node for node in self.provisional_nodes}
+
+        for node in nodes:
+            confirmed = provisional.pop(node.code_element, None)
+            if confirmed is None:
+                self.add_nodes([node])
+            else:
+                item = self.nodes_to_items.pop(confirmed)
+                item.setNode(node)
+                self.nodes_to_items[node] = item
+
+        self.provisional_nodes = [node for node in self.provisional_nodes if node in self.nodes_to_items]
+
+    def _dropProvisional(self, roles: Tuple[str, ...]):
+        current = self.currentItem()
+        dropped = [node for node in self.provisional_nodes
+                   if node.code_element.role in roles and self.nodes_to_items[node] is not current]
+
+        self.remove_nodes(dropped)
+        self.provisional_nodes = [node for node in self.provisional_nodes if node not in dropped]
+
+    def _addCallersPlaceholder(self):
+        self.callers_placeholder = QtWidgets.QListWidgetItem('find callers (c)')
+        self.callers_placeholder.setForeground(QtGui.QColor('gray'))
+        self.callers_placeholder.poked = 0
+        self.addItem(self.callers_placeholder)
+
+    def findCallers(self):
+        '''Search for the callers of `self.node`, streaming them in after the callees'''
+        if self.callers_placeholder is not None:
+            self.takeItem(self.row(self.callers_placeholder))
+            self.callers_placeholder = None
+
+        # a resumed search starts over
+        self.remove_nodes(self.caller_nodes)
+        self.caller_nodes = []
+
+        cancel_event = threading.Event()
+        self.stream_token = self.callers_token = cancel_event
+        self.callers_pause = threading.Event()
+        self._addProgressItem('searching callers . . .')
+
+        if self.strict:
+            self.streamCallers(self.node, cancel_event, self.callers_pause)
+        else:
+            future = executors.main_executor.submit(self.streamCallers, self.node, cancel_event, self.callers_pause)
+            future.node = self.node
+            future.cancel_event = cancel_event
+            self.callers_futures.append(future)
+
+    def streamCallers(self, node: Node, cancel_event: threading.Event,
+                      pause_event: Optional[threading.Event] = None):
+        cache = self.map_widget.callers_cache
+
+        items = cache.get(node.code_element)
+        if items is not None:
+            stream_nodes(self, items, cancel_event, self.strict)
+        else:
+            items = stream_nodes(self, iter_callers(node, cancel_event), cancel_event, self.strict,
+                                 search_budget(), pause_event)
+            if items is not None:
+                cache.put(node.code_element, items)
+
+    def pauseCallers(self):
+        '''Stop searching for callers at the next step, keeping what was found
+
+        The search ends through `truncateNodes`, so that `continueSearch`
+        continues it where it stopped.
+
+        '''
+        if self.callers_pause is not None:
+            self.callers_pause.set()
+
+    def cancelCallers(self):
+        '''Stop searching for callers; the search can be started again with `findCallers`'''
+        while self.callers_futures:
+            future = self.callers_futures.pop()
+            future.cancel()
+
+            if not future.done():
+                future.cancel_event.set()
+
+        if self.callers_token is not None:
+            self.callers_token.set()
+            self.callers_token = None
+            self._removeProgressItem()
+            self._dropProvisional(('parent',))
+            if self.continue_placeholder is not None:
+                self.takeItem(self.row(self.continue_placeholder))
+                self.continue_placeholder = None
+                self.continuation = None
+            self._addCallersPlaceholder()
+
     def focus(self, current):
         self.info_widget.showInfo(current.node)
         if not self.map_widget.auto_highlight:
@@ -352,13 +939,25 @@ class CallList(QtWidgets.QListWidget):
             fut.cancel_event.set()
 
     def itemChangedSlot(self, current, previous):
+        if current is not None and current is self.callers_placeholder:
+            self.findCallers()
+            return
+
+        if current is not None and current is self.continue_placeholder:
+            self.continueSearch()
+            return
+
+        if current is not None and self.callers_token is not None and self.stream_token is self.callers_token:
+            # Callers are searched on the same thread as callees; do not make
+            # the next column wait for them.
+            self.pauseCallers()
+
         while self.add_next_futures:
             future = self.add_next_futures.pop()
             future.cancel()
-            future.node.cancel_search()
 
-            if not future.done() and not future.cancel_event.is_set():
-                future.cancel_event.set()
+            # also stops continuations of the search, which use the same event
+            future.cancel_event.set()
 
         if current:
             try:
@@ -366,6 +965,8 @@ class CallList(QtWidgets.QListWidget):
             except AttributeError:
                 return
 
+            self.map_widget.prefetcher.schedule(self)
+
             # clear immediately so user cannot issue commands on stale items
             self.map_widget.prepareToSetCallList(self.index + 1)
 
@@ -375,11 +976,12 @@ class CallList(QtWidgets.QListWidget):
 
             self.focus(current)
 
+            cancel_event = threading.Event()
+            self.findProvisionalNodes(node, cancel_event)
+
             if self.strict:
-                cancel_event = threading.Event()
                 self.makeNextCallList(node, cancel_event)
             else:
-                cancel_event = threading.Event()
                 add_next_future = executors.main_executor.submit(self.makeNextCallList, node, cancel_event)
                 add_next_future.node = node
                 add_next_future.cancel_event = cancel_event
@@ -403,28 +1005,99 @@ class CallList(QtWidgets.QListWidget):
             #assert 0
             #print(self.items())
 
+    def _streamRow(self) -> int:
+        # after the last streamed node, before the provisional ones and the progress indicator
+        for row in reversed(range(self.count())):
+            node = getattr(self.item(row), 'node', None)
+            if node is not None and not node.provisional:
+                return row + 1
+        return 0
+
     def add_nodes(self, nodes: Iterable[Node]):
-        start = self.count()
+        # keep the progress indicator last, and provisional nodes after streamed ones
+        if self.provisional_nodes:
+            start = self._streamRow()
+        else:
+            start = self.count() if self.progress_item is None else self.row(self.progress_item)
+        nodes = list(nodes)
         for ii, node in enumerate(nodes):
             self.insertCallListItem(start + ii, node)
+        self.watchFiles(nodes)
 
     @QtCore.Slot(int, object)
     def insertCallListItem(self, ii, node: Node):
-        self.nodes_to_items[node] = CallListItem(node)
-        self.insertItem(ii, CallListItem(node))
+        self.nodes_to_items[node] = item = CallListItem(node)
+        self.insertItem(ii, item)
+
+    def watchFiles(self, nodes: List[Node]):
+        # once per batch; `watch` lists the watched files on each call
+        self.map_widget.file_watcher.watch({node.code_element.path for node in nodes})
+
+    def findProvisionalNodes(self, node: Node, cancel_event: threading.Event):
+        '''Start the next column with the provisional neighbors of `node`, unless memoized
+
+        The neighbors are found on `executors.syntactic_executor`, so they can
+        be shown while `makeNextCallList` resolves the exact ones.
+
+        '''
+        if (not get_user_config()['SYNTACTIC_FIRST_TIER']
+                or node.code_element in self.map_widget.next_nodes_cache):
+            return
+
+        next_call_list = self.map_widget.callLists[self.index + 1]
+        next_call_list.startNode(node, cancel_event)
+
+        if self.strict:
+            self.showProvisionalNodes(next_call_list, node, cancel_event)
+        else:
+            future = executors.syntactic_executor.submit(self.showProvisionalNodes, next_call_list, node,
+                                                         cancel_event)
+            future.node = node
+            future.cancel_event = cancel_event
+            self.add_next_futures.append(future)
+
+    def showProvisionalNodes(self, call_list: 'CallList', node: Node, cancel_event: threading.Event):
+        try:
+            nodes = node.provisional_neighbors(cancel_event)
+        except Exception as exc:
+            logger.error('{}; while finding provisional connections of {}.'.format(exc, node),
+                         exc_info=get_user_config()['EXC_INFO'])
+            return
+
+        if cancel_event.is_set():
+            return
+
+        if self.strict:
+            call_list.showProvisional(cancel_event, nodes)
+        else:
+            signaler = Signaler()
+            signaler.showProvisional.connect(call_list.showProvisional)
+            signaler.showProvisional.emit(cancel_event, nodes)
 
     def makeNextCallList(self, node: Node, cancel_event: threading.Event):
-        items = next_nodes(node, cancel_event)
-        if not cancel_event.is_set():
-            next_call_list = self.map_widget.callLists[self.index + 1]
-            if self.strict:
-                next_call_list.strict = True
-                next_call_list.setNode(node, items)
-                next_call_list.strict = False
-            else:
-                signaler = Signaler()
-                signaler.setNode.connect(next_call_list.setNode)
-                signaler.setNode.emit(node, items)
+        next_call_list = self.map_widget.callLists[self.index + 1]
+
+        if self.strict:
+            next_call_list.strict = True
+            next_call_list.startNode(node, cancel_event)
+        else:
+            signaler = Signaler()
+            signaler.startNode.connect(next_call_list.startNode)
+            signaler.startNode.emit(node, cancel_event)
+
+        cache = self.map_widget.next_nodes_cache
+
+        items = cache.get(node.code_element)
+        if items is not None:
+            stream_nodes(next_call_list, items, cancel_event, self.strict)
+        else:
+            items = stream_nodes(next_call_list, iter_callees(node, cancel_event), cancel_event, self.strict,
+                                 search_budget())
+            if items is not None:
+                cache.put(node.code_element, items)
+
+        if self.strict:
+            next_call_list.strict = False
 
     def walk_right(self):
         return self.map_widget.callLists[self.index + 1:]
@@ -460,14 +1133,26 @@ class CallList(QtWidgets.QListWidget):
             self.setPalette(self.unfocused_palette)
 
     def keyPressEvent(self, event):
+        if event.key() == Qt.Qt.Key_C and self.callers_placeholder is not None:
+            self.findCallers()
+            event.accept()
+            return
+
+        if event.key() == Qt.Qt.Key_M and self.continue_placeholder is not None:
+            self.continueSearch()
+            event.accept()
+            return
+
         super().keyPressEvent(event) #ll.setFocus()
 
         if not event.isAccepted():
             if event.key() == Qt.Qt.Key_Right:
                 _next = self.next_call_list()
                 if _next and _next.count() > 0:
-                    if all(future.done() for future in
-                           tz.concatv(self.populate_futures, self.add_next_futures)):
+                    # nodes can be visited while more are being found
+                    if hasattr(_next.item(0), 'node') or all(
+                            future.done() for future in
+                            tz.concatv(self.populate_futures, self.add_next_futures)):
                         _next.setFocus()
                         self.map_widget.ensureWidgetVisible(_next, 0, 0)
                         if self.next_call_list().currentItem() is None:
@@ -509,6 +1194,8 @@ class MapLayout(QtWidgets.QHBoxLayout):
 
 
 class MapWidget(QtWidgets.QScrollArea):
+    root_nodes_loaded = QtCore.Signal(list)
+
     def __init__(self, parent, info_widget, status_bar, node: Node):
         super().__init__(parent)
 
@@ -517,6 +1204,11 @@ class MapWidget(QtWidgets.QScrollArea):
 
         self.callLists = []
 
+        self.next_nodes_cache = NextNodesCache(NEXT_NODES_CACHE_SIZE)
+        self.callers_cache = NextNodesCache(NEXT_NODES_CACHE_SIZE)
+        self.prefetcher = Prefetcher(self.next_nodes_cache)
+        self.file_watcher = ProjectWatcher(self, executors.main_executor)
+
         self.setFocusPolicy(QtCore.Qt.StrongFocus)
         self.setWidget(QtWidgets.QWidget(self))
 
@@ -531,6 +1223,7 @@ class MapWidget(QtWidgets.QScrollArea):
         self.prepareToSetCallList(0)
 
         self.root_list_items = {}  # type: Dict[Node, CallListItem]
+        self.root_nodes_loaded.connect(self._setRootNodes)
 
         self.callLists[0].setNode(node, node.children)
         wait(self.callLists[0].populate_futures)
@@ -542,6 +1235,41 @@ class MapWidget(QtWidgets.QScrollArea):
 
         self.auto_highlight = True
 
+    def loadRootNodes(self, project: Project, platform: str = 'python') -> Future:
+        '''Resolve the root nodes of `project` in the background, filling the root list as they come
+
+        The root list shows the nodes as they are resolved. Once all are
+        resolved, they become the children of the root node, and
+        `root_nodes_loaded` is emitted with them.
+
+        '''
+        root_list = self.callLists[0]
+        cancel_event = threading.Event()
+
+        root_list.startNode(root_list.node, cancel_event)
+        root_list.progress_item.base_text = 'loading . . .'
+        root_list.progress_item.setText(root_list.progress_item.base_text)
+
+        def load():
+            nodes = stream_nodes(root_list, project.iter_platform_specific_nodes(platform), cancel_event,
+                                 strict=False)
+            if nodes is not None:
+                self.root_nodes_loaded.emit(nodes)
+            return nodes
+
+        future = executors.main_executor.submit(load)
+        future.cancel_event = cancel_event
+        return future
+
+    @QtCore.Slot(list)
+    def _setRootNodes(self, nodes: List[Node]):
+        root_list = self.callLists[0]
+        root_list.node.children[:] = nodes
+
+        self.root_list_items.clear()
+        for child_node, item in root_list.nodes_to_items.items():
+            self.root_list_items[child_node] = item
+
     def prepareToSetCallList(self, index):
         oldIndex = self.currentIndex
         self.currentIndex = index
@@ -559,6 +1287,8 @@ class MapWidget(QtWidgets.QScrollArea):
             fut.cancel()
             fut.cancel_event.set()
 
+        ll.cancelCallers()
+        ll.resetStream()
         ll.clear()
         ll.nodes_to_items.clear()
         item = QtWidgets.QListWidgetItem('wait . . .')
@@ -611,6 +1341,8 @@ class MapWidget(QtWidgets.QScrollArea):
 
             for jj in range(ll.count()):
                 ll_item = ll.item(jj)
+                if not hasattr(ll_item, 'node'):
+                    continue
                 ll_code_element = ll_item.node.code_element
                 if ll_code_element == bookmark_code_element:
                     ll.setCurrentItem(ll_item)
@@ -624,7 +1356,8 @@ class MapWidget(QtWidgets.QScrollArea):
                     near_misses.append((jj, 'Same except name.'))
             else:
                 if near_misses:
-                    idx, note = near_misses[0]
+                    # prefer a definition that moved over one that was renamed
+                    idx, note = min(near_misses, key=lambda miss: miss[1] != 'Same except location.')
                     self.status_bar.showMessage(
                         'Exact bookmark not found. Nearest match followed. ({})'.format(note),
                         msecs=10000)
@@ -638,6 +1371,39 @@ class MapWidget(QtWidgets.QScrollArea):
 
             ll.strict = False
 
+    def refreshChangedFiles(self, paths: Iterable[str], stale: Iterable[Node], additional: Iterable[Node]):
+        '''Re-resolve the shown columns that refer to code in the changed files `paths`
+
+        `stale` root nodes are replaced with `additional` ones. Columns left of
+        the first affected column are kept, and the selected path is followed
+        again afterwards.
+
+        '''
+        paths = set(paths)
+        old_code_element_path = [node.code_element for node in self.node_path()]
+
+        self.prefetcher.cancel()
+        self.next_nodes_cache.invalidate_paths(paths)
+        self.callers_cache.invalidate_paths(paths)
+
+        root_list = self.callLists[0]
+        root_list.strict = True
+        root_list.remove_nodes(stale)
+        root_list.add_nodes(additional)
+        root_list.strict = False
+
+        for ll in self.callLists[1:self.currentIndex + 1]:
+            if (refers_to_paths(ll.node.code_element, paths)
+                    or any(refers_to_paths(item.code_element, paths) for item in ll.nodes_to_items)):
+                previous = self.callLists[ll.index - 1]
+                if previous.currentItem() is not None:
+                    previous.strict = True
+                    previous.itemChangedSlot(previous.currentItem(), None)
+                    previous.strict = False
+                break
+
+        self.open_bookmark(old_code_element_path)
+
     def toggle_auto_highlight(self):
         self.auto_highlight = not self.auto_highlight
         self.status_bar.showMessage(
@@ -750,23 +1516,52 @@ class InfoWidget(QtWidgets.QWidget):
             self.status_bar.showMessage(message, 10000)
 
 
+_identifier_pattern = re.compile(r'\w+')
+
+
+def highlight_length(call_pos: tuple) -> Optional[int]:
+    '''Number of characters to highlight at `call_pos`
+
+    Uses the end position if it is on the same line, otherwise the identifier
+    at the start position, read from the memory-mapped source file.
+
+    '''
+    path, (line, column), (end_line, end_column) = call_pos
+
+    if end_line == line and end_column is not None and end_column > column:
+        return end_column - column
+
+    try:
+        text = source_file(Path(path)).line(line)
+    except OSError:
+        return None
+
+    match = _identifier_pattern.match(text or '', column)
+    return len(match.group()) if match else None
+
+
 class TargetHighlighter:
     def __init__(self, text_edit):
         self.text_edit = text_edit
         self.current_highlight_cursor = None
 
-    def highlight(self, call_pos):
+    def highlight(self, call_pos, first_line: int = 1):
+        # `first_line` is the number of the first line shown in the text edit
         self.reset()
 
         if call_pos[0] != None and call_pos[1] != (None, None):
             document = self.text_edit.document()
             self.call_pos = call_pos
             cursor = QtGui.QTextCursor(
-                document.findBlockByLineNumber(call_pos[1][0] - 1))
+                document.findBlockByLineNumber(call_pos[1][0] - first_line))
             cursor.setPosition(cursor.block().position() + call_pos[1][1])
 
-            anchor = cursor.position()
-            cursor.movePosition(QtGui.QTextCursor.NextWord, anchor)
+            length = highlight_length(call_pos)
+            if length:
+                cursor.setPosition(cursor.position() + length, QtGui.QTextCursor.KeepAnchor)
+            else:
+                anchor = cursor.position()
+                cursor.movePosition(QtGui.QTextCursor.NextWord, anchor)
 
             self.current_highlight_cursor = cursor
             cursor.orig_format = cursor.charFormat()
@@ -787,13 +1582,13 @@ class TargetHighlighter:
 
 
 class PlainTextEdit(QtWidgets.QTextEdit):
-    def setPlainText_highlight_and_scroll(self, reuse: bool, text: str, call_pos: tuple):
+    def setPlainText_highlight_and_scroll(self, reuse: bool, text: str, call_pos: tuple, first_line: int = 1):
         if not reuse:
             self.setPlainText(text)
 
-        self.highlighter.highlight(call_pos)
+        self.highlighter.highlight(call_pos, first_line)
         if call_pos[1][0]:
-            self.scrollToLine(call_pos[1][0] - 1 - 8)
+            self.scrollToLine(call_pos[1][0] - first_line - 8)
 
     def scrollToLine(self, line):
         cursor = self.textCursor()
@@ -966,6 +1761,10 @@ class TextSettingsWidget(QtWidgets.QWidget):
 
                 old_code_element_path = list(node.code_element for node in self.map_widget.node_path())
 
+                self.map_widget.prefetcher.cancel()
+                self.map_widget.next_nodes_cache.clear()
+                self.map_widget.callers_cache.clear()
+
                 node = OrganizerNode('Root', [],
                                      list(tz.concatv(self.project.module_nodes['python'].values(),
                                                      self.project.script_nodes['python'].values())))
@@ -1173,41 +1972,18 @@ class MainWidget(QtWidgets.QSplitter):
 
 def make_app(user_scope_settings: UserScopeSettings, project_directory: Optional[str],
              enable_ipython_support: bool = False, show_gui: bool = True):
-    from .jedi_dump import make_scope_settings
-
     ui_toplevel = ModuleType('call_map_ui_toplevel')
 
-    project = project_settings_module.Project(project_directory)
+    # root nodes are resolved once the window is shown; see `MapWidget.loadRootNodes`
+    project = project_settings_module.make_project(user_scope_settings, project_directory, resolve_nodes=False)
     ui_toplevel.project = project
 
-    stored_settings = project.load_from_persistent_storage()
-    is_new_project = bool(stored_settings)
-    project.update_settings(stored_settings)
-
-    scope_settings = make_scope_settings(is_new_project, project.scope_settings, user_scope_settings)
-
-    project.settings.update(
-        {project_settings_module.modules: scope_settings.module_names,
-         project_settings_module.scripts: scope_settings.scripts,
-         project_settings_module.sys_path: scope_settings.effective_sys_path})
-
-    project.update_module_resolution_path('python')
-    project.make_platform_specific_nodes('python')
-
-    errors = list(tz.concatv(project.failures['python'][project_settings_module.modules].values(),
-                             project.failures['python'][project_settings_module.scripts].values()))
-    # will also put in status bar later
-    for error in errors:
-        logger.error(error)
-
     try:
         ui_toplevel.project.update_persistent_storage()
     except FileNotFoundError as err:
         raise BadArgsError(err)
 
-    node = OrganizerNode('Root', [],
-                         list(tz.concatv(project.module_nodes['python'].values(),
-                                         project.script_nodes['python'].values())))
+    node = project.root_node('python')
 
     CallListItem.configure_role_markers(
         get_user_config()['UNICODE_ROLE_MARKERS'])
@@ -1237,8 +2013,19 @@ def make_app(user_scope_settings: UserScopeSettings, project_directory: Optional
     map_widget = MapWidget(main_widget, info_widget, status_bar, node)
     ui_toplevel.map_widget = map_widget
 
+    def refresh_changed_files(paths):
+        stale, additional = project.refresh_paths('python', paths)
+        if str(main_widget.text_edit.current_path) in paths:
+            main_widget.text_edit.current_path = None
+            main_widget.text_edit.current_lines = None
+        map_widget.refreshChangedFiles(paths, stale, additional)
+        status_bar.showMessage('Reloaded {}'.format(', '.join(Path(path).name for path in paths)), 5000)
+
+    map_widget.file_watcher.files_changed.connect(refresh_changed_files)
+
     text_edit_0 = PlainTextEdit()
     text_edit_0.current_path = None
+    text_edit_0.current_lines = None  # (first, stop) line numbers shown, or None for the whole file
     text_edit_0.highlighter = TargetHighlighter(text_edit_0)
 
     text_edit_0.setReadOnly(True)
@@ -1294,8 +2081,15 @@ def make_app(user_scope_settings: UserScopeSettings, project_directory: Optional
     status_bar.messageChanged.connect(fix_status_bar_shading)
     status_bar.showMessage('Starting', 1)
     status_bar.hide()
-    if errors:
-        status_bar.showMessage('. '.join(e.args[0] for e in errors), 10000)
+
+    def report_errors(nodes):
+        errors = project.errors('python')
+        for error in errors:
+            logger.error(error)
+        if errors:
+            status_bar.showMessage('. '.join(e.args[0] for e in errors), 10000)
+
+    map_widget.root_nodes_loaded.connect(report_errors)
 
     #ui_toplevel.right_layout = QtWidgets.QStackedLayout(main_widget.layout())
     main_widget.left_layout.addWidget(map_widget)
@@ -1341,6 +2135,8 @@ def make_app(user_scope_settings: UserScopeSettings, project_directory: Optional
 
     map_widget.callLists[0].setFocus()
 
+    ui_toplevel.root_nodes_future = map_widget.loadRootNodes(project)
+
     def customFullScreen(self):
         # experimental
         self.setWindowFlags(Qt.Qt.FramelessWindowHint)
@@ -1357,56 +2153,18 @@ def make_app(user_scope_settings: UserScopeSettings, project_directory: Optional
     return ui_toplevel
 
 
-def _resolve_robustly(str_paths: List[str]):
-    import os.path
-    paths = []
-    for ff in str_paths:
-        try:
-            pp = Path(ff).resolve()
-        except FileNotFoundError as err:
-            logger.error('Could not resolve {} from {}'.format(ff, os.path.realpath('.')))
-        else:
-            paths.append(pp)
-
-    return paths
-
-
 def main():
     import argparse
+    from .arguments import add_scope_arguments, user_scope_settings_from_args
 
     parser = argparse.ArgumentParser(
-        description='Create root node from filename contents')
-    parser.add_argument('-m', '--modules', metavar='M', type=str, nargs='+',
-                        help='Modules (e.g. "os.path").',
-                        default=[])
-    parser.add_argument('-f', '--files', metavar='F', type=str, nargs='+',
-                        help='Script or module file names.',
-                        default=[])
-    parser.add_argument('-p', '--add-to-sys-path', metavar='P', type=str,
-                        nargs='+', help='''Directories to add to the analysis
-                        Python module search path ("sys_path"), where modules
-                        will be found during analysis. By default the Python
-                        interpreter's `sys.path` is included. Note that the
-                        module resolution order in Python is first match; earlier items in
-                        `sys_path` have higher priority.''', default=[])
-    parser.add_argument('-d', '--project-directory', metavar='PROJ_DIR', action='store', type=Path,
-                        default=None,
-                        help=('''Where to store `call_map` bookmarks, modules, sys_path, etc.
-                              If not set, these will not be saved.'''))
-    parser.add_argument('--no-interpreter-sys-path', action='store_true',
-                        help='''Tells `call_map` not explicitly include the
-                        `sys.path` from the interpreter in the Python module
-                        search path. (Note that the analysis backend `jedi` as
-                        of v0.10.0 will still fall back to the interpreter's
-                        `sys.path` if it cannot resolve modules using the
-                        `sys_path` that `call_map` passes to it.)
-                        ''')
+        description='Create root node from filename contents',
+        epilog='Run `python -m call_map export -h` for the headless call graph export.')
+    add_scope_arguments(parser)
     parser.add_argument('--ipython', action='store_true', help='''Enables
                         IPython integration. See
                         `dev_helper_tools/shell_tools.zsh` in the `call_map`
                         source tree.''')
-    parser.add_argument('-v', '--verbose', action='store_true', help='''Increase
-                        logging verbosity.''')
     parser.add_argument('--version', action='store_true', help='''Print version and exit.''')
 
     args = parser.parse_args()
@@ -1421,17 +2179,7 @@ def main():
     else:
         logging.basicConfig(level=get_user_config()['LOG_LEVEL'])
 
-    module_names = args.modules
-
-    file_names = _resolve_robustly(args.files)  # type: List[Path]
-
-    additional_paths = _resolve_robustly(args.add_to_sys_path)  # type: List[Path]
-
-    user_scope_settings = UserScopeSettings(
-        module_names=module_names,
-        file_names=file_names,
-        include_runtime_sys_path=(not args.no_interpreter_sys_path),
-        add_to_sys_path=additional_paths)
+    user_scope_settings = user_scope_settings_from_args(args)
 
     try:
         ui_toplevel = make_app(user_scope_settings, project_directory=args.project_directory)
@@ -0,0 +1,206 @@
+"""
+Static import graph of Python files
+
+Used by `jedi_alt.api_usages` to skip modules that cannot refer to a
+definition: a usage of a definition in module M can only be in M or in a
+module that imports M, directly or through other modules. Imports are read
+from the `import` statements of each file without evaluating it, and files are
+re-read when their modification time or size changes.
+
+Files with dynamic imports, such as `importlib.import_module`, are not
+recognized as importers; the `IMPORT_GRAPH_FILTER` user config turns the
+filter off.
+
+"""
+
+import os
+import ast
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .sys_path_index import sys_path_index
+
+logger = logging.getLogger(__name__)
+
+
+def _stat_key(path: str) -> Optional[tuple]:
+    try:
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    else:
+        return (stat.st_mtime_ns, stat.st_size)
+
+
+def absolute_module_name(module_name: Optional[str], is_package: bool, level: int,
+                         module: Optional[str]) -> Optional[str]:
+    '''Name of the module imported with `level` dots and `module` from module `module_name`
+
+    Returns None if the import is relative and `module_name` is unknown or not
+    deep enough.
+    '''
+    if not level:
+        return module
+
+    if not module_name:
+        return None
+
+    parts = module_name.split('.')
+    if not is_package:
+        parts = parts[:-1]
+    if level > 1:
+        parts = parts[:-(level - 1)]
+    if not parts:
+        return None
+
+    return '.'.join(parts + ([module] if module else []))
+
+
+def _with_parents(module_name: str) -> List[str]:
+    '''`module_name` and its parent packages, e.g. `aa`, `aa.bb` and `aa.bb.cc` for `aa.bb.cc`'''
+    parts = module_name.split('.')
+    return ['.'.join(parts[:ii]) for ii in range(1, len(parts) + 1)]
+
+
+def scan_imports(source: bytes, module_name: Optional[str], is_package: bool) -> Set[str]:
+    '''Names of the modules imported by `source`, the code of module `module_name`
+
+    For `from aa import bb`, both `aa` and `aa.bb` are included, because `bb`
+    may be a submodule. Parent packages are included too, because importing
+    `aa.bb` also imports `aa`, and `import aa.bb` binds it. Relative imports are resolved against `module_name`,
+    and skipped if it is unknown.
+
+    :raises SyntaxError: if `source` cannot be parsed
+    '''
+    imported = set()  # type: Set[str]
+
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imported.update(_with_parents(alias.name))
+
+        elif isinstance(node, ast.ImportFrom):
+            base = absolute_module_name(module_name, is_package, node.level, node.module)
+            if base is None:
+                continue
+
+            imported.update(_with_parents(base))
+            imported.update(base + '.' + alias.name for alias in node.names if alias.name != '*')
+
+    return imported
+
+
+class ImportGraph:
+    def __init__(self):
+        self.lock = threading.RLock()
+
+        # maps path to (stat key, module name, imported module names or None if unparsable)
+        self._files = {}  # type: Dict[str, Tuple[Optional[tuple], Optional[str], Optional[Set[str]]]]
+
+    def clear(self):
+        with self.lock:
+            self._files.clear()
+
+    def invalidate(self, paths: Iterable[str]):
+        with self.lock:
+            for path in paths:
+                self._files.pop(os.path.realpath(str(path)), None)
+
+    def imports(self, path: str, sys_path: Sequence[str]) -> Optional[Set[str]]:
+        '''Names of the modules imported by the file at `path`, or None if it cannot be read'''
+        path = os.path.realpath(path)
+        stat_key = _stat_key(path)
+        module_name = sys_path_index.module_name(sys_path, path)
+
+        with self.lock:
+            cached = self._files.get(path)
+            if cached is not None and cached[:2] == (stat_key, module_name):
+                return cached[2]
+
+        is_package = os.path.basename(path) == '__init__.py'
+        package_name = module_name
+        if is_package and module_name is not None and module_name.endswith('.__init__'):
+            package_name = module_name[:-len('.__init__')]
+
+        try:
+            with open(path, 'rb') as ff:
+                imported = scan_imports(ff.read(), package_name, is_package)
+        except (OSError, SyntaxError, ValueError) as err:
+            logger.debug('Cannot read imports of {}; {}'.format(path, err))
+            imported = None
+
+        with self.lock:
+            self._files[path] = (stat_key, module_name, imported)
+
+        return imported
+
+    def imported_files(self, path: str, sys_path: Sequence[str]) -> Optional[Set[str]]:
+        '''Source files of the modules imported by the file at `path`'''
+        imported = self.imports(path, sys_path)
+        if imported is None:
+            return None
+
+        files = set()
+        for module_name in imported:
+            module_file = sys_path_index.module_file(sys_path, module_name)
+            if module_file is not None:
+                files.add(str(module_file))
+
+        return files
+
+    def files_importing(self, targets: Iterable[str], candidates: Iterable[str], sys_path: Sequence[str],
+                        directories: Iterable[str]) -> Set[str]:
+        '''The `candidates` that are one of `targets`, or import one of them
+
+        Imports through other files are followed if those files are in
+        `directories` or their subdirectories, or in a package containing a
+        target. Candidates whose imports cannot be read are included.
+
+        '''
+        targets = {os.path.realpath(str(target)) for target in targets}
+        candidates = {os.path.realpath(str(candidate)): candidate for candidate in candidates}
+
+        roots = {os.path.realpath(str(directory)) for directory in directories}
+        for target in targets:
+            directory = os.path.dirname(target)
+            while sys_path_index.is_package(directory):
+                roots.add(directory)
+                directory = os.path.dirname(directory)
+
+        def followed(path):
+            return path in targets or any(path.startswith(root + os.sep) for root in roots)
+
+        # explore the imports reachable from the candidates
+        importers = {}  # type: Dict[str, Set[str]]; maps a file to the files importing it
+        unknown = set()
+        to_visit = list(candidates)
+        visited = set(to_visit)
+
+        while to_visit:
+            path = to_visit.pop()
+            imported = self.imported_files(path, sys_path)
+            if imported is None:
+                unknown.add(path)
+                continue
+
+            for imported_path in imported:
+                importers.setdefault(imported_path, set()).add(path)
+                if imported_path not in visited and followed(imported_path):
+                    visited.add(imported_path)
+                    to_visit.append(imported_path)
+
+        # walk back from the targets
+        reaching = set(targets)
+        to_visit = list(targets)
+        while to_visit:
+            for importer in importers.get(to_visit.pop(), ()):
+                if importer not in reaching:
+                    reaching.add(importer)
+                    to_visit.append(importer)
+
+        return {candidate for real_path, candidate in candidates.items()
+                if real_path in reaching or real_path in unknown}
+
+
+import_graph = ImportGraph()
@@ -1 +1 @@
-from . import usages
+from . import leaf_lookup, usages
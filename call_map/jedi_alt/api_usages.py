@@ -6,6 +6,14 @@ Modified version of `jedi.api.usages` from `jedi` v0.10.0.
 - Caught and logged errors in loop over usage items. This makes it so that if
   one item raises an error, the user can still see other usages. (This will not
   be merged upstream. Catching non-top-level errors is frowned upon in Jedi.)
+- Replaced `imports.get_modules_containing_name` with a version that consults
+  `call_map.name_index` instead of reading every file in the searched
+  directories.
+- Added `iter_usages`, which yields usages as they are found in each module.
+- Skipped modules that do not import the modules of the definitions,
+  according to `call_map.import_graph`.
+- Made `iter_usages` yield `call_map.cancellation.PAUSED` when the search runs
+  out of time while resolving a name; see `call_map.cancellation.resumable`.
 
 """
 
@@ -14,7 +22,17 @@ from jedi.parser import tree
 from jedi.evaluate import imports
 from jedi.evaluate.filters import TreeNameDefinition
 from jedi.evaluate.representation import ModuleContext
+from jedi.parser.cache import parser_cache
+from jedi.common import source_to_unicode
+from jedi import settings
+import os
 import logging
+import functools
+
+from .. import cancellation
+from ..name_index import name_index
+from ..import_graph import import_graph
+from ..config import user_config
 
 logger = logging.getLogger(__name__)
 
@@ -23,8 +41,113 @@ def compare_contexts(c1, c2):
     return c1 == c2 or (c1[1] == c2[1] and c1[0].tree_node == c2[0].tree_node)
 
 
+def get_modules_containing_name(evaluator, modules, name, target_paths=None):
+    """
+    Like `jedi.evaluate.imports.get_modules_containing_name`, but only yields
+    modules that contain `name`, and, if `target_paths` is given, that are or
+    import one of the files `target_paths` according to `import_graph`.
+
+    The given `modules` are already parsed, so their names are looked up in
+    the parse tree; other files are looked up in `name_index`.
+    """
+
+    def contains_name(module):
+        try:
+            return name in module.tree_node.used_names
+        except AttributeError:
+            return True
+
+    def load_python_file(path):
+        try:
+            node_cache_item = parser_cache[path]
+        except KeyError:
+            try:
+                with open(path, 'rb') as f:
+                    code = source_to_unicode(f.read())
+            except IOError:
+                return None
+            module_name = os.path.basename(path)[:-3]  # Remove `.py`.
+            module = imports._load_module(evaluator, path, code)
+            imports.add_module(evaluator, module_name, module)
+            return module
+        else:
+            return ModuleContext(evaluator, node_cache_item.node, path=path)
+
+    def is_source(path):
+        return path is not None and path.endswith('.py')
+
+    used_mod_paths = set()
+    candidate_modules = []
+    for m in modules:
+        try:
+            path = m.py__file__()
+        except AttributeError:
+            yield m
+        else:
+            used_mod_paths.add(path)
+            if not is_source(path) or contains_name(m):
+                candidate_modules.append((path, m))
+
+    directories = {os.path.dirname(os.path.abspath(p)) for p in used_mod_paths if p is not None}
+    paths = set()
+    if settings.dynamic_params_for_other_modules:
+        paths.update(settings.additional_dynamic_modules)
+        paths.update(path for path in name_index.files_containing(name, directories)
+                     if path not in used_mod_paths)
+
+    if target_paths:
+        relevant = import_graph.files_importing(
+            target_paths,
+            [path for path, m in candidate_modules if is_source(path)] + list(paths),
+            evaluator.sys_path,
+            directories)
+    else:
+        relevant = None
+
+    for path, m in candidate_modules:
+        if relevant is None or not is_source(path) or path in relevant:
+            yield m
+
+    # Sort here to make issues less random.
+    for p in sorted(paths):
+        if relevant is not None and p not in relevant:
+            continue
+        m = load_python_file(p)
+        if m is not None and isinstance(m, ModuleContext):
+            yield m
+
+
+def _target_paths(definition_names, config):
+    '''Files of the modules of `definition_names`, or None if any is not a source file'''
+    if not config['IMPORT_GRAPH_FILTER']:
+        return None
+
+    paths = set()
+    for name in definition_names:
+        try:
+            path = name.get_root_context().py__file__()
+        except AttributeError:
+            return None
+        if path is None or not path.endswith('.py'):
+            return None
+        paths.add(path)
+
+    return paths
+
+
 def usages(evaluator, definition_names, mods):
     """
+    :param definitions: list of Name
+    """
+    return [usage for usage in iter_usages(evaluator, definition_names, mods) if usage is not cancellation.PAUSED]
+
+
+def iter_usages(evaluator, definition_names, mods):
+    """
+    Like `usages`, but yields each usage as soon as it is found.
+
+    Reads the user config from one snapshot, taken at the start.
+
     :param definitions: list of Name
     """
     def resolve_names(definition_names):
@@ -48,16 +171,22 @@ def usages(evaluator, definition_names, mods):
             for name in resolve_names(definition_names)
         ]
 
+    config = user_config.snapshot()
     search_name = list(definition_names)[0].string_name
     compare_definitions = compare_array(definition_names)
     mods = mods | set([d.get_root_context() for d in definition_names])
     definition_names = set(resolve_names(definition_names))
-    for m in imports.get_modules_containing_name(evaluator, mods, search_name):
+    for name in definition_names:
+        yield classes.Definition(evaluator, name)
+
+    target_paths = _target_paths(definition_names, config)
+    for m in get_modules_containing_name(evaluator, mods, search_name, target_paths):
         if isinstance(m, ModuleContext):
             for name_node in m.tree_node.used_names.get(search_name, []):
                 context = evaluator.create_context(m, name_node)
                 try:
-                    result = evaluator.goto(context, name_node)
+                    result = yield from cancellation.resumable(
+                        functools.partial(evaluator.goto, context, name_node))
                 except (NotImplementedError, RecursionError) as err:
                     logger.error(err)
                     continue
@@ -65,12 +194,14 @@ def usages(evaluator, definition_names, mods):
                        for c1 in compare_array(result)
                        for c2 in compare_definitions):
                     name = TreeNameDefinition(context, name_node)
-                    definition_names.add(name)
+                    if name not in definition_names:
+                        definition_names.add(name)
+                        yield classes.Definition(evaluator, name)
                     # Previous definitions might be imports, so include them
                     # (because goto might return that import name).
                     compare_definitions += compare_array([name])
         else:
             # compiled objects
-            definition_names.add(m.name)
-
-    return [classes.Definition(evaluator, n) for n in definition_names]
+            if m.name not in definition_names:
+                definition_names.add(m.name)
+                yield classes.Definition(evaluator, m.name)
@@ -0,0 +1,33 @@
+"""
+Finds the name at a position in a module by bisection.
+
+`Script.goto_definitions`, `Script.goto_assignments` and `Script.usages` look up
+the name at the cursor with `Module.name_for_position`, which visits every node
+of the module before the position. Resolving all call sites of a big module
+that way walks the module once per call site. The replacement returns the same
+name, the first `Name` leaf whose start and end positions enclose the position,
+from `get_leaf_for_position`.
+"""
+
+from jedi.parser.python.tree import Module, Name
+
+
+def name_for_position(self, position):
+    try:
+        leaf = self.get_leaf_for_position(position)
+    except ValueError:
+        # outside of the module
+        return None
+
+    # `leaf` is the first leaf that ends at or after `position`; if it ends
+    # exactly there, the next leaf may start there too.
+    while leaf is not None and leaf.start_pos <= position:
+        if isinstance(leaf, Name) and position <= leaf.end_pos:
+            return leaf
+        leaf = leaf.get_next_leaf()
+
+    return None
+
+
+# Monkey patch jedi.
+Module.name_for_position = name_for_position
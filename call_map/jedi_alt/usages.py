@@ -12,6 +12,7 @@ from jedi.evaluate.filters import TreeNameDefinition
 from jedi.evaluate.representation import ModuleContext
 
 from ..config import get_user_config
+from .. import cancellation
 
 if tuple(map(int, jedi.__version__.split('.'))) >= (0,10,1):
     from jedi.parser.python.tree import Import as tree_Import
@@ -37,10 +38,22 @@ def usages_with_additional_modules(script: jedi.api.Script,
     .. todo:: Implement additional_module_paths
 
     :rtype: list of :class:`classes.Definition`
+    """
+    from jedi.api import helpers
+
+    usages = iter_usages_with_additional_modules(script, additional_module_contexts)
+    return helpers.sorted_definitions({usage for usage in usages if usage is not cancellation.PAUSED})
+
+
+def iter_usages_with_additional_modules(script: jedi.api.Script,
+                                        additional_module_contexts: Tuple[ModuleContext] = ()):
+    """
+    Like `usages_with_additional_modules`, but yields each usage once, as soon
+    as it is found, instead of sorting all of them at the end.
+
     """
     from jedi import settings
     from jedi.api import usages
-    from jedi.api import helpers
     from . import api_usages as alt_api_usages
 
     self = script
@@ -60,12 +73,12 @@ def usages_with_additional_modules(script: jedi.api.Script,
             name = user_stmt.name_for_position(self._pos)
             if name is None:
                 # Must be syntax
-                return []
+                return
             definition_names = [TreeNameDefinition(self._get_module(), name)]
 
         if not definition_names:
             # Without a definition for a name we cannot find references.
-            return []
+            return
 
         definition_names = usages.resolve_potential_imports(self._evaluator,
                                                             definition_names)
@@ -74,12 +87,17 @@ def usages_with_additional_modules(script: jedi.api.Script,
         modules.add(self._get_module())
         for additional_module_context in additional_module_contexts:
             modules.add(additional_module_context)
-        definitions = alt_api_usages.usages(self._evaluator, definition_names, modules)
+
+        found = set()
+        for definition in alt_api_usages.iter_usages(self._evaluator, definition_names, modules):
+            if definition is cancellation.PAUSED:
+                yield definition
+            elif definition not in found:
+                found.add(definition)
+                yield definition
     finally:
         settings.dynamic_flow_information = temp
 
-    return helpers.sorted_definitions(set(definitions))
-
 
 if PROFILING:
     try:
@@ -1,5 +1,13 @@
+import array
+import bisect
+import hashlib
+import threading
+import collections
+
 import jedi
-from typing import Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+CALL_SITE_TABLE_CACHE_SIZE = 2000
 
 
 if tuple(map(int, jedi.__version__.split('.'))) >= (0,10,1):
@@ -106,6 +114,250 @@ def get_called_functions(node: jedi.parser.tree.BaseNode):
                 yield 'child', name, child, name.start_pos, name.end_pos
 
 
+class CallSiteTable:
+    """Call sites, nested definitions, decorators, scopes and imports of a module
+
+    Built with one walk of the parse tree, and holds what `get_called_functions`
+    yields for the module and for each function, lambda and class in it, in the
+    same order. Entries keep names and positions only, with the positions in
+    arrays, so that parse trees of the same source can share a table. The
+    entries of each scope are contiguous; `ranges` maps the `scope_key` of a
+    scope to the slice of its entries.
+
+    For matching calls with definitions by name (see `call_map.syntactic`), the
+    table also records the qualifier of each call, the scopes with the
+    positions of their names, and the names bound by imports.
+    """
+
+    def __init__(self, module_node: jedi.parser.tree.BaseNode, source: str):
+        self.source = source
+        self.roles = []  # type: List[str]
+        self.names = []  # type: List[str]
+        self.bases = []  # type: List[Optional[str]]; see `call_qualifier`
+        self.start_lines = array.array('l')
+        self.start_columns = array.array('l')
+        self.end_lines = array.array('l')
+        self.end_columns = array.array('l')
+        self.ranges = {}  # type: Dict[Optional[Tuple[int, int]], Tuple[int, int]]
+
+        # (scope key, name, 'function' or 'class', name start, name end, key of the enclosing scope), in pre-order
+        self.scopes = []  # type: List[tuple]
+        # maps name to (level, module, imported name), as in `from module import name`
+        self.imports = {}  # type: Dict[str, Tuple[int, Optional[str], Optional[str]]]
+
+        found = collections.OrderedDict()  # type: Dict[Optional[Tuple[int, int]], list]
+        found[None] = []
+
+        # pre-order, as in `walk_nodes_while_staying_in_scope`
+        stack = [(child, None) for child in reversed(module_node.children)]
+        while stack:
+            node, key = stack.pop()
+            children = getattr(node, 'children', None)
+            if children is None:
+                continue
+
+            if isinstance(node, jedi_python_tree.ClassOrFunc):
+                name = node.name
+                if isinstance(node, jedi_python_tree.Lambda):
+                    found[key].append(('definition', name.value, None, node.start_pos, node.end_pos))
+                else:
+                    found[key].append(('definition', name.value, None,
+                                       (node.start_pos[0], name.start_pos[1]), name.end_pos))
+                self.scopes.append((self.scope_key(node), name.value,
+                                    'class' if isinstance(node, jedi_python_tree.Class) else 'function',
+                                    name.start_pos, name.end_pos, key))
+                key = self.scope_key(node)
+                found[key] = []
+            elif is_call_trailer(node):
+                name = node.get_previous_leaf()
+                found[key].append(('child', name.value, call_qualifier(name), name.start_pos, name.end_pos))
+            elif isinstance(node, jedi_python_tree.Decorator):
+                name = decorator_name(node)
+                found[key].append(('child', name.value, call_qualifier(name), name.start_pos, name.end_pos))
+            elif isinstance(node, jedi_python_tree.Import):
+                self._add_import(node)
+
+            stack.extend((child, key) for child in reversed(children))
+
+        for key, entries in found.items():
+            begin = len(self.roles)
+            for role, name, base, start_pos, end_pos in entries:
+                self.roles.append(role)
+                self.names.append(name)
+                self.bases.append(base)
+                self.start_lines.append(start_pos[0])
+                self.start_columns.append(start_pos[1])
+                self.end_lines.append(end_pos[0])
+                self.end_columns.append(end_pos[1])
+            self.ranges[key] = (begin, len(self.roles))
+
+    def _add_import(self, node: jedi.parser.tree.BaseNode):
+        try:
+            if isinstance(node, jedi_python_tree.ImportFrom):
+                module = '.'.join(name.value for name in node.get_from_names()) or None
+                for name, alias in node._as_name_tuples():
+                    self.imports[(alias or name).value] = (node.level, module, name.value)
+            else:
+                for path, alias in node._dotted_as_names():
+                    if alias is not None:
+                        self.imports[alias.value] = (0, '.'.join(name.value for name in path), None)
+                    else:
+                        self.imports[path[0].value] = (0, path[0].value, None)
+        except (AttributeError, IndexError, TypeError):
+            # incomplete import statement, after error recovery
+            pass
+
+    @staticmethod
+    def scope_key(node: jedi.parser.tree.BaseNode) -> Optional[Tuple[int, int]]:
+        '''None for the module, and the start position for functions, lambdas and classes'''
+        return None if isinstance(node, jedi_python_tree.Module) else node.start_pos
+
+    def calls(self, node: jedi.parser.tree.BaseNode) -> Iterator[Tuple[str, str, Tuple[int, int], Tuple[int, int]]]:
+        '''Yield the role, name, start and end position of each entry in the scope `node`'''
+        begin, end = self.ranges.get(self.scope_key(node), (0, 0))
+        for ii in range(begin, end):
+            yield (self.roles[ii], self.names[ii],
+                   (self.start_lines[ii], self.start_columns[ii]),
+                   (self.end_lines[ii], self.end_columns[ii]))
+
+
+def call_qualifier(name: jedi.parser.tree.Leaf) -> Optional[str]:
+    '''None for `name()`, `base` for `base.name()`, and '' for other qualified calls, such as `aa.bb.name()`'''
+    previous = name.get_previous_leaf()
+    if previous is None or previous.type != 'operator' or previous.value != '.':
+        return None
+
+    base = previous.get_previous_leaf()
+    if base is not None and base.type == 'name':
+        before = base.get_previous_leaf()
+        if before is None or before.type != 'operator' or before.value != '.':
+            return base.value
+
+    return ''
+
+
+class CallSiteTableCache:
+    """Bounded LRU cache of `CallSiteTable`s, keyed by the content hash of the source
+
+    The table of the parse tree last seen for each path is kept as well, so
+    that the source is not generated from the same tree again; a new parse tree
+    of unchanged source finds its table by content hash.
+
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self._tables = collections.OrderedDict()  # type: Dict[str, CallSiteTable]
+        self._trees = collections.OrderedDict()  # type: Dict[str, Tuple[Any, CallSiteTable]]
+
+    def get(self, path: str, module_node) -> CallSiteTable:
+        '''The table of `module_node`, the parse tree of the module at `path`'''
+        with self.lock:
+            tree_and_table = self._trees.get(path)
+            if tree_and_table is not None and tree_and_table[0] is module_node:
+                self._trees.move_to_end(path)
+                return tree_and_table[1]
+
+        table = self._table(module_node.get_code(), lambda source: module_node)
+
+        with self.lock:
+            self._trees[path] = (module_node, table)
+            self._trees.move_to_end(path)
+            while len(self._trees) > self.max_size:
+                self._trees.popitem(last=False)
+
+        return table
+
+    def for_source(self, source: str) -> CallSiteTable:
+        '''The table of `source`, parsed without jedi's caches if it is new
+
+        Only the parser of jedi is used, so this can be called from any thread.
+
+        '''
+        return self._table(source, jedi.parser.python.parse)
+
+    def _table(self, source: str, parse: Callable[[str], Any]) -> CallSiteTable:
+        digest = hashlib.sha1(source.encode('utf-8', 'surrogatepass')).hexdigest()
+
+        with self.lock:
+            table = self._tables.get(digest)
+            if table is not None:
+                self._tables.move_to_end(digest)
+                return table
+
+        table = CallSiteTable(parse(source), source)
+
+        with self.lock:
+            self._tables[digest] = table
+            while len(self._tables) > self.max_size:
+                self._tables.popitem(last=False)
+
+        return table
+
+    def __len__(self):
+        with self.lock:
+            return len(self._tables)
+
+    def clear(self):
+        with self.lock:
+            self._tables.clear()
+            self._trees.clear()
+
+
+call_site_table_cache = CallSiteTableCache(CALL_SITE_TABLE_CACHE_SIZE)
+
+
+class ScopeTable:
+    """Innermost function, lambda or class at each position of a module
+
+    Built with one walk of the parse tree; positions are looked up by bisecting
+    the start positions of the scopes. As in `Evaluator.create_context`, names
+    that are direct children of a function or class definition (its name, a
+    single base class, the return annotation) belong to the enclosing scope.
+    Comprehensions are not scopes here, since their contexts have no name.
+    """
+
+    def __init__(self, module_node: jedi.parser.tree.BaseNode):
+        self.module_node = module_node
+        self.starts = []  # type: List[Tuple[int, int]]
+        self.ends = []  # type: List[Tuple[int, int]]
+        self.parents = []  # type: List[int]; index of the enclosing scope, -1 for the module
+        self.nodes = []  # type: List[jedi.parser.tree.BaseNode]
+
+        # pre-order, so that the start positions come out sorted
+        stack = [(child, -1) for child in reversed(module_node.children)]
+        while stack:
+            node, enclosing = stack.pop()
+            children = getattr(node, 'children', None)
+            if children is None:
+                continue
+
+            if isinstance(node, jedi_python_tree.ClassOrFunc):
+                if isinstance(node, jedi_python_tree.Lambda):
+                    self.starts.append(node.start_pos)
+                else:
+                    self.starts.append(node.name.end_pos)
+                self.ends.append(node.end_pos)
+                self.parents.append(enclosing)
+                self.nodes.append(node)
+                enclosing = len(self.nodes) - 1
+
+            stack.extend((child, enclosing) for child in reversed(children))
+
+    def scope_of(self, name: jedi.parser.tree.Leaf) -> jedi.parser.tree.BaseNode:
+        if name.parent.type in ('funcdef', 'classdef'):
+            position = name.parent.start_pos
+        else:
+            position = name.start_pos
+
+        index = bisect.bisect_right(self.starts, position) - 1
+        while index >= 0 and not position < self.ends[index]:
+            index = self.parents[index]
+
+        return self.nodes[index] if index >= 0 else self.module_node
+
+
 def parent_scope_of_usage(usage: jedi.api.classes.Definition) -> jedi.api.classes.Definition:
     # Like Definition.parent() but skips nameless parents.
     # Test case: jeid.evaluate.docstrings._evaluate_for_statement_string.
@@ -5,41 +5,100 @@ the version this commit is compatible with.
 
 """
 
+import os
 import logging
+import threading
+import collections
 import pprint, textwrap
 from sys import path as actual_sys_path
 
-from typing import List, Dict, Tuple, Callable, Any, Optional
+from typing import List, Dict, Set, Tuple, Callable, Any, Iterable, Optional, Iterator
 from pathlib import Path
 
 from .core import CodeElement, Node, OrganizerNode, UserScopeSettings, ScopeSettings
 from . import config
 from . import jedi_alt
+from . import call_graph_index
+from . import syntactic
+from .call_graph_index import CallGraphIndex
 
 import toolz as tz
 
 import jedi
-from .jedi_ast_tools import get_called_functions, parent_definition
-from .jedi_alt.stop_signal import stop_execution_signal_queue, StopExecutionException
+from .jedi_ast_tools import ScopeTable, call_site_table_cache, get_called_functions, parent_definition, \
+    jedi_python_tree
+from .jedi_alt.stop_signal import StopExecutionException
+from . import cancellation
+from .sys_path_index import sys_path_index
+from .name_index import name_index
+from .module_registry import module_registry
 
 logger = logging.getLogger(__name__)
 
+MODULE_NODE_CACHE_SIZE = 2000
+SCOPE_TABLE_CACHE_SIZE = 2000
 
-def catch_errors(thunk: Callable, default: Any, post_message: str):
+
+def _log_error(exc: Exception, post_message: str, errors: Optional[List[Exception]]):
+    if isinstance(exc, StopExecutionException):
+        logger.info('{}; {}'.format(exc, post_message))
+    else:
+        logger.error('{}; {}'.format(exc, post_message), exc_info=config.get_user_config()['EXC_INFO'])
+
+    if errors is not None:
+        errors.append(exc)
+
+
+def catch_errors(thunk: Callable, default: Any, post_message: str, errors: Optional[List[Exception]] = None):
+    '''Return `thunk()`, or `default` after logging an error
+
+    Caught errors are appended to `errors`, if given, so that callers can tell
+    a default from a result.
+
+    '''
     try:
         return thunk()
-    except StopExecutionException as exc:
-        logger.info('{}; {}'.format(exc, post_message))
-        return default
+    except cancellation.DeadlineExceeded:
+        # not an error; see `cancellation.resumable`
+        raise
     except Exception as exc:
-        logger.error('{}; {}'.format(exc, post_message), exc_info=config.get_user_config()['EXC_INFO'])
-        #import traceback
-        #logger.error(traceback.format_exc())
+        _log_error(exc, post_message, errors)
         return default
 
 
+def iter_catching_errors(thunk: Callable, post_message: str, errors: Optional[List[Exception]] = None):
+    '''Like `catch_errors`, for a `thunk` returning an iterable
+
+    Items yielded before an error are kept; the error is appended to `errors`,
+    if given, so that callers can tell an incomplete iterable from a complete
+    one.
+
+    '''
+    try:
+        yield from thunk()
+    except cancellation.DeadlineExceeded:
+        raise
+    except Exception as exc:
+        _log_error(exc, post_message, errors)
+
+
+def resolved_to_import(node) -> bool:
+    '''Whether jedi could only follow `node` to an import statement, not to the imported definition'''
+    definition = getattr(node, 'definition', None)
+    tree_name = getattr(definition._name, 'tree_name', None) if definition is not None else None
+    if tree_name is None:
+        return False
+
+    tree_definition = tree_name.get_definition()
+    return tree_definition is not None and tree_definition.type in ('import_from', 'import_name')
+
+
 def filter_nodes(nodes):
     for node in nodes:
+        if node is cancellation.PAUSED:
+            yield node
+            continue
+
         try:
             skip = (node.code_element.name in
                     config.py_ignore.get(node.code_element.module, ()))
@@ -52,19 +111,6 @@ def filter_nodes(nodes):
             yield node
 
 
-def _cleanup_signal_queue():
-    '''Cleans signal queue in case reference resolution finished successfully
-
-    Call after finishing reference resolution searches. This cleans up any
-    leftover signals, in case a "stop" signal was issued, but the resolution
-    search actually completed successfully.
-
-    '''
-
-    while not stop_execution_signal_queue.empty():
-        stop_execution_signal_queue.get()
-
-
 class UsageFilter(jedi.evaluate.filters.ParserTreeFilter):
     def _is_name_reachable(self, name):
         #print(name, name.parent.type)
@@ -82,16 +128,134 @@ class UsageFilter(jedi.evaluate.filters.ParserTreeFilter):
 
 
 class JediCodeElementNode(Node):
-    usage_resolution_modules = frozenset()   # where to search for usages
+    usage_resolution_modules = module_registry   # where to search for usages
     sys_path = []
+    call_graph_index = None   # type: Optional[CallGraphIndex]
 
-    def __init__(self, code_element: CodeElement, definition: jedi.api.classes.Definition):
+    def __init__(self, code_element: CodeElement, definition: Optional[jedi.api.classes.Definition],
+                 resolve_lazily: bool = False):
         """The parents call the node, children are called by the node.
 
         If not callable, the Node has no children
+
+        :param resolve_lazily: if `definition` is None, find it from the
+            position in `code_element` when it is first needed. Used for nodes
+            restored from the call graph index.
+
         """
         self.code_element = code_element
-        self.definition = definition
+        self._definition = definition
+        self._resolve_lazily = resolve_lazily and definition is None
+
+    @property
+    def definition(self):
+        if self._resolve_lazily:
+            self._resolve_lazily = False
+            self._definition = catch_errors(self._resolve_definition, None,
+                                            'while resolving definition of {}'.format(self.code_element.name))
+        return self._definition
+
+    def _resolve_definition(self):
+        ce = self.code_element
+
+        if ce.type == 'module':
+            node, err = get_module_node(self.sys_path, ce.module)
+            return node.definition if node else None
+
+        if not ce.path or ce.start_pos[0] is None:
+            return None
+
+        script = jedi.api.Script(source_path=ce.path,
+                                 sys_path=self.sys_path,
+                                 line=ce.start_pos[0],
+                                 column=ce.start_pos[1])
+
+        definitions = script.goto_assignments()
+
+        for def_ in definitions:
+            if def_.module_path == ce.path and (def_.line, def_.column) == ce.start_pos:
+                return def_
+        else:
+            return tz.first(definitions) if definitions else None
+
+    @classmethod
+    def from_index(cls, code_element: CodeElement):
+        return cls(code_element, None, resolve_lazily=bool(code_element.path))
+
+    def _indexed(self, direction: str, searched_paths: Iterable[str] = ()):
+        index = self.call_graph_index
+        if index is None or not config.get_user_config()['CALL_GRAPH_INDEX']:
+            return None
+
+        code_elements = catch_errors(tz.partial(index.lookup, self.code_element, direction, searched_paths), None,
+                                     'while reading the call graph index')
+        if code_elements is None:
+            return None
+        else:
+            return [JediCodeElementNode.from_index(ce) for ce in code_elements]
+
+    def _update_index(self, direction: str, nodes: List[Node], searched_paths: Iterable[str] = ()):
+        index = self.call_graph_index
+        if (index is None
+            or cancellation.is_cancelled()  # then `nodes` may be incomplete
+            or not config.get_user_config()['CALL_GRAPH_INDEX']):
+            return
+
+        if any(map(resolved_to_import, nodes)):
+            # The entry would not depend on the file that the import may
+            # resolve to later.
+            return
+
+        catch_errors(tz.partial(index.store, self.code_element, direction,
+                                [node.code_element for node in nodes if node is not None], searched_paths),
+                     None, 'while updating the call graph index')
+
+    def _package_directory(self) -> Optional[Path]:
+        '''Directory of the package, if this is the node of a package'''
+        if self.code_element.type != 'module' or not self.code_element.path:
+            return None
+
+        _pp = Path(self.code_element.path)
+        if (self.code_element.name != _pp.stem
+            and self.code_element.name == _pp.parent.stem
+            and _pp.stem == '__init__'):
+            return _pp.parent
+        else:
+            return None
+
+    def _searched_children_paths(self) -> Set[str]:
+        '''Files of the submodules and subpackages that a package node lists as children'''
+        package_directory = self._package_directory()
+        if package_directory is None:
+            return set()
+
+        module_files, subpkgs, _ = sys_path_index.package_contents(package_directory)
+        return set(map(str, module_files)) | {str(_dd.joinpath('__init__.py')) for _dd in subpkgs}
+
+    def _searched_paths(self) -> Set[str]:
+        '''Files that the search for parents reads, according to the name index'''
+        if self.call_graph_index is None or not config.get_user_config()['CALL_GRAPH_INDEX']:
+            return set()
+
+        directories = {os.path.dirname(path) for path in self.usage_resolution_modules.paths()}
+        return name_index.files_containing(self.code_element.name, directories)
+
+    def provisional_neighbors(self, cancel_event) -> List[Node]:
+        '''Children and parents matched by name, without jedi; see `syntactic`'''
+        if self.code_element.role == 'signature':
+            return []
+
+        directories = {os.path.dirname(path) for path in self.usage_resolution_modules.paths()}
+        code_elements = syntactic.callees(self.code_element, self.sys_path, directories, cancel_event)
+        if not cancel_event.is_set():
+            code_elements += syntactic.callers(self.code_element, self.sys_path, directories, cancel_event)
+
+        nodes = []
+        for code_element in code_elements:
+            node = JediCodeElementNode.from_index(code_element)
+            node.provisional = True
+            nodes.append(node)
+        return nodes
 
     @property
     def module_context(self):
@@ -105,6 +269,27 @@ class JediCodeElementNode(Node):
 
     @property
     def parents(self):
+        return sorted(self.iter_parents(), key=usage_order)
+
+    def iter_parents(self):
+        searched_paths = self._searched_paths()
+        indexed = self._indexed(call_graph_index.parents, searched_paths)
+        if indexed is not None:
+            yield from indexed
+            return
+
+        _parents = []
+        errors = []  # type: List[Exception]
+        for node in self._resolve_parents(errors):
+            if node is not cancellation.PAUSED:
+                _parents.append(node)
+            yield node
+
+        # after an error, the parents may be incomplete
+        if not errors:
+            self._update_index(call_graph_index.parents, sorted(_parents, key=usage_order), searched_paths)
+
+    def _resolve_parents(self, errors: Optional[List[Exception]] = None):
         # Note: the last created Script object appears to bork the older ones. Must keep making new Script objects!
 
         # Note: jedi appears to already do enough caching. It does not significantly
@@ -119,11 +304,11 @@ class JediCodeElementNode(Node):
                                      line=self.definition.line,
                                      column=self.definition.column)
 
-            usages = catch_errors(tz.partial(jedi_alt.usages.usages_with_additional_modules,
-                                             script,
-                                             self.usage_resolution_modules),
-                                  [],
-                                  'while finding usages of {}'.format(self.code_element.name))
+            usages = iter_catching_errors(tz.partial(jedi_alt.usages.iter_usages_with_additional_modules,
+                                                     script,
+                                                     self.usage_resolution_modules.modules()),
+                                          'while finding usages of {}'.format(self.code_element.name),
+                                          errors)
 
         elif self.code_element.call_pos[0]:
             call_pos_script = jedi.api.Script(source_path=self.code_element.call_pos[0],
@@ -131,32 +316,39 @@ class JediCodeElementNode(Node):
                                               line=self.code_element.call_pos[1][0],
                                               column=self.code_element.call_pos[1][1])
 
-            usages = catch_errors(tz.partial(jedi_alt.usages.usages_with_additional_modules,
-                                             call_pos_script,
-                                             self.usage_resolution_modules),
-                                  [],
-                                  'while finding usages of {}'.format(self.code_element.name))
+            usages = iter_catching_errors(tz.partial(jedi_alt.usages.iter_usages_with_additional_modules,
+                                                     call_pos_script,
+                                                     self.usage_resolution_modules.modules()),
+                                          'while finding usages of {}'.format(self.code_element.name),
+                                          errors)
 
         elif self.definition:
             script = create_import_script(self.definition._evaluator.sys_path if self.definition else self.sys_path,
                                           self.code_element.name)
 
-            usages = [
+            usages = (
                 usage for usage in
-                catch_errors(tz.partial(jedi_alt.usages.usages_with_additional_modules,
-                                        script,
-                                        self.usage_resolution_modules),
-                             [],
-                             'while finding usages of {}'.format(self.code_element.name))
-                if usage.module_name]
+                iter_catching_errors(tz.partial(jedi_alt.usages.iter_usages_with_additional_modules,
+                                                script,
+                                                self.usage_resolution_modules.modules()),
+                                     'while finding usages of {}'.format(self.code_element.name),
+                                     errors)
+                if usage is cancellation.PAUSED or usage.module_name)
 
         else:
-            return ()
+            return
 
-        _unfiltered_parents = []
         positions = set()
+        parents_by_scope = {}  # type: Dict[Any, Tuple[jedi.api.classes.Definition, CodeElement]]
 
         for usage in usages:
+            if cancellation.is_cancelled():
+                return
+
+            if usage is cancellation.PAUSED:
+                yield usage
+                continue
+
             tree_name = usage._name.tree_name
             if tree_name:
                 position = (usage.module_path, tree_name.start_pos, tree_name.end_pos)
@@ -164,13 +356,7 @@ class JediCodeElementNode(Node):
                 position = (None, (None, None), (None, None))
 
             if position not in positions or position == (None, (None, None), (None, None)):
-                _usage_parent = parent_definition(usage)
-
-                if _usage_parent.module_path:
-                    JediCodeElementNode.usage_resolution_modules |= frozenset((_usage_parent._name.get_root_context(),))
-
-                usage_node = JediCodeElementNode.from_definition(
-                    'parent', position, _usage_parent)
+                usage_node = self._usage_parent_node(usage, position, parents_by_scope)
 
                 # check if this usage is actually the definition of the
                 # current node, and is therefore already covered by the
@@ -185,53 +371,85 @@ class JediCodeElementNode(Node):
                                         usage_node.code_element.call_pos[1][0]))
                     continue
                 else:
-                    _unfiltered_parents.append(usage_node)
+                    yield usage_node
             positions.add(position)
 
-        _cleanup_signal_queue()
 
-        return _unfiltered_parents
+    @staticmethod
+    def _usage_parent_node(usage: jedi.api.classes.Definition, position: tuple, parents_by_scope: dict) -> Node:
+        '''Node of the definition enclosing `usage`, with call position `position`
+
+        `parent_definition` is evaluated once per scope; usages in a scope seen
+        before in `parents_by_scope` reuse its definition and code element.
+
+        '''
+        tree_name = usage._name.tree_name
+        if tree_name and position[0]:
+            scope = scope_table_cache.get(position[0], tree_name.get_root_node()).scope_of(tree_name)
+            if scope in parents_by_scope:
+                _usage_parent, code_element = parents_by_scope[scope]
+                return JediCodeElementNode(code_element._replace(call_pos=position), _usage_parent)
+        else:
+            scope = None
+
+        _usage_parent = parent_definition(usage)
+
+        if _usage_parent.module_path:
+            JediCodeElementNode.usage_resolution_modules.add(_usage_parent._name.get_root_context())
 
+        usage_node = JediCodeElementNode.from_definition('parent', position, _usage_parent)
+        if scope is not None:
+            parents_by_scope[scope] = (_usage_parent, usage_node.code_element)
+
+        return usage_node
 
     @property
     def children(self):
+        searched_paths = self._searched_children_paths()
+        indexed = self._indexed(call_graph_index.children, searched_paths)
+        if indexed is not None:
+            yield from indexed
+            return
+
+        _children = []
+        errors = []  # type: List[Exception]
+        for node in self._resolve_children(errors):
+            if node is not cancellation.PAUSED:
+                _children.append(node)
+            yield node
+
+        # after an error, the children may be incomplete
+        if not errors:
+            self._update_index(call_graph_index.children, _children, searched_paths)
+
+    def _resolve_children(self, errors: Optional[List[Exception]] = None):
         if self.definition:
 
             ## If self is a package, yield submodules/subpackages
-            if self.code_element.type == 'module' and self.code_element.path:
-                _pp = Path(self.code_element.path)
-
+            package_directory = self._package_directory()
+            if package_directory is not None:
                 sys_path = self.definition._evaluator.sys_path
 
-                is_pkg = (self.code_element.name != _pp.stem
-                          and self.code_element.name == _pp.parent.stem
-                          and _pp.stem == '__init__')
+                module_files, subpkgs, other_subdirs = sys_path_index.package_contents(package_directory)
 
-                if is_pkg:
+                submodules = [path_to_module_name(sys_path, str(_m)) for _m in module_files]
 
-                    submodules = [path_to_module_name(sys_path, str(_m)) for _m in _pp.parent.glob('*.py')
-                                  if _m != _pp]
+                if other_subdirs:
+                    logger.warning('Package `{}` contains subdirectories that are not packages:\n{}'.format(
+                        self.code_element.name,
+                        textwrap.indent(
+                            pprint.pformat([str(_dd.stem) for _dd in other_subdirs]),
+                            ' ' * 4)))
 
-                    subdirs = [_dd for _dd in _pp.parent.iterdir()
-                               if _dd.is_dir() and _dd.name != '__pycache__']
+                names = submodules + [path_to_module_name(sys_path, str(_dd)) for _dd in subpkgs]
 
-                    subpkgs = [_dd for _dd in subdirs if _dd.joinpath('__init__.py').exists()]
-
-                    if len(subpkgs) < len(subdirs):
-                        logger.warning('Package `{}` contains subdirectories that are not packages:\n{}'.format(
-                            self.code_element.name,
-                            textwrap.indent(
-                                pprint.pformat([str(_dd.stem) for _dd in set(subdirs) - set(subpkgs)]),
-                                ' ' * 4)))
-
-                    names = submodules + [path_to_module_name(sys_path, str(_dd)) for _dd in subpkgs]
-
-                    for _name in names:
-                        _node, _err = get_module_node(sys_path, _name)
-                        try:
-                            yield _node
-                        except KeyError:
-                            continue
+                for _name in names:
+                    if cancellation.is_cancelled():
+                        return
+                    _node, _err = get_module_node(sys_path, _name)
+                    # None for submodules that cannot be imported, e.g. `bad-name.py`
+                    if _node is not None:
+                        yield _node
 
             if config.get_user_config()['EXPERIMENTAL_MODE']:
                 yield from experimental_definitions_of_called_objects(self.definition)
@@ -247,17 +465,11 @@ class JediCodeElementNode(Node):
                     tree_definition = tree_name.get_definition()
 
                     path = self.definition.module_path
-                    _unfiltered = definitions_of_called_objects(self.definition._evaluator, tree_definition, path)
+                    _unfiltered = definitions_of_called_objects(self.definition._evaluator, tree_definition, path,
+                                                                errors)
 
                     yield from filter_nodes(_unfiltered)
 
-        _cleanup_signal_queue()
-
-    @staticmethod
-    def cancel_search():
-        if stop_execution_signal_queue.empty():
-            stop_execution_signal_queue.put(1)
-
     @classmethod
     def from_definition(cls, role, call_pos, definition):
         #if not isinstance(definition._name, jedi.parser.tree.Name):
@@ -288,29 +500,77 @@ class JediCodeElementNode(Node):
         if role == 'signature':
             new_call_pos = (self.code_element.path, self.code_element.start_pos, self.code_element.end_pos)
             new_code_element = self.code_element._replace(role=role, call_pos=new_call_pos)
-            return __class__(new_code_element, self.definition)
+            return __class__(new_code_element, self._definition, resolve_lazily=self._resolve_lazily)
         else:
             raise NotImplementedError
 
 
+def usage_order(node: Node):
+    '''Sort key of parents, in the order of `jedi.api.helpers.sorted_definitions`'''
+    path, (line, column), end_pos = node.code_element.call_pos
+    return (path or '', line or 0, column or 0)
+
+
+class CallSiteResolver:
+    """Resolves the call sites of one module with a single `jedi.api.Script`
+
+    The module source is generated and parsed once, and all call sites share
+    the evaluator of the script, along with its inference caches. Creating a
+    `Script` per call site instead re-parses the module for every call.
+
+    """
+
+    def __init__(self, evaluator: jedi.evaluate.Evaluator, source: str, path: str,
+                 errors: Optional[List[Exception]] = None):
+        self.script = jedi.api.Script(source=source, path=path,
+                                      sys_path=evaluator.sys_path, line=1, column=0)
+        self.errors = errors
+
+    def definitions(self, fn: str, position) -> List[jedi.api.classes.Definition]:
+        script = self.script
+
+        # positions come from the parse tree of the same source, so they are valid
+        script._pos = position
+
+        # the execution limits of jedi count executions per evaluator, not per call site
+        script._evaluator.reset_recursion_limitations()
+
+        return (catch_errors(script.goto_definitions, [], 'while finding definitions of {}'.format(fn), self.errors)
+                or catch_errors(script.goto_assignments, [], 'while finding assignments of {}'.format(fn),
+                                self.errors))
+
+
 def definitions_of_called_objects(evaluator: jedi.evaluate.Evaluator,
                                   definition: jedi.parser.tree.BaseNode,
-                                  path: str):
+                                  path: str,
+                                  errors: Optional[List[Exception]] = None):
+
+    resolver = None
+
+    if path and isinstance(definition, (jedi_python_tree.Module, jedi_python_tree.ClassOrFunc)):
+        table = call_site_table_cache.get(path, definition.get_root_node())
+        called = table.calls(definition)
+        source = table.source
+    else:
+        called = ((role, fn.value, call_start_pos, call_end_pos)
+                  for role, fn, ast_node, call_start_pos, call_end_pos in get_called_functions(definition))
+        source = None
+
+    for role, fn, call_start_pos, call_end_pos in called:
+        if cancellation.is_cancelled():
+            return
 
-    for role, fn, ast_node, call_start_pos, call_end_pos in get_called_functions(definition):
         #try:
         #    defs = list(jedi.api.helpers.evaluate_goto_definition(evaluator, fn))
         #except AttributeError:
         #    defs = list()
 
-        code = ast_node.get_root_node().get_code()
-        script = jedi.api.Script(source=code, source_path=path,
-                                 sys_path=evaluator.sys_path,
-                                 line=call_start_pos[0],
-                                 column=call_start_pos[1])
+        if resolver is None:
+            if source is None:
+                source = getattr(definition, 'base', definition).get_root_node().get_code()
+            resolver = CallSiteResolver(evaluator, source, path, errors)
 
-        defs = (catch_errors(script.goto_definitions, [], 'while finding definitions of {}'.format(fn))
-                or catch_errors(script.goto_assignments, [], 'while finding assignments of {}'.format(fn)))
+        defs = yield from cancellation.resumable(tz.partial(resolver.definitions, fn, call_start_pos))
 
         found = set()
 
@@ -359,14 +619,7 @@ def definitions_of_called_objects(evaluator: jedi.evaluate.Evaluator,
             logging.getLogger(__name__).debug(
                 ' Cannot get def for {}'.format(fn))
 
-            name = fn.value if fn.value not in (']', ')') else '[unknown]'
-
-            if role == 'definition':
-                start_pos = ast_node.start_pos
-                end_pos = ast_node.end_pos
-            else:
-                start_pos = fn.start_pos
-                end_pos = fn.end_pos
+            name = fn if fn not in (']', ')') else '[unknown]'
 
             code_element = CodeElement(
                 name=name,
@@ -426,32 +679,8 @@ def experimental_definitions_of_called_objects(definition: jedi.api.classes.Defi
     yield from filter_nodes(_unfiltered_nodes)
 
 
-def _is_submodule(path: Path, parent: Path):
-    for _parent in path.parents:
-        if _parent == parent:
-            return True
-        elif _parent.joinpath('__init__.py').exists():
-            continue
-        else:
-            return False
-    else:
-        return False
-
 def path_to_module_name(sys_path, path: str):
-    path = Path(path).resolve()
-    for _sp in reversed(sys_path):
-        try:
-            sp = Path(_sp).resolve()
-        except FileNotFoundError:
-            continue
-
-        if _is_submodule(path, sp):
-            module_name = ('.'.join(path.relative_to(sp).parts))
-            if module_name.endswith('.py'):
-                module_name = module_name[:-3]
-            return module_name
-    else:
-        return None
+    return sys_path_index.module_name(sys_path, path)
 
 
 def create_import_script(effective_sys_path: List[Path], module_name: str) -> jedi.api.Script:
@@ -461,11 +690,144 @@ def create_import_script(effective_sys_path: List[Path], module_name: str) -> je
     return import_script
 
 
+def _module_file_key(sys_path: Tuple[str, ...], module_name: str) -> Tuple[Optional[str], Optional[int]]:
+    module_file = sys_path_index.module_file(sys_path, module_name)
+    if module_file is None:
+        # builtin, extension or namespace module
+        return None, None
+
+    try:
+        return str(module_file), os.stat(str(module_file)).st_mtime_ns
+    except OSError:
+        return str(module_file), None
+
+
+class ModuleNodeCache:
+    """Bounded LRU cache of `get_module_node` results
+
+    Keyed by effective sys_path and module name. An entry is used only while
+    the file the module name resolves to, and its modification time, are
+    unchanged. Failures are cached too.
+
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self._items = collections.OrderedDict()  # type: Dict[Tuple[Tuple[str, ...], str], Tuple[tuple, Optional[Node], Optional[Exception], Any]]
+
+    def get(self, sys_path: Tuple[str, ...], module_name: str, file_key: tuple):
+        with self.lock:
+            try:
+                cached_file_key, node, err, root_context = self._items[(sys_path, module_name)]
+            except KeyError:
+                return None
+
+            if cached_file_key != file_key:
+                del self._items[(sys_path, module_name)]
+                return None
+
+            self._items.move_to_end((sys_path, module_name))
+            return node, err, root_context
+
+    def put(self, sys_path: Tuple[str, ...], module_name: str, file_key: tuple,
+            node: Optional[Node], err: Optional[Exception], root_context):
+        with self.lock:
+            self._items[(sys_path, module_name)] = (file_key, node, err, root_context)
+            self._items.move_to_end((sys_path, module_name))
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        with self.lock:
+            return len(self._items)
+
+    def clear(self):
+        with self.lock:
+            self._items.clear()
+
+    def invalidate_paths(self, paths):
+        '''Drop entries of modules in the files `paths`, and all failures'''
+        paths = set(map(str, paths))
+        with self.lock:
+            for key, (file_key, node, err, root_context) in list(self._items.items()):
+                if node is None or file_key[0] in paths:
+                    del self._items[key]
+
+
+module_node_cache = ModuleNodeCache(MODULE_NODE_CACHE_SIZE)
+
+
+class ScopeTableCache:
+    """Bounded LRU cache of the `ScopeTable` of each module
+
+    Keyed by path. An entry is used only while jedi keeps the parse tree it
+    was built from; once the file is parsed again, the table is rebuilt.
+
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self._items = collections.OrderedDict()  # type: Dict[str, ScopeTable]
+
+    def get(self, path: str, module_node) -> ScopeTable:
+        with self.lock:
+            table = self._items.get(path)
+            if table is not None and table.module_node is module_node:
+                self._items.move_to_end(path)
+                return table
+
+        table = ScopeTable(module_node)
+
+        with self.lock:
+            self._items[path] = table
+            self._items.move_to_end(path)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+        return table
+
+    def __len__(self):
+        with self.lock:
+            return len(self._items)
+
+    def clear(self):
+        with self.lock:
+            self._items.clear()
+
+
+scope_table_cache = ScopeTableCache(SCOPE_TABLE_CACHE_SIZE)
+
+
 def get_module_node(effective_sys_path: List[Path], module_name: str) -> Tuple[Optional[Node], Optional[Exception]]:
+    '''Node of the module `module_name`, or None and the reason it could not be resolved
+
+    Results are shared through `module_node_cache`.
+
+    '''
+    sys_path = tuple(map(str, effective_sys_path))
+    file_key = _module_file_key(sys_path, module_name)
+
+    cached = module_node_cache.get(sys_path, module_name, file_key)
+    if cached is not None:
+        node, err, root_context = cached
+    else:
+        node, err, root_context = _resolve_module_node(sys_path, module_name)
+        module_node_cache.put(sys_path, module_name, file_key, node, err, root_context)
+
+    if root_context is not None:
+        JediCodeElementNode.usage_resolution_modules.add(root_context)
+
+    return node, err
+
+
+def _resolve_module_node(effective_sys_path: Tuple[str, ...], module_name: str):
     from .errors import ModuleResolutionError
 
     import_script = create_import_script(effective_sys_path, module_name)
     definitions = import_script.goto_definitions()
+    root_context = None
 
     if definitions:
         mod = tz.first(definitions)
@@ -475,7 +837,7 @@ def get_module_node(effective_sys_path: List[Path], module_name: str) -> Tuple[O
             mod._name.parent_context = mod._name.get_root_context()
 
         if mod.module_path:
-            JediCodeElementNode.usage_resolution_modules |= frozenset((mod._name.get_root_context(),))
+            root_context = mod._name.get_root_context()
 
         node = JediCodeElementNode.from_definition(
             role='definition',
@@ -488,7 +850,15 @@ def get_module_node(effective_sys_path: List[Path], module_name: str) -> Tuple[O
         err = ModuleResolutionError(
             'Could not resolve module {} (did you mean to use "-f"?)'.format(module_name))
 
-    return node, err
+    return node, err, root_context
+
+
+def iter_module_nodes(effective_sys_path: List[Path], module_names: List[str]) \
+    -> Iterator[Tuple[str, Optional[Node], Optional[Exception]]]:
+    '''Yield the name, node and resolution error of each module, as it is resolved'''
+    for _name in module_names:
+        node, err = get_module_node(effective_sys_path, _name)
+        yield _name, node, err
 
 
 def dump_module_nodes(effective_sys_path: List[Path], module_names: List[str]) \
@@ -497,9 +867,7 @@ def dump_module_nodes(effective_sys_path: List[Path], module_names: List[str]) \
     _nodes = {}
     failures = {}
 
-    for _name in module_names:
-        node, err = get_module_node(effective_sys_path, _name)
-
+    for _name, node, err in iter_module_nodes(effective_sys_path, module_names):
         if node:
             _nodes[_name] = node
         else:
@@ -556,31 +924,61 @@ def make_scope_settings(is_new_project: bool,
                          effective_sys_path=list(map(Path, effective_sys_path)))
 
 
-def dump_script_nodes(effective_sys_path: List[Path], scripts: List[Path]) -> Dict[Path, Node]:
+class ScriptNode(OrganizerNode):
+    """Node of a script, whose children are the objects called in the script
+
+    The calls are resolved when the children are first needed, not when the
+    script is loaded.
+
+    """
+
+    def __init__(self, name: str, script: jedi.api.Script, module_context, path: str):
+        super().__init__(name, [], [])
+        self._script = script
+        self._path = path
+        self._children = None
+        self.module_context = module_context
+
+    @property
+    def children(self):
+        if self._children is None:
+            children = catch_errors(self._resolve_children, None,
+                                    'while resolving calls in script {}'.format(self._path))
+            if children is None:
+                return []
+            self._children = children
+            self._script = None
+
+        return self._children
+
+    def _resolve_children(self):
+        return [node for node in filter_nodes(definitions_of_called_objects(self._script._evaluator,
+                                                                            self.module_context.tree_node,
+                                                                            path=self._path))
+                if node is not cancellation.PAUSED]
+
+
+def iter_script_nodes(effective_sys_path: List[Path], scripts: List[Path]) \
+    -> Iterator[Tuple[Path, Optional[Node], Optional[Exception]]]:
+    '''Yield the path, node and resolution error of each script, as it is loaded'''
     from .errors import ScriptResolutionError
 
     _sys_path_str = list(map(str, effective_sys_path))  # type: List[str]
 
-    failures = {}
-    _nodes = {}  # type: Dict[Path, Node]
     for path in scripts:
         fname = str(path)
         try:
             script = jedi.api.Script(path=fname, sys_path=_sys_path_str)
         except FileNotFoundError:
-            failures[path] = ScriptResolutionError('Cannot resolve path to script "{}"'.format(fname))
+            yield path, None, ScriptResolutionError('Cannot resolve path to script "{}"'.format(fname))
             continue
         except UnicodeDecodeError:
-            failures[path] = ScriptResolutionError('Cannot decode script "{}"'.format(fname))
+            yield path, None, ScriptResolutionError('Cannot decode script "{}"'.format(fname))
             continue
 
         module = script._get_module()
 
-        children = list(
-            filter_nodes(
-                definitions_of_called_objects(script._evaluator, module.tree_node, path=fname)))
-
-        node = OrganizerNode(fname, [], children)
+        node = ScriptNode(fname, script, module, fname)
 
         node.code_element = CodeElement(
             name=module.name.string_name,
@@ -593,8 +991,17 @@ def dump_script_nodes(effective_sys_path: List[Path], scripts: List[Path]) -> Di
             end_pos=(None, None),
         )
 
-        node.module_context = module
+        yield path, node, None
+
 
-        _nodes[path] = node
+def dump_script_nodes(effective_sys_path: List[Path], scripts: List[Path]) -> Dict[Path, Node]:
+    failures = {}
+    _nodes = {}  # type: Dict[Path, Node]
+
+    for path, node, err in iter_script_nodes(effective_sys_path, scripts):
+        if node:
+            _nodes[path] = node
+        else:
+            failures[path] = err
 
     return _nodes, failures
@@ -0,0 +1,142 @@
+"""
+Registry of the modules searched for usages
+
+The modules of the project (its root modules and scripts) are always
+searched. Modules in which usages or definitions were visited are searched
+too, but only the `USAGE_SEARCH_MODULES` most recently visited ones are kept,
+so that long sessions do not search, and keep parse trees for, more and more
+modules. Modules are identified by path, so the same module loaded by several
+jedi evaluators is searched once.
+
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .config import get_user_config
+
+
+def _module_key(module_context) -> Any:
+    try:
+        path = module_context.py__file__()
+    except Exception:
+        path = None
+
+    return path if path is not None else module_context
+
+
+def _source_size(key) -> int:
+    if not isinstance(key, str):
+        return 0
+
+    try:
+        return os.stat(key).st_size
+    except (OSError, ValueError):
+        return 0
+
+
+class ModuleRegistry:
+    def __init__(self, max_visited: Optional[int] = None):
+        self.lock = threading.RLock()
+        self._max_visited = max_visited
+
+        self._roots = {}  # type: Dict[Any, Tuple[Any, int]]; maps key to (module context, source size)
+        self._visited = OrderedDict()  # type: Dict[Any, Tuple[Any, int]]; least recently used first
+        self._snapshot = None  # type: Optional[Tuple[Any, ...]]
+
+        self.stats = {'added': 0, 'evictions': 0}
+
+    @property
+    def max_visited(self) -> int:
+        if self._max_visited is not None:
+            return self._max_visited
+        return get_user_config()['USAGE_SEARCH_MODULES']
+
+    def set_roots(self, module_contexts: Iterable):
+        '''Replace the modules of the project, and forget visited modules'''
+        with self.lock:
+            self._roots.clear()
+            self._visited.clear()
+            for module_context in module_contexts:
+                key = _module_key(module_context)
+                self._roots[key] = (module_context, _source_size(key))
+            self._snapshot = None
+
+    def add(self, module_context):
+        '''Search `module_context` too, evicting the least recently visited module if needed
+
+        A module that is searched already is searched with `module_context`
+        from now on, which holds the parse tree last loaded for its path.
+
+        '''
+        key = _module_key(module_context)
+
+        with self.lock:
+            for modules in (self._roots, self._visited):
+                if key in modules:
+                    if modules[key][0] is not module_context:
+                        modules[key] = (module_context, _source_size(key))
+                        self._snapshot = None
+                    if modules is self._visited:
+                        self._visited.move_to_end(key)
+                    return
+
+            self._visited[key] = (module_context, _source_size(key))
+            self.stats['added'] += 1
+
+            max_visited = self.max_visited
+            while len(self._visited) > max(max_visited, 0):
+                self._visited.popitem(last=False)
+                self.stats['evictions'] += 1
+
+            self._snapshot = None
+
+    def invalidate_paths(self, paths: Iterable[str]):
+        '''Stop searching the visited modules at `paths`, until they are visited again
+
+        The modules of the project are replaced by `Project.refresh_paths`.
+
+        '''
+        with self.lock:
+            for path in paths:
+                if self._visited.pop(os.path.abspath(str(path)), None) is not None:
+                    self._snapshot = None
+
+    def clear(self):
+        with self.lock:
+            self._roots.clear()
+            self._visited.clear()
+            self._snapshot = None
+
+    def modules(self) -> Tuple[Any, ...]:
+        '''The module contexts to search, roots first'''
+        with self.lock:
+            if self._snapshot is None:
+                self._snapshot = tuple(module_context for module_context, _ in
+                                       list(self._roots.values()) + list(self._visited.values()))
+            return self._snapshot
+
+    def paths(self) -> List[str]:
+        '''Source paths of the modules to search, of those that have one'''
+        with self.lock:
+            return [key for key in list(self._roots) + list(self._visited) if isinstance(key, str)]
+
+    def __iter__(self):
+        return iter(self.modules())
+
+    def __len__(self):
+        with self.lock:
+            return len(self._roots) + len(self._visited)
+
+    def memory_usage(self) -> Dict[str, int]:
+        '''Number of modules, and bytes of source behind their parse trees'''
+        with self.lock:
+            return {'root_modules': len(self._roots),
+                    'visited_modules': len(self._visited),
+                    'root_source_bytes': sum(size for _, size in self._roots.values()),
+                    'visited_source_bytes': sum(size for _, size in self._visited.values())}
+
+
+module_registry = ModuleRegistry()
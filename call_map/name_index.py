@@ -0,0 +1,346 @@
+"""
+Reverse index from name strings to the files and positions where they occur
+
+Used by `jedi_alt.api_usages` to find the modules that can contain usages of a
+name without reading every candidate file on every search. Directories are
+indexed when they are first searched, and files are re-indexed when their
+modification time or size changes.
+
+The index can be stored as an SQLite database in the project directory, so
+that it survives restarts; see `NameIndex.open`. The stored entries of a
+directory are loaded when it is first searched, and only files that changed
+since are read again. The shared `name_index` checks for changes at most every
+`REVALIDATE_INTERVAL` seconds; the file watcher reports changes earlier.
+
+"""
+
+import io
+import os
+import json
+import time
+import sqlite3
+import keyword
+import logging
+import threading
+import tokenize
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, Set, Optional, Iterable
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE_NAME = 'name_index.sqlite3'
+REVALIDATE_INTERVAL = 2.0  # seconds
+READ_WORKERS = 8  # threads reading files when many changed at once
+
+PositionType = Tuple[int, int]
+
+
+def _stat_key(path: str) -> Optional[tuple]:
+    try:
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    else:
+        return (stat.st_mtime_ns, stat.st_size)
+
+
+def scan_names(source: bytes) -> Dict[str, List[PositionType]]:
+    '''Map each name in `source` to the positions where it occurs
+
+    Positions are (line, column) pairs, with 1-based lines and 0-based columns,
+    like parser tree positions.
+
+    '''
+    occurrences = {}  # type: Dict[str, List[PositionType]]
+
+    tokens = tokenize.tokenize(io.BytesIO(source).readline)
+    for token in tokens:
+        if token.type == tokenize.NAME and not keyword.iskeyword(token.string):
+            occurrences.setdefault(token.string, []).append(token.start)
+
+    return occurrences
+
+
+def _read_file(path: str) -> Optional[bytes]:
+    try:
+        with open(path, 'rb') as ff:
+            return ff.read()
+    except OSError as err:
+        logger.debug('Cannot read {}; {}'.format(path, err))
+        return None
+
+
+def _read_files(paths: List[str]) -> List[Optional[bytes]]:
+    if len(paths) < 2 * READ_WORKERS:
+        return [_read_file(path) for path in paths]
+
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        return list(executor.map(_read_file, paths))
+
+
+class NameIndex:
+    def __init__(self, revalidate_interval: float = 0):
+        """
+        :param revalidate_interval: seconds during which files and directories
+            that were checked for changes are not checked again, except
+            through `update_paths`.
+        """
+        self.lock = threading.RLock()
+        self.revalidate_interval = revalidate_interval
+
+        self._directories = {}  # type: Dict[str, Optional[tuple]]; maps directory to stat key
+        self._directory_files = {}  # type: Dict[str, Set[str]]; maps directory to Python files in it
+        self._files = {}        # type: Dict[str, Optional[tuple]]; maps file to stat key
+        self._file_names = {}   # type: Dict[str, Optional[Dict[str, List[PositionType]]]]
+        self._name_files = {}   # type: Dict[str, Set[str]]; maps name to files containing it
+        self._checked_at = {}   # type: Dict[str, float]; maps file or directory to time of last check
+
+        self.connection = None  # type: Optional[sqlite3.Connection]
+        self._loaded_directories = set()  # type: Set[str]; directories read from the database
+
+    def open(self, database: Optional[str]):
+        '''Store the index in the SQLite file `database`, or only in memory if None'''
+        with self.lock:
+            self.close()
+            self.clear()
+
+            if database is None:
+                return
+
+            try:
+                self.connection = sqlite3.connect(database, check_same_thread=False)
+                with self.connection:
+                    self.connection.execute(
+                        'CREATE TABLE IF NOT EXISTS files ('
+                        ' path TEXT PRIMARY KEY, directory TEXT,'
+                        ' mtime_ns INTEGER, size INTEGER, names TEXT)')
+                    self.connection.execute(
+                        'CREATE INDEX IF NOT EXISTS files_directory ON files (directory)')
+            except sqlite3.Error as err:
+                logger.error('Cannot open name index {}; {}'.format(database, err))
+                self.connection = None
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+            self._loaded_directories.clear()
+
+    def clear(self):
+        with self.lock:
+            self._directories.clear()
+            self._directory_files.clear()
+            self._files.clear()
+            self._file_names.clear()
+            self._name_files.clear()
+            self._checked_at.clear()
+            self._loaded_directories.clear()
+
+    def _is_fresh(self, path: str) -> bool:
+        '''Whether `path` was checked for changes less than `revalidate_interval` ago'''
+        now = time.monotonic()
+        checked_at = self._checked_at.get(path)
+        if checked_at is not None and now - checked_at < self.revalidate_interval:
+            return True
+
+        self._checked_at[path] = now
+        return False
+
+    def _set_occurrences(self, path: str, stat_key: Optional[tuple],
+                         occurrences: Optional[Dict[str, List[PositionType]]]):
+        self._remove_file(path)
+
+        if occurrences is not None:
+            for name in occurrences:
+                self._name_files.setdefault(name, set()).add(path)
+
+        self._files[path] = stat_key
+        self._file_names[path] = occurrences
+
+    def _index_file(self, path: str, stat_key: Optional[tuple], source: Optional[bytes] = None):
+        if source is None:
+            source = _read_file(path)
+
+        try:
+            if source is None:
+                raise OSError('unreadable')
+            occurrences = scan_names(source)
+        except (OSError, SyntaxError, UnicodeDecodeError, tokenize.TokenError) as err:
+            # Unknown contents; the file is always a candidate.
+            logger.debug('Cannot index names in {}; {}'.format(path, err))
+            occurrences = None
+
+        self._set_occurrences(path, stat_key, occurrences)
+
+    def _load_directory(self, directory: str):
+        '''Read the stored entries of the files in `directory`'''
+        self._loaded_directories.add(directory)
+
+        try:
+            rows = self.connection.execute(
+                'SELECT path, mtime_ns, size, names FROM files WHERE directory = ?',
+                (directory,)).fetchall()
+        except sqlite3.Error as err:
+            logger.error('Cannot read name index; {}'.format(err))
+            return
+
+        self._directory_files.setdefault(directory, set()).update(path for path, *_ in rows)
+
+        for path, mtime_ns, size, names in rows:
+            if path in self._files:
+                continue
+            if names is None:
+                occurrences = None
+            else:
+                occurrences = {name: [tuple(position) for position in positions]
+                               for name, positions in json.loads(names).items()}
+            self._set_occurrences(path, (mtime_ns, size), occurrences)
+
+    def _store(self, paths: Iterable[str]):
+        '''Write the entries of `paths` to the database, if any'''
+        if self.connection is None:
+            return
+
+        rows = []
+        removed = []
+        for path in paths:
+            if path in self._files and self._files[path] is not None:
+                occurrences = self._file_names[path]
+                mtime_ns, size = self._files[path]
+                rows.append((path, os.path.dirname(path), mtime_ns, size,
+                             None if occurrences is None else json.dumps(occurrences)))
+            else:
+                removed.append((path,))
+
+        try:
+            with self.connection:
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO files (path, directory, mtime_ns, size, names)'
+                    ' VALUES (?, ?, ?, ?, ?)', rows)
+                self.connection.executemany('DELETE FROM files WHERE path = ?', removed)
+        except sqlite3.Error as err:
+            logger.error('Cannot write name index; {}'.format(err))
+
+    def _remove_file(self, path: str):
+        occurrences = self._file_names.pop(path, None)
+        self._files.pop(path, None)
+        if occurrences:
+            for name in occurrences:
+                files = self._name_files.get(name)
+                if files is not None:
+                    files.discard(path)
+                    if not files:
+                        del self._name_files[name]
+
+    def _refresh_file(self, path: str, force: bool = False):
+        if not force and self._is_fresh(path):
+            return
+
+        directory = os.path.dirname(path)
+        if self.connection is not None and directory not in self._loaded_directories:
+            self._load_directory(directory)
+
+        stat_key = _stat_key(path)
+        if stat_key is None:
+            if path in self._files:
+                self._remove_file(path)
+                self._store([path])
+        elif path not in self._files or self._files[path] != stat_key:
+            self._index_file(path, stat_key)
+            self._store([path])
+
+    def _refresh_directory(self, directory: str):
+        if directory in self._directory_files and self._is_fresh(directory):
+            return
+        self._checked_at[directory] = time.monotonic()
+
+        if self.connection is not None and directory not in self._loaded_directories:
+            self._load_directory(directory)
+
+        stat_key = _stat_key(directory)
+
+        if directory not in self._directories or self._directories[directory] != stat_key:
+            self._directories[directory] = stat_key
+
+            try:
+                file_names = os.listdir(directory)
+            except OSError:
+                file_names = []
+
+            new_files = {os.path.join(directory, file_name)
+                         for file_name in file_names if file_name.endswith('.py')}
+
+            removed = self._directory_files.get(directory, set()) - new_files
+            for path in removed:
+                self._remove_file(path)
+            self._store(removed)
+
+            self._directory_files[directory] = new_files
+
+        # Editing a file does not change the modification time of its
+        # directory, so every file is checked.
+        now = time.monotonic()
+        changed = []
+        gone = []
+        for path in self._directory_files[directory]:
+            self._checked_at[path] = now
+            stat_key = _stat_key(path)
+            if stat_key is None:
+                if path in self._files:
+                    self._remove_file(path)
+                    gone.append(path)
+            elif path not in self._files or self._files[path] != stat_key:
+                changed.append((path, stat_key))
+
+        for (path, stat_key), source in zip(changed, _read_files([path for path, _ in changed])):
+            self._index_file(path, stat_key, source)
+
+        self._store([path for path, _ in changed] + gone)
+
+    def update_paths(self, paths: Iterable[str]):
+        '''Re-index the given files if they changed'''
+        with self.lock:
+            for path in paths:
+                path = os.path.abspath(path)
+                self._refresh_file(path, force=True)
+                # a new or deleted file changes its directory
+                self._checked_at.pop(os.path.dirname(path), None)
+
+    def may_contain(self, path: str, name: str) -> bool:
+        '''Whether the file at `path` may contain `name`
+
+        Unreadable or untokenizable files may contain anything.
+
+        '''
+        path = os.path.abspath(path)
+        with self.lock:
+            self._refresh_file(path)
+            try:
+                occurrences = self._file_names[path]
+            except KeyError:
+                return False
+            return occurrences is None or name in occurrences
+
+    def files_containing(self, name: str, directories: Iterable[str]) -> Set[str]:
+        '''Python files directly in `directories` that may contain `name`'''
+        with self.lock:
+            found = set()
+            for directory in set(map(os.path.abspath, directories)):
+                self._refresh_directory(directory)
+                directory_files = self._directory_files[directory]
+                found.update(directory_files & self._name_files.get(name, set()))
+                found.update(path for path in directory_files
+                             if path in self._file_names and self._file_names[path] is None)
+
+            return found
+
+    def occurrences(self, name: str, path: str) -> List[PositionType]:
+        '''Positions of `name` in the file at `path`'''
+        path = os.path.abspath(path)
+        with self.lock:
+            self._refresh_file(path)
+            return list((self._file_names.get(path) or {}).get(name, ()))
+
+
+name_index = NameIndex(revalidate_interval=REVALIDATE_INTERVAL)
@@ -119,9 +119,42 @@ class Project:
             if not self.project_directory_is_set_up:
                 self._setup_project_directory()
                 self.project_directory_is_set_up = True
+                self.update_call_graph_index('python')
+                self.update_name_index('python')
 
             self._write_to_project_directory()
 
+    def update_call_graph_index(self, platform: str):
+        '''Open the call graph index for the current project directory and sys_path
+
+        Without a set up project directory, the index is kept in memory.
+
+        '''
+        if platform.lower().startswith('python'):
+            from . import jedi_dump
+            from .call_graph_index import CallGraphIndex
+
+            old_index = jedi_dump.JediCodeElementNode.call_graph_index
+
+            project_directory = self.project_directory if self.project_directory_is_set_up else None
+            jedi_dump.JediCodeElementNode.call_graph_index = CallGraphIndex.for_project_directory(
+                project_directory, self.settings[sys_path])
+
+            if old_index is not None:
+                old_index.close()
+
+    def update_name_index(self, platform: str):
+        '''Store the name index in the current project directory
+
+        Without a set up project directory, the index is kept in memory.
+
+        '''
+        if platform.lower().startswith('python'):
+            from .name_index import name_index, INDEX_FILE_NAME
+
+            project_directory = self.project_directory if self.project_directory_is_set_up else None
+            name_index.open(str(project_directory.joinpath(INDEX_FILE_NAME)) if project_directory else None)
+
     def _setup_project_directory(self):
         # only used in update_persistent_storage
         try:
@@ -252,6 +285,7 @@ class Project:
 
                 platform = 'python'
                 self.update_module_resolution_path(platform)
+                self.update_call_graph_index(platform)
                 self.make_platform_specific_nodes(platform)  # depends on self.settings[sys_path]
 
                 return (old != decoded, to_delete, to_add)
@@ -266,16 +300,39 @@ class Project:
 
 
     def make_platform_specific_nodes(self, platform: str):
+        for _ in self.iter_platform_specific_nodes(platform):
+            pass
+
+    def reset_platform_specific_nodes(self, platform: str):
+        self.module_nodes[platform] = {}
+        self.script_nodes[platform] = {}
+        self.failures[platform] = {modules: {}, scripts: {}}
+
+    def iter_platform_specific_nodes(self, platform: str) -> Iterable[Node]:
+        '''Resolve the root modules and scripts, yielding each node as it is resolved
+
+        Failures are recorded in `self.failures` as they occur. The usage search
+        locations are updated once all nodes are resolved.
+
+        '''
+        self.reset_platform_specific_nodes(platform)
+
         if platform.lower().startswith('python'):
             from . import jedi_dump
 
-            self.failures[platform] = {}
-
-            self.module_nodes[platform], self.failures[platform][modules] = (
-                jedi_dump.dump_module_nodes(self.settings[sys_path], self.settings[modules]))
+            for name, node, err in jedi_dump.iter_module_nodes(self.settings[sys_path], self.settings[modules]):
+                if node:
+                    self.module_nodes[platform][name] = node
+                    yield node
+                else:
+                    self.failures[platform][modules][name] = err
 
-            self.script_nodes[platform], self.failures[platform][scripts] = (
-                jedi_dump.dump_script_nodes(self.settings[sys_path], self.settings[scripts]))
+            for path, node, err in jedi_dump.iter_script_nodes(self.settings[sys_path], self.settings[scripts]):
+                if node:
+                    self.script_nodes[platform][path] = node
+                    yield node
+                else:
+                    self.failures[platform][scripts][path] = err
 
         self.update_usage_search_locations(platform)
 
@@ -290,13 +347,109 @@ class Project:
         if platform.lower().startswith('python'):
             from . import jedi_dump
 
-            jedi_dump.JediCodeElementNode.usage_resolution_modules = (
-                frozenset((nn.module_context for nn in
-                           tz.concatv(self.module_nodes[platform].values(),
-                                      self.script_nodes[platform].values())
-                           if nn.code_element.path)))
+            from .resolution_pool import resolution_pool
+
+            jedi_dump.JediCodeElementNode.usage_resolution_modules.set_roots(
+                nn.module_context for nn in
+                tz.concatv(self.module_nodes[platform].values(),
+                           self.script_nodes[platform].values())
+                if nn.code_element.path)
+
+            resolution_pool.configure(self.settings[sys_path],
+                                      list(self.module_nodes[platform].keys()),
+                                      list(self.script_nodes[platform].keys()))
+
+    def refresh_paths(self, platform: str, paths: Iterable[str]) -> Tuple[List[Node], List[Node]]:
+        '''Re-resolve the root modules and scripts defined in the changed files `paths`
+
+        Returns the stale and the replacement root nodes.
+
+        '''
+        paths = set(map(str, paths))
+
+        stale = []  # type: List[Node]
+        additional = []  # type: List[Node]
+
+        if platform.lower().startswith('python'):
+            from . import jedi_dump
+
+            changed_modules = [name for name, node in self.module_nodes[platform].items()
+                               if node.code_element.path in paths]
+            changed_scripts = [path for path, node in self.script_nodes[platform].items()
+                               if node.code_element.path in paths]
+
+            if not (changed_modules or changed_scripts):
+                return stale, additional
+
+            new_modules, module_failures = jedi_dump.dump_module_nodes(self.settings[sys_path], changed_modules)
+            new_scripts, script_failures = jedi_dump.dump_script_nodes(self.settings[sys_path], changed_scripts)
+
+            for nodes, failures, changed, new_nodes, new_failures in [
+                    (self.module_nodes, self.failures[platform][modules], changed_modules, new_modules, module_failures),
+                    (self.script_nodes, self.failures[platform][scripts], changed_scripts, new_scripts, script_failures)]:
+                for key in changed:
+                    stale.append(nodes[platform].pop(key))
+                    failures.pop(key, None)
+                nodes[platform].update(new_nodes)
+                failures.update(new_failures)
+                additional.extend(new_nodes.values())
+
+            self.update_usage_search_locations(platform)
+
+        return stale, additional
+
+    def errors(self, platform: str) -> List[Exception]:
+        return list(tz.concatv(self.failures[platform][modules].values(),
+                               self.failures[platform][scripts].values()))
+
+    def root_node(self, platform: str) -> Node:
+        from .core import OrganizerNode
+
+        return OrganizerNode('Root', [],
+                             list(tz.concatv(self.module_nodes[platform].values(),
+                                             self.script_nodes[platform].values())))
 
     def update_module_resolution_path(self, platform: str):
         if platform.lower().startswith('python'):
             from . import jedi_dump
             jedi_dump.JediCodeElementNode.sys_path = [str(pp) for pp in self.settings[sys_path]]
+
+
+def make_project(user_scope_settings: UserScopeSettings, project_directory: Optional[Path],
+                 resolve_nodes: bool = True) -> Project:
+    '''Load a project and resolve its root nodes
+
+    Settings stored in `project_directory` are combined with
+    `user_scope_settings`. Resolution failures are recorded in
+    `Project.failures`. Nothing is written to the project directory.
+
+    :param resolve_nodes: if False, the project starts without root nodes,
+        to be resolved later with `Project.iter_platform_specific_nodes`.
+
+    '''
+    from .jedi_dump import make_scope_settings
+
+    project = Project(project_directory)
+
+    stored_settings = project.load_from_persistent_storage()
+    is_new_project = bool(stored_settings)
+    project.update_settings(stored_settings)
+
+    scope_settings = make_scope_settings(is_new_project, project.scope_settings, user_scope_settings)
+
+    project.settings.update(
+        {modules: scope_settings.module_names,
+         scripts: scope_settings.scripts,
+         sys_path: scope_settings.effective_sys_path})
+
+    platform = 'python'
+    project.update_module_resolution_path(platform)
+    project.update_call_graph_index(platform)
+    project.update_name_index(platform)
+
+    if resolve_nodes:
+        project.make_platform_specific_nodes(platform)
+    else:
+        project.reset_platform_specific_nodes(platform)
+
+    return project
@@ -0,0 +1,223 @@
+"""
+Resolve children and parents of nodes in worker processes
+
+Jedi is GIL-bound, so resolving callees and callers of a node in threads does
+not use more than one core. `ResolutionPool` sends code elements to a pool of
+worker processes instead. Each worker keeps a jedi parser cache and the usage
+search modules of the project warm between requests, and returns the connected
+code elements encoded with `serialize`. In the GUI process, the results become
+`JediCodeElementNode`s that resolve their jedi definitions lazily.
+
+The pool is only used if the user config sets `PROCESS_POOL_WORKERS` to a
+positive number. Workers are spawned, not forked from the Qt application.
+
+"""
+
+import logging
+import threading
+import multiprocessing
+from typing import Dict, List, Tuple, Optional, NamedTuple
+
+from .core import CodeElement, Node
+from .config import get_user_config
+from . import serialize
+from . import cancellation
+
+logger = logging.getLogger(__name__)
+
+WorkerSettings = NamedTuple('WorkerSettings', [('sys_path', Tuple[str, ...]),
+                                               ('module_names', Tuple[str, ...]),
+                                               ('scripts', Tuple[str, ...]),
+                                               ('index_database', Optional[str]),
+                                               ('generation', int)])
+
+CANCEL_POLL_INTERVAL = 0.05  # seconds
+
+children = 'children'
+parents = 'parents'
+
+
+# State of the worker processes
+
+_worker_settings = None  # type: Optional[WorkerSettings]
+
+
+def _configure_worker(settings: WorkerSettings):
+    global _worker_settings
+
+    if settings == _worker_settings:
+        return
+
+    import jedi
+    from .jedi_dump import JediCodeElementNode, get_module_node
+    from .call_graph_index import CallGraphIndex
+
+    JediCodeElementNode.sys_path = list(settings.sys_path)
+    JediCodeElementNode.usage_resolution_modules.clear()
+
+    for module_name in settings.module_names:
+        # also adds the module to JediCodeElementNode.usage_resolution_modules
+        get_module_node(settings.sys_path, module_name)
+
+    for path in settings.scripts:
+        try:
+            module = jedi.api.Script(path=path, sys_path=list(settings.sys_path))._get_module()
+        except (FileNotFoundError, UnicodeDecodeError):
+            continue
+        JediCodeElementNode.usage_resolution_modules.add(module)
+
+    if settings.index_database:
+        JediCodeElementNode.call_graph_index = CallGraphIndex(settings.index_database, settings.sys_path)
+    else:
+        JediCodeElementNode.call_graph_index = None
+
+    _worker_settings = settings
+
+
+def _watch_cancel_event(cancel_event, local_cancel_event: threading.Event, done: threading.Event):
+    '''Set `local_cancel_event` once `cancel_event`, an event of the manager process, is set'''
+    while not done.wait(CANCEL_POLL_INTERVAL):
+        try:
+            cancelled = cancel_event.is_set()
+        except (EOFError, OSError):
+            # The manager went away with the GUI process.
+            cancelled = True
+
+        if cancelled:
+            local_cancel_event.set()
+            return
+
+
+def _resolve_in_worker(settings: WorkerSettings, direction: str, encoded_code_element: dict,
+                       cancel_event) -> List[dict]:
+    from .jedi_dump import JediCodeElementNode, filter_nodes
+
+    try:
+        if cancel_event.is_set():
+            # cancelled while queued
+            return []
+    except (EOFError, OSError):
+        return []
+
+    _configure_worker(settings)
+
+    node = JediCodeElementNode.from_index(serialize.decode(CodeElement, encoded_code_element))
+
+    # checking the event of the manager from jedi would take a round trip per check
+    local_cancel_event = threading.Event()
+    done = threading.Event()
+    watcher = threading.Thread(target=_watch_cancel_event, args=(cancel_event, local_cancel_event, done),
+                               daemon=True)
+    watcher.start()
+
+    try:
+        with cancellation.scope(local_cancel_event):
+            if direction == children:
+                nodes = list(node.children)
+            else:
+                nodes = list(node.parents)
+    finally:
+        done.set()
+        watcher.join()
+
+    if local_cancel_event.is_set():
+        return []
+
+    return [serialize.encode(CodeElement, nn.code_element) for nn in filter_nodes(nodes)]
+
+
+class ResolutionPool:
+    def __init__(self):
+        self.settings = WorkerSettings((), (), (), None, 0)
+        self.lock = threading.Lock()
+        self._pool = None
+        self._manager = None
+
+    def configure(self, sys_path: List[str], module_names: List[str], scripts: List[str]):
+        '''Set what the workers load before resolving nodes
+
+        Workers reconfigure themselves lazily, on their next request.
+
+        '''
+        self.settings = self.settings._replace(sys_path=tuple(map(str, sys_path)),
+                                               module_names=tuple(module_names),
+                                               scripts=tuple(map(str, scripts)))
+
+    def invalidate(self):
+        '''Make workers reload their modules, e.g. after source files changed'''
+        self.settings = self.settings._replace(generation=self.settings.generation + 1)
+
+    @property
+    def max_workers(self) -> int:
+        return get_user_config()['PROCESS_POOL_WORKERS'] or 0
+
+    def accepts(self, node: Node) -> bool:
+        from .jedi_dump import JediCodeElementNode
+
+        return (self.max_workers > 0
+                and isinstance(node, JediCodeElementNode)
+                and bool(node.code_element.path))
+
+    def _start(self):
+        with self.lock:
+            if self._pool is None:
+                # Do not fork the Qt application.
+                context = multiprocessing.get_context('spawn')
+                self._pool = context.Pool(processes=self.max_workers)
+                self._manager = context.Manager()
+
+        return self._pool, self._manager
+
+    def shutdown(self):
+        with self.lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._manager.shutdown()
+                self._pool = None
+                self._manager = None
+
+    def resolve(self, node: Node, directions: Tuple[str, ...],
+                cancel_event: threading.Event) -> Dict[str, List[Node]]:
+        '''Resolve `directions` (children and/or parents) of `node` concurrently in worker processes
+
+        Returns empty lists if `cancel_event` is set before all are resolved.
+
+        '''
+        from .jedi_dump import JediCodeElementNode
+
+        pool, manager = self._start()
+
+        index = JediCodeElementNode.call_graph_index
+        database = index.database if index is not None and index.database != ':memory:' else None
+        settings = self.settings._replace(index_database=database)
+
+        encoded = serialize.encode(CodeElement, node.code_element)
+        worker_cancel_event = manager.Event()
+
+        async_results = {direction: pool.apply_async(_resolve_in_worker,
+                                                     (settings, direction, encoded, worker_cancel_event))
+                         for direction in directions}
+
+        for async_result in async_results.values():
+            while not async_result.ready():
+                async_result.wait(CANCEL_POLL_INTERVAL)
+                if cancel_event.is_set():
+                    # Workers return early; requests that have not started yet
+                    # see the event set when they do.
+                    worker_cancel_event.set()
+                    return {direction: [] for direction in directions}
+
+        results = {}
+        for direction, async_result in async_results.items():
+            try:
+                results[direction] = [JediCodeElementNode.from_index(serialize.decode(CodeElement, ce))
+                                      for ce in async_result.get()]
+            except Exception as exc:
+                logger.error('{}; while finding {} of {} in a worker process.'.format(exc, direction, node),
+                             exc_info=get_user_config()['EXC_INFO'])
+                results[direction] = []
+
+        return results
+
+
+resolution_pool = ResolutionPool()
@@ -0,0 +1,386 @@
+"""
+Approximate callees and callers, read from the syntax of files
+
+Resolving calls with jedi can take seconds. The functions here instead match
+called names with definitions by name: a call resolves to a
+definition in an enclosing scope, a name imported from another module, a
+method of the enclosing class (for `self.name` and `cls.name`), or failing
+that, the only definition of that name in the searched directories. Calls
+that match several definitions are skipped.
+
+The results are shown as provisional items while jedi resolves the exact ones
+(see `gui.CallList.showProvisional`). Calls, nested definitions and their
+positions are those of `JediCodeElementNode.children`, read from the same
+`CallSiteTable`; the items differ from the resolved ones only in their
+targets, which are missing for calls that match no single definition and may
+be wrong for calls of names that are rebound, assigned, or inherited. Only
+the parser of jedi is used, without its caches, so this can run on a thread
+of its own.
+
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from jedi.common import source_to_unicode
+
+from .core import CodeElement
+from .jedi_ast_tools import CallSiteTable, call_site_table_cache
+from .import_graph import absolute_module_name, _stat_key
+from .name_index import name_index
+from .sys_path_index import sys_path_index
+
+logger = logging.getLogger(__name__)
+
+CALLERS_TIME_LIMIT = 0.5  # seconds; remaining candidate files are skipped
+MAX_IMPORT_HOPS = 3  # followed re-exports, as in `from .mod import name` in `__init__.py`
+
+Scope = NamedTuple('Scope', [('name', str),
+                             ('type', str),  # 'function' or 'class'
+                             ('start_pos', Tuple[int, int]),  # of the name
+                             ('end_pos', Tuple[int, int]),
+                             ('parent', Optional[tuple]),  # start_pos of the enclosing scope, None for the module
+                             ('class_name', Optional[str])])  # of the class, for methods
+
+Call = NamedTuple('Call', [('name', str),
+                           ('qualified', bool),  # e.g. `aa.name()`
+                           ('base', Optional[str]),  # `aa` in `aa.name()`, if a plain name
+                           ('role', str),  # 'child', or 'definition' for nested definitions
+                           ('start_pos', Tuple[int, int]),
+                           ('end_pos', Tuple[int, int]),
+                           ('scope', Optional[tuple]),  # start_pos of the enclosing scope
+                           ('definition', Optional[tuple])])  # start_pos of the defined scope, for definitions
+
+
+class FileSyntax:
+    '''Definitions, imports and calls of a Python file, from its `CallSiteTable`'''
+
+    def __init__(self, path: str, table: CallSiteTable):
+        self.path = path
+        self.module = os.path.basename(path)[:-len('.py')] if path.endswith('.py') else os.path.basename(path)
+        self.is_package = os.path.basename(path) == '__init__.py'
+
+        self.scopes = {}  # type: Dict[tuple, Scope]; by position of the name
+        self.definitions = {}  # type: Dict[Tuple[Optional[tuple], str], Scope]; by enclosing scope and name
+        self.imports = dict(table.imports)  # type: Dict[str, Tuple[int, Optional[str], Optional[str]]]
+        self.calls = []  # type: List[Call]
+
+        # the table keys scopes by the start of their node, scopes here are keyed by the start of their name
+        name_positions = {None: None}  # type: Dict[Optional[tuple], Optional[tuple]]
+        nested = {}  # type: Dict[Optional[tuple], List[Scope]]; in the order of their definition entries
+        for key, name, type_, start_pos, end_pos, parent_key in table.scopes:
+            parent = name_positions[parent_key]
+            parent_scope = self.scopes.get(parent)
+            scope = Scope(name=name,
+                          type=type_,
+                          start_pos=start_pos,
+                          end_pos=end_pos,
+                          parent=parent,
+                          class_name=parent_scope.name if parent_scope and parent_scope.type == 'class' else None)
+            name_positions[key] = start_pos
+            self.scopes[start_pos] = scope
+            nested.setdefault(parent_key, []).append(scope)
+            if name != '<lambda>':
+                self.definitions[(parent, name)] = scope
+
+        for key, (begin, end) in table.ranges.items():
+            scope_pos = name_positions[key]
+            definitions = iter(nested.get(key, ()))
+            for ii in range(begin, end):
+                start_pos = (table.start_lines[ii], table.start_columns[ii])
+                end_pos = (table.end_lines[ii], table.end_columns[ii])
+                if table.roles[ii] == 'definition':
+                    # positions as in the definition entries of `JediCodeElementNode.children`
+                    self.calls.append(Call(table.names[ii], False, None, 'definition', start_pos, end_pos,
+                                           scope_pos, next(definitions).start_pos))
+                elif table.names[ii].isidentifier():
+                    base = table.bases[ii]
+                    self.calls.append(Call(table.names[ii], base is not None, base or None, 'child',
+                                           start_pos, end_pos, scope_pos, None))
+
+        self.calls.sort(key=lambda call: call.start_pos)
+        self.calls_by_scope = {}  # type: Dict[Optional[tuple], List[Call]]
+        self.calls_by_name = {}  # type: Dict[str, List[Call]]
+        for call in self.calls:
+            self.calls_by_scope.setdefault(call.scope, []).append(call)
+            self.calls_by_name.setdefault(call.name, []).append(call)
+
+    def class_of(self, scope_pos: Optional[tuple]) -> Optional[Scope]:
+        '''The class whose method contains `scope_pos`'''
+        while scope_pos is not None:
+            scope = self.scopes[scope_pos]
+            if scope.class_name is not None:
+                return self.scopes[scope.parent]
+            scope_pos = scope.parent
+        return None
+
+
+class SyntaxCache:
+    '''`FileSyntax` of files, keyed by content hash
+
+    A file is read again when its modification time or size changes, and parsed
+    again only if its content changed.
+
+    '''
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._files = {}  # type: Dict[str, Tuple[Optional[tuple], Optional[str], Optional[FileSyntax]]]
+
+    def clear(self):
+        with self.lock:
+            self._files.clear()
+
+    def invalidate(self, paths: Iterable[str]):
+        '''Read the files at `paths` again on their next use; unchanged content is not parsed again'''
+        with self.lock:
+            for path in paths:
+                path = os.path.abspath(str(path))
+                cached = self._files.get(path)
+                if cached is not None:
+                    # an empty stat key matches no file
+                    self._files[path] = ((), cached[1], cached[2])
+
+    def get(self, path: str) -> Optional[FileSyntax]:
+        '''The syntax of the file at `path`, or None if it cannot be read or decoded'''
+        path = os.path.abspath(str(path))
+        stat_key = _stat_key(path)
+
+        with self.lock:
+            cached = self._files.get(path)
+            if cached is not None and cached[0] == stat_key:
+                return cached[2]
+
+        try:
+            with open(path, 'rb') as ff:
+                source = ff.read()
+        except OSError as err:
+            logger.debug('Cannot read syntax of {}; {}'.format(path, err))
+            digest, syntax = None, None
+        else:
+            digest = hashlib.sha1(source).hexdigest()
+            if cached is not None and cached[1] == digest:
+                syntax = cached[2]
+            else:
+                try:
+                    syntax = FileSyntax(path, call_site_table_cache.for_source(source_to_unicode(source)))
+                except (LookupError, ValueError) as err:
+                    logger.debug('Cannot read syntax of {}; {}'.format(path, err))
+                    syntax = None
+
+        with self.lock:
+            self._files[path] = (stat_key, digest, syntax)
+
+        return syntax
+
+
+syntax_cache = SyntaxCache()
+
+
+Target = Tuple[str, Scope]  # path and definition
+
+
+class Resolver:
+    '''Matches calls with definitions, for one `sys_path` and set of searched directories'''
+
+    def __init__(self, sys_path: Sequence[str], directories: Iterable[str]):
+        self.sys_path = list(sys_path)
+        self.directories = set(directories)
+        self._unique = {}  # type: Dict[Tuple[str, bool], Optional[Target]]
+
+    def resolve(self, syntax: FileSyntax, call: Call) -> Optional[Target]:
+        if not call.qualified:
+            scope_pos = call.scope
+            while True:
+                # like in Python, class bodies are not enclosing scopes of their methods
+                if scope_pos is None or scope_pos == call.scope or syntax.scopes[scope_pos].type != 'class':
+                    definition = syntax.definitions.get((scope_pos, call.name))
+                    if definition is not None:
+                        return (syntax.path, definition)
+                if scope_pos is None:
+                    break
+                scope_pos = syntax.scopes[scope_pos].parent
+
+            if call.name in syntax.imports:
+                return self._imported(syntax, call.name, MAX_IMPORT_HOPS)
+
+            return self._unique_definition(call.name, methods=False)
+
+        elif call.base in ('self', 'cls'):
+            class_scope = syntax.class_of(call.scope)
+            if class_scope is not None:
+                method = syntax.definitions.get((class_scope.start_pos, call.name))
+                if method is not None:
+                    return (syntax.path, method)
+
+        elif call.base in syntax.imports:
+            level, module, imported_name = syntax.imports[call.base]
+            module_name = self._absolute(syntax, level, module)
+            if module_name is not None:
+                if imported_name is not None:
+                    module_name += '.' + imported_name
+                target = self._top_level(module_name, call.name, MAX_IMPORT_HOPS)
+                if target is not None:
+                    return target
+
+        return self._unique_definition(call.name, methods=True)
+
+    def _absolute(self, syntax: FileSyntax, level: int, module: Optional[str]) -> Optional[str]:
+        if not level:
+            return module
+        module_name = sys_path_index.module_name(self.sys_path, syntax.path)
+        if syntax.is_package and module_name is not None and module_name.endswith('.__init__'):
+            module_name = module_name[:-len('.__init__')]
+        return absolute_module_name(module_name, syntax.is_package, level, module)
+
+    def _imported(self, syntax: FileSyntax, name: str, hops: int) -> Optional[Target]:
+        level, module, imported_name = syntax.imports[name]
+        module_name = self._absolute(syntax, level, module)
+        if module_name is None or imported_name is None:
+            return None
+        return self._top_level(module_name, imported_name, hops)
+
+    def _top_level(self, module_name: str, name: str, hops: int) -> Optional[Target]:
+        module_file = sys_path_index.module_file(self.sys_path, module_name)
+        syntax = syntax_cache.get(str(module_file)) if module_file is not None else None
+        if syntax is None:
+            return None
+
+        definition = syntax.definitions.get((None, name))
+        if definition is not None:
+            return (syntax.path, definition)
+        elif hops > 0 and name in syntax.imports:
+            return self._imported(syntax, name, hops - 1)
+        else:
+            return None
+
+    def _unique_definition(self, name: str, methods: bool) -> Optional[Target]:
+        '''The only top-level definition, or method if `methods`, named `name`'''
+        try:
+            return self._unique[(name, methods)]
+        except KeyError:
+            pass
+
+        found = []
+        for path in sorted(name_index.files_containing(name, self.directories)):
+            syntax = syntax_cache.get(path)
+            if syntax is None:
+                continue
+            found.extend((syntax.path, scope) for scope in syntax.scopes.values()
+                         if scope.name == name and (scope.parent is None
+                                                    or methods and syntax.scopes[scope.parent].type == 'class'))
+            if len(found) > 1:
+                break
+
+        self._unique[(name, methods)] = target = found[0] if len(found) == 1 else None
+        return target
+
+
+def _scope_code_element(syntax: FileSyntax, scope: Scope, role: str, call_pos) -> CodeElement:
+    return CodeElement(name=scope.name,
+                       type=scope.type,
+                       module=syntax.module,
+                       role=role,
+                       path=syntax.path,
+                       call_pos=call_pos,
+                       start_pos=scope.start_pos,
+                       end_pos=scope.end_pos)
+
+
+def _enclosing_scope(syntax: FileSyntax, code_element: CodeElement) -> Tuple[bool, Optional[tuple]]:
+    if code_element.type in ('module', 'script'):
+        return True, None
+    elif code_element.start_pos in syntax.scopes:
+        return True, code_element.start_pos
+    else:
+        return False, None
+
+
+def callees(code_element: CodeElement, sys_path: Sequence[str], directories: Iterable[str],
+            cancel_event: Optional[threading.Event] = None) -> List[CodeElement]:
+    '''Calls and nested definitions in the definition at `code_element`, in order
+
+    Returns code elements with roles 'child' and 'definition', like those of
+    `JediCodeElementNode.children`, for the calls that can be matched.
+
+    '''
+    syntax = syntax_cache.get(code_element.path) if code_element.path else None
+    if syntax is None:
+        return []
+
+    found, scope_pos = _enclosing_scope(syntax, code_element)
+    if not found:
+        return []
+
+    resolver = Resolver(sys_path, directories)
+    result = []
+    for call in syntax.calls_by_scope.get(scope_pos, ()):
+        if cancel_event is not None and cancel_event.is_set():
+            break
+
+        call_pos = (syntax.path, call.start_pos, call.end_pos)
+        if call.role == 'definition':
+            result.append(_scope_code_element(syntax, syntax.scopes[call.definition], 'definition', call_pos))
+            continue
+
+        target = resolver.resolve(syntax, call)
+        if target is not None:
+            path, scope = target
+            result.append(_scope_code_element(syntax_cache.get(path), scope, 'child', call_pos))
+
+    return result
+
+
+def callers(code_element: CodeElement, sys_path: Sequence[str], directories: Iterable[str],
+            cancel_event: Optional[threading.Event] = None,
+            time_limit: float = CALLERS_TIME_LIMIT) -> List[CodeElement]:
+    '''Scopes in `directories` with calls matched to the definition at `code_element`
+
+    Returns code elements with role 'parent', like those of
+    `JediCodeElementNode.parents`. Files are read in order of path until
+    `time_limit` seconds have passed.
+
+    '''
+    if not code_element.path or code_element.type not in ('function', 'class'):
+        return []
+
+    target = (os.path.abspath(code_element.path), code_element.start_pos)
+    directories = set(directories) | {os.path.dirname(target[0])}
+    resolver = Resolver(sys_path, directories)
+    deadline = time.monotonic() + time_limit
+
+    result = []
+    for path in sorted(name_index.files_containing(code_element.name, directories)):
+        if (cancel_event is not None and cancel_event.is_set()) or time.monotonic() > deadline:
+            break
+
+        syntax = syntax_cache.get(path)
+        if syntax is None:
+            continue
+
+        for call in syntax.calls_by_name.get(code_element.name, ()):
+            if call.role != 'child':
+                continue
+
+            resolved = resolver.resolve(syntax, call)
+            if resolved is None or (resolved[0], resolved[1].start_pos) != target:
+                continue
+
+            call_pos = (syntax.path, call.start_pos, call.end_pos)
+            if call.scope is None:
+                result.append(CodeElement(name=syntax.module,
+                                          type='module',
+                                          module=syntax.module,
+                                          role='parent',
+                                          path=syntax.path,
+                                          call_pos=call_pos,
+                                          start_pos=(1, 0),
+                                          end_pos=(None, None)))
+            else:
+                result.append(_scope_code_element(syntax, syntax.scopes[call.scope], 'parent', call_pos))
+
+    return result
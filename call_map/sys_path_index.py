@@ -0,0 +1,257 @@
+"""
+In-memory index of the directories on the module search path
+
+Maps files to module names and module names to files without resolving every
+`sys_path` entry and probing for `__init__.py` on every call. Directory
+listings, resolved `sys_path` entries and lookup results (including failed
+lookups) are kept, and checked against the modification time of the directory
+at most once every `REVALIDATE_INTERVAL` seconds. `invalidate` drops them
+earlier, e.g. when the file watcher reports changes.
+
+"""
+
+import os
+import time
+import threading
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+REVALIDATE_INTERVAL = 2.0  # seconds
+
+Listing = NamedTuple('Listing', [('files', FrozenSet[str]),
+                                 ('directories', FrozenSet[str])])
+
+_empty_listing = Listing(frozenset(), frozenset())
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except (OSError, ValueError):
+        return None
+
+
+def _list_directory(directory: str) -> Listing:
+    files = []
+    directories = []
+    try:
+        # iterated to exhaustion, which closes the iterator; Python 3.5 has no
+        # context manager for it
+        for entry in os.scandir(directory):
+            try:
+                if entry.is_dir():
+                    directories.append(entry.name)
+                elif entry.is_file():
+                    files.append(entry.name)
+            except OSError:
+                continue
+    except (OSError, ValueError):
+        return _empty_listing
+
+    return Listing(frozenset(files), frozenset(directories))
+
+
+class SysPathIndex:
+    def __init__(self):
+        self.lock = threading.RLock()
+
+        self._resolved = {}  # type: Dict[str, Tuple[float, Optional[Path]]]; maps path to (checked at, resolved path)
+        self._listings = {}  # type: Dict[str, Tuple[float, Optional[int], Listing]]; maps directory to (checked at, mtime, listing)
+        self._module_names = {}  # type: Dict[Tuple[Tuple[str, ...], str], Tuple[float, Optional[str]]]
+        self._module_files = {}  # type: Dict[Tuple[Tuple[str, ...], str], Tuple[float, Optional[Path]]]
+
+    def clear(self):
+        with self.lock:
+            self._resolved.clear()
+            self._listings.clear()
+            self._module_names.clear()
+            self._module_files.clear()
+
+    def invalidate(self, paths: Iterable[str]):
+        '''Forget what is known about `paths` and their directories'''
+        with self.lock:
+            for path in paths:
+                path = str(path)
+                self._resolved.pop(path, None)
+                self._listings.pop(path, None)
+                self._listings.pop(os.path.dirname(path), None)
+
+            # results can depend on any listing
+            self._module_names.clear()
+            self._module_files.clear()
+
+    def resolve(self, path: str) -> Optional[Path]:
+        '''`Path(path).resolve()`, or None if `path` does not exist'''
+        path = str(path)
+        now = time.monotonic()
+
+        with self.lock:
+            try:
+                checked_at, resolved = self._resolved[path]
+            except KeyError:
+                pass
+            else:
+                if now - checked_at < REVALIDATE_INTERVAL:
+                    return resolved
+
+        try:
+            resolved = Path(path).resolve()
+        except (FileNotFoundError, RuntimeError):
+            resolved = None
+        else:
+            if not resolved.exists():
+                resolved = None
+
+        with self.lock:
+            self._resolved[path] = (now, resolved)
+
+        return resolved
+
+    def listing(self, directory: Path) -> Listing:
+        '''Names of the files and subdirectories in `directory`'''
+        directory = str(directory)
+        now = time.monotonic()
+
+        with self.lock:
+            cached = self._listings.get(directory)
+
+        if cached is not None:
+            checked_at, mtime, listing = cached
+            if now - checked_at < REVALIDATE_INTERVAL:
+                return listing
+            elif _mtime(directory) == mtime:
+                with self.lock:
+                    self._listings[directory] = (now, mtime, listing)
+                return listing
+
+        mtime = _mtime(directory)
+        listing = _list_directory(directory) if mtime is not None else _empty_listing
+
+        with self.lock:
+            self._listings[directory] = (now, mtime, listing)
+            if cached is not None:
+                # lookups may depend on the old listing
+                self._module_names.clear()
+                self._module_files.clear()
+
+        return listing
+
+    def is_package(self, directory: Path) -> bool:
+        return '__init__.py' in self.listing(directory).files
+
+    def _is_submodule(self, path: Path, parent: Path) -> bool:
+        for _parent in path.parents:
+            if _parent == parent:
+                return True
+            elif self.is_package(_parent):
+                continue
+            else:
+                return False
+        else:
+            return False
+
+    def module_name(self, sys_path: Sequence, path: str) -> Optional[str]:
+        '''Name of the module at `path`, using the last entry of `sys_path` that contains it'''
+        key = (tuple(map(str, sys_path)), str(path))
+        now = time.monotonic()
+
+        with self.lock:
+            try:
+                checked_at, module_name = self._module_names[key]
+            except KeyError:
+                pass
+            else:
+                if now - checked_at < REVALIDATE_INTERVAL:
+                    return module_name
+
+        module_name = None
+
+        try:
+            resolved_path = Path(path).resolve()
+        except FileNotFoundError:
+            resolved_path = Path(os.path.abspath(str(path)))
+
+        for _sp in reversed(key[0]):
+            sp = self.resolve(_sp)
+            if sp is None:
+                continue
+
+            if self._is_submodule(resolved_path, sp):
+                module_name = '.'.join(resolved_path.relative_to(sp).parts)
+                if module_name.endswith('.py'):
+                    module_name = module_name[:-3]
+                break
+
+        with self.lock:
+            self._module_names[key] = (now, module_name)
+
+        return module_name
+
+    def module_file(self, sys_path: Sequence, module_name: str) -> Optional[Path]:
+        '''Source file of `module_name`, using the first entry of `sys_path` that has it
+
+        Packages take precedence over modules of the same name, like in
+        Python. Returns None for modules without a Python source file, such as
+        builtin, extension and namespace modules.
+
+        '''
+        key = (tuple(map(str, sys_path)), module_name)
+        now = time.monotonic()
+
+        with self.lock:
+            try:
+                checked_at, module_file = self._module_files[key]
+            except KeyError:
+                pass
+            else:
+                if now - checked_at < REVALIDATE_INTERVAL:
+                    return module_file
+
+        module_file = None
+        parts = module_name.split('.')
+
+        for _sp in key[0]:
+            directory = self.resolve(_sp)
+            if directory is None:
+                continue
+
+            for part in parts[:-1]:
+                if part in self.listing(directory).directories and self.is_package(directory.joinpath(part)):
+                    directory = directory.joinpath(part)
+                else:
+                    directory = None
+                    break
+
+            if directory is None:
+                continue
+
+            listing = self.listing(directory)
+            if parts[-1] in listing.directories and self.is_package(directory.joinpath(parts[-1])):
+                module_file = directory.joinpath(parts[-1], '__init__.py')
+                break
+            elif parts[-1] + '.py' in listing.files:
+                module_file = directory.joinpath(parts[-1] + '.py')
+                break
+
+        with self.lock:
+            self._module_files[key] = (now, module_file)
+
+        return module_file
+
+    def package_contents(self, package_directory: Path) -> Tuple[List[Path], List[Path], List[Path]]:
+        '''Module files, subpackages, and other subdirectories of a package'''
+        listing = self.listing(package_directory)
+
+        modules = [package_directory.joinpath(name) for name in sorted(listing.files)
+                   if name.endswith('.py') and name != '__init__.py']
+
+        subdirs = [package_directory.joinpath(name) for name in sorted(listing.directories)
+                   if name != '__pycache__']
+
+        subpackages = [subdir for subdir in subdirs if self.is_package(subdir)]
+        others = [subdir for subdir in subdirs if subdir not in subpackages]
+
+        return modules, subpackages, others
+
+
+sys_path_index = SysPathIndex()
@@ -0,0 +1,123 @@
+"""
+Watches the source files of a project and invalidates their cached analysis
+
+`ProjectWatcher` follows the files of the root modules and scripts and of the
+nodes shown in the GUI, like `UserConfig` follows `call_map_rc.py`. When files
+change, `invalidate_paths` drops what is cached about them outside of the GUI,
+and `files_changed` is emitted so that the project and the map can re-resolve
+the nodes that refer to them. Given an executor, the invalidation runs there,
+after the jedi work queued before it, because jedi's parser cache is not
+thread-safe and the name index may be locked by a scan for a while.
+
+Entries in the call graph index do not need to be dropped; they are checked
+against file hashes when they are read, and entries for parents also against
+the files that the name index lists for the name, which `invalidate_paths`
+updates.
+
+"""
+
+import os
+import logging
+from concurrent.futures import Executor
+from typing import Iterable, List, Optional, Set
+
+from .qt_compatibility import QtCore
+from . import cache
+from .name_index import name_index
+from .sys_path_index import sys_path_index
+from .import_graph import import_graph
+from .syntactic import syntax_cache
+
+logger = logging.getLogger(__name__)
+
+DEBOUNCE_INTERVAL = 200  # msecs; editors often write a file in several steps
+MAX_WATCHED_FILES = 2000  # some platforms use a file descriptor per watched file
+
+
+def invalidate_paths(paths: Iterable[str]):
+    '''Drop cached text, parse trees, module nodes, searched modules and index entries of `paths`'''
+    from jedi.parser.cache import parser_cache
+    from .jedi_dump import module_node_cache
+    from .module_registry import module_registry
+    from .resolution_pool import resolution_pool
+
+    paths = list(paths)
+
+    for path in paths:
+        cache.invalidate_path(path)
+        parser_cache.pop(path, None)
+
+    name_index.update_paths(paths)
+    sys_path_index.invalidate(paths)
+    import_graph.invalidate(paths)
+    syntax_cache.invalidate(paths)
+    module_node_cache.invalidate_paths(paths)
+    module_registry.invalidate_paths(paths)
+    resolution_pool.invalidate()
+
+
+class ProjectWatcher(QtCore.QObject):
+    files_changed = QtCore.Signal(list)
+
+    def __init__(self, parent=None, executor: Optional[Executor] = None):
+        super().__init__(parent)
+
+        self.executor = executor
+
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._on_file_changed)
+
+        self.pending = set()  # type: Set[str]
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    def watched(self) -> Set[str]:
+        return set(self.watcher.files())
+
+    def watch(self, paths: Iterable[str]):
+        watched = self.watched()
+        new_paths = {path for path in paths
+                     if path and path not in watched and os.path.isfile(path)}
+
+        room = MAX_WATCHED_FILES - len(watched)
+        if len(new_paths) > room:
+            logger.info('Not watching {} files; at most {} files are watched.'.format(
+                len(new_paths) - max(room, 0), MAX_WATCHED_FILES))
+            new_paths = sorted(new_paths)[:max(room, 0)]
+
+        if new_paths:
+            self.watcher.addPaths(list(new_paths))
+
+    def _on_file_changed(self, path: str):
+        self.pending.add(path)
+
+        # Editors that save by replacing the file remove it from the watcher.
+        if os.path.isfile(path) and path not in self.watched():
+            self.watcher.addPath(path)
+
+        self.timer.start(DEBOUNCE_INTERVAL)
+
+    def flush(self):
+        '''Invalidate and report the files that changed since the last flush'''
+        self.timer.stop()
+
+        paths = sorted(self.pending)
+        self.pending.clear()
+
+        if paths:
+            logger.info('Files changed: {}'.format(', '.join(paths)))
+            if self.executor is None:
+                invalidate_paths(paths)
+                self.files_changed.emit(paths)
+            else:
+                future = self.executor.submit(invalidate_paths, paths)
+                future.add_done_callback(lambda ff: self._invalidated(ff, paths))
+
+    def _invalidated(self, future, paths: List[str]):
+        # Called on the thread of the executor; `files_changed` is delivered to
+        # receivers in the GUI thread through the event loop.
+        if future.exception() is not None:
+            logger.error('{}; while invalidating {}'.format(future.exception(), ', '.join(paths)))
+        self.files_changed.emit(paths)
@@ -0,0 +1,21 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+run_benchmarks = Path(__file__).resolve().parent.parent.joinpath('benchmarks', 'run_benchmarks.py')
+
+
+def test_benchmarks_emit_json():
+    output = subprocess.check_output(
+        [sys.executable, str(run_benchmarks), '--repeat', '1', '-k', 'read_text_cached'],
+        stderr=subprocess.DEVNULL)
+
+    report = json.loads(output.decode())
+
+    assert report['environment']['jedi']
+    assert [result['name'] for result in report['results']] == ['read_text_cached', 'read_text_cached warm']
+    for result in report['results']:
+        assert result['operations'] > 0
+        assert len(result['times']) == 1
+        assert result['peak_memory_bytes'] > 0
@@ -14,8 +14,8 @@ class FakePath:
     def __hash__(self):
         return hash(self.name)
 
-    def read_text(self):
-        return self.text
+    def read_bytes(self):
+        return self.text.encode('utf-8')
 
 
 def test_read_text_cached():
@@ -31,3 +31,109 @@ def test_read_text_cached():
         path = random.choice(paths)
         assert read_text_cached(path) == path.text
         assert len(call_map.cache._text_cache) == call_map.cache.TEXT_CACHE_SIZE
+
+
+def test_read_text_cached_invalidation(tmpdir):
+    import os
+
+    path = Path(str(tmpdir.join('mod.py')))
+    path.write_text('aa = 1\n')
+
+    assert read_text_cached(path) == 'aa = 1\n'
+
+    hits = call_map.cache.text_cache_stats['hits']
+    assert read_text_cached(path) == 'aa = 1\n'
+    assert call_map.cache.text_cache_stats['hits'] == hits + 1
+
+    path.write_text('bb = 22\n')
+    assert read_text_cached(path) == 'bb = 22\n'
+
+    # same size; only the modification time changed
+    path.write_text('cc = 33\n')
+    mtime = path.stat().st_mtime + 10
+    os.utime(str(path), (mtime, mtime))
+    assert read_text_cached(path) == 'cc = 33\n'
+
+
+def test_read_text_cached_bytes_limit():
+    import sys
+
+    call_map.cache.clear_text_cache()
+
+    paths = [FakePath(str(ii), str(ii) * 1000) for ii in range(5)]
+    old_limit = call_map.cache.TEXT_CACHE_BYTES
+    call_map.cache.TEXT_CACHE_BYTES = 3 * sys.getsizeof(paths[0].text)
+
+    try:
+        evictions = call_map.cache.text_cache_stats['evictions']
+        for path in paths:
+            assert read_text_cached(path) == path.text
+
+        assert len(call_map.cache._text_cache) == 3
+        assert list(call_map.cache._text_cache) == paths[2:]
+        assert call_map.cache.text_cache_stats['evictions'] == evictions + 2
+    finally:
+        call_map.cache.TEXT_CACHE_BYTES = old_limit
+
+
+def test_source_file(tmpdir):
+    path = Path(str(tmpdir.join('mod.py')))
+    text = 'def ff():\n    return "é"\n\nff()\n'
+    path.write_bytes(text.encode('utf-8'))
+
+    source = call_map.cache.source_file(path)
+
+    assert source.line(1) == 'def ff():'
+    assert source.line(2) == '    return "é"'
+    assert source.lines(3, 5) == ['', 'ff()']
+    assert source.line(5) is None
+    assert source.text() == text
+    assert call_map.cache.source_file(path) is source
+
+    path.write_bytes(b'gg()\n')
+    assert call_map.cache.source_file(path).line(1) == 'gg()'
+
+
+def test_source_encoding(tmpdir):
+    path = Path(str(tmpdir.join('latin.py')))
+    text = '# -*- coding: latin-1 -*-\nname = "é"\n'
+    path.write_bytes(text.encode('latin-1'))
+
+    # both readers decode the file as Python does, whatever the locale
+    assert call_map.cache.source_file(path).line(2) == 'name = "é"'
+    assert read_text_cached(path) == text
+
+    path.write_bytes(b'\xef\xbb\xbfname = 1\r\n')
+    assert call_map.cache.source_file(path).line(1) == 'name = 1'
+    assert read_text_cached(path) == 'name = 1\n'
+
+
+def test_empty_source_file(tmpdir):
+    path = Path(str(tmpdir.join('empty.py')))
+    path.write_text('')
+
+    source = call_map.cache.source_file(path)
+    assert source.line(1) is None
+    assert source.text() == ''
+
+
+def test_source_file_window_and_close(tmpdir, monkeypatch):
+    path = Path(str(tmpdir.join('mod.py')))
+    path.write_bytes(''.join('line{}\n'.format(ii) for ii in range(1, 11)).encode('utf-8'))
+
+    source = call_map.cache.source_file(path)
+    assert source.window(5, 2) == (3, 'line3\nline4\nline5\nline6\nline7')
+    assert source.window(1, 1) == (1, 'line1\nline2')
+
+    # invalidated maps are closed, and mapped again if still read
+    call_map.cache.invalidate_path(path)
+    assert source.data.closed
+    assert source.line(10) == 'line10'
+
+    # evicted maps are closed
+    monkeypatch.setattr(call_map.cache, 'SOURCE_STORE_SIZE', 1)
+    other = Path(str(tmpdir.join('other.py')))
+    other.write_bytes(b'other\n')
+    source = call_map.cache.source_file(path)
+    call_map.cache.source_file(other)
+    assert source.data.closed
@@ -0,0 +1,220 @@
+import toolz as tz
+
+from load_test_modules import root_node, project, test_modules_dir
+from call_map.core import CodeElement
+from call_map.call_graph_index import CallGraphIndex, children, parents
+from call_map.jedi_dump import JediCodeElementNode
+from call_map.config import user_config
+
+
+def make_code_element(name, path, line):
+    return CodeElement(name=name,
+                       type='function',
+                       module='mod',
+                       role='child',
+                       path=str(path),
+                       call_pos=(str(path), (line, 4), (line, 4 + len(name))),
+                       start_pos=(line, 4),
+                       end_pos=(line, 4 + len(name)))
+
+
+def test_store_and_lookup(tmpdir):
+    path = tmpdir.join('mod.py')
+    path.write('def ff():\n    gg()\n\ndef gg():\n    pass\n')
+
+    index = CallGraphIndex.for_project_directory(None, sys_path=[str(tmpdir)])
+
+    ff = make_code_element('ff', path, 1)
+    gg = make_code_element('gg', path, 4)
+
+    assert index.lookup(ff, children) is None
+
+    index.store(ff, children, [gg])
+    assert index.lookup(ff, children) == [gg]
+    assert index.lookup(ff, parents) is None
+
+    # a different sys_path does not share entries
+    assert CallGraphIndex(index.database, sys_path=[]).lookup(ff, children) is None
+
+
+def test_stale_entries_are_ignored(tmpdir):
+    path = tmpdir.join('mod.py')
+    path.write('def ff():\n    gg()\n\ndef gg():\n    pass\n')
+
+    index = CallGraphIndex.for_project_directory(None, sys_path=[str(tmpdir)])
+
+    ff = make_code_element('ff', path, 1)
+    gg = make_code_element('gg', path, 4)
+
+    index.store(ff, children, [gg])
+    path.write('def ff():\n    hh()\n\ndef hh():\n    pass\n')
+
+    assert index.lookup(ff, children) is None
+
+
+def test_persistence(tmpdir):
+    from pathlib import Path
+
+    path = tmpdir.join('mod.py')
+    path.write('def ff():\n    gg()\n\ndef gg():\n    pass\n')
+
+    ff = make_code_element('ff', path, 1)
+    gg = make_code_element('gg', path, 4)
+
+    index = CallGraphIndex.for_project_directory(Path(str(tmpdir)), sys_path=[])
+    index.store(ff, children, [gg])
+    index.close()
+
+    reopened = CallGraphIndex.for_project_directory(Path(str(tmpdir)), sys_path=[])
+    assert reopened.lookup(ff, children) == [gg]
+
+
+def test_indexed_children():
+    user_config.session_overrides['EXPERIMENTAL_MODE'] = False
+
+    JediCodeElementNode.call_graph_index = CallGraphIndex.for_project_directory(
+        None, project.settings['sys_path'])
+
+    try:
+        use_comprehension_node = tz.first(node for node in root_node.children
+                                          if node.code_element.name == 'use_comprehension')
+
+        resolved = list(use_comprehension_node.children)
+        indexed = list(use_comprehension_node.children)
+
+        assert [node.code_element for node in resolved] == [node.code_element for node in indexed]
+
+        # nodes restored from the index resolve their definitions when expanded
+        ff_node = tz.first(node for node in indexed if node.code_element.name == 'ff')
+        assert any(node.code_element.name == 'fn_with_comprehension' for node in ff_node.parents)
+    finally:
+        JediCodeElementNode.call_graph_index = None
+
+
+def test_searched_paths(tmpdir):
+    path = tmpdir.join('mod.py')
+    path.write('def ff():\n    gg()\n\ndef gg():\n    pass\n')
+    other = tmpdir.join('other.py')
+    other.write('from mod import gg\n')
+
+    index = CallGraphIndex.for_project_directory(None, sys_path=[str(tmpdir)])
+
+    ff = make_code_element('ff', path, 1)
+    gg = make_code_element('gg', path, 4)
+
+    index.store(gg, parents, [ff], [str(path), str(other)])
+    assert index.lookup(gg, parents, [str(path), str(other)]) == [ff]
+
+    # a searched file that was not called from before changes
+    other.write('from mod import gg\ngg()\n')
+    assert index.lookup(gg, parents, [str(path), str(other)]) is None
+
+    # a new file may call the definition too
+    index.store(gg, parents, [ff], [str(path)])
+    assert index.lookup(gg, parents, [str(path)]) == [ff]
+    assert index.lookup(gg, parents, [str(path), str(other)]) is None
+
+
+def test_parents_after_errors_are_not_indexed(monkeypatch):
+    from call_map import jedi_alt
+
+    user_config.session_overrides['EXPERIMENTAL_MODE'] = False
+
+    index = CallGraphIndex.for_project_directory(None, project.settings['sys_path'])
+    JediCodeElementNode.call_graph_index = index
+
+    iter_usages = jedi_alt.usages.iter_usages_with_additional_modules
+
+    def failing_usages(*args, **kwargs):
+        yield from iter_usages(*args, **kwargs)
+        raise RuntimeError('failed after the usages')
+
+    try:
+        use_comprehension_node = tz.first(node for node in root_node.children
+                                          if node.code_element.name == 'use_comprehension')
+        ff_node = tz.first(node for node in use_comprehension_node.children if node.code_element.name == 'ff')
+
+        monkeypatch.setattr(jedi_alt.usages, 'iter_usages_with_additional_modules', failing_usages)
+        found = [node.code_element for node in ff_node.parents]
+        assert [ce.name for ce in found] == ['fn_with_comprehension']
+        assert index.lookup(ff_node.code_element, parents, ff_node._searched_paths()) is None
+
+        monkeypatch.setattr(jedi_alt.usages, 'iter_usages_with_additional_modules', iter_usages)
+        assert [node.code_element for node in ff_node.parents] == found
+        assert index.lookup(ff_node.code_element, parents, ff_node._searched_paths()) == found
+    finally:
+        JediCodeElementNode.call_graph_index = None
+
+
+def test_unimportable_submodules(tmpdir):
+    from call_map.jedi_dump import get_module_node
+
+    package = tmpdir.mkdir('pkg')
+    package.join('__init__.py').write('')
+    package.join('good.py').write('def ff():\n    pass\n')
+    package.join('bad-name.py').write('def gg():\n    pass\n')
+
+    sys_path = [str(tmpdir)]
+    JediCodeElementNode.call_graph_index = CallGraphIndex.for_project_directory(None, sys_path)
+
+    try:
+        package_node, err = get_module_node(sys_path, 'pkg')
+        assert [node.code_element.name for node in package_node.children] == ['good']
+        # and once more from the index
+        assert [node.code_element.name for node in package_node.children] == ['good']
+    finally:
+        JediCodeElementNode.call_graph_index = None
+
+
+def test_new_submodules_are_children(tmpdir):
+    from call_map.jedi_dump import get_module_node
+    from call_map.sys_path_index import sys_path_index
+
+    package = tmpdir.mkdir('pkg')
+    package.join('__init__.py').write('')
+    package.join('aa.py').write('')
+
+    sys_path = [str(tmpdir)]
+    index = CallGraphIndex.for_project_directory(None, sys_path)
+    JediCodeElementNode.call_graph_index = index
+
+    try:
+        package_node, err = get_module_node(sys_path, 'pkg')
+        assert [node.code_element.name for node in package_node.children] == ['aa']
+
+        package.join('bb.py').write('')
+        # as reported by the file watcher, or found by the next session
+        sys_path_index.invalidate([str(package.join('bb.py'))])
+        assert index.lookup(package_node.code_element, children, package_node._searched_children_paths()) is None
+        assert [node.code_element.name for node in package_node.children] == ['aa', 'bb']
+    finally:
+        JediCodeElementNode.call_graph_index = None
+
+
+def test_unresolved_imports_are_not_indexed(tmpdir):
+    from call_map.jedi_dump import get_module_node
+
+    user_config.session_overrides['EXPERIMENTAL_MODE'] = False
+
+    tmpdir.join('helpers.py').write('def gg():\n    pass\n')
+    tmpdir.join('main.py').write('from helpers import ff\n\ndef caller():\n    ff()\n')
+
+    sys_path = [str(tmpdir)]
+    index = CallGraphIndex.for_project_directory(None, sys_path)
+    JediCodeElementNode.call_graph_index = index
+
+    try:
+        module_node, err = get_module_node(sys_path, 'main')
+        caller_node = tz.first(module_node.children)
+
+        # `ff` is only found at the import until helpers.py defines it
+        [ff_node] = caller_node.children
+        assert ff_node.code_element.path == str(tmpdir.join('main.py'))
+        assert index.lookup(caller_node.code_element, children) is None
+
+        tmpdir.join('helpers.py').write('def ff():\n    pass\n')
+        [ff_node] = caller_node.children
+        assert ff_node.code_element.path == str(tmpdir.join('helpers.py'))
+        assert index.lookup(caller_node.code_element, children) == [ff_node.code_element]
+    finally:
+        JediCodeElementNode.call_graph_index = None
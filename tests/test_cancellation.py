@@ -0,0 +1,141 @@
+import time
+import threading
+
+import pytest
+
+from call_map import cancellation
+from call_map.cancellation import PAUSED, Cancelled, DeadlineExceeded, check, iter_cancellable, resumable, scope
+
+
+def test_scope():
+    cancel_event = threading.Event()
+    check()
+
+    with scope(cancel_event):
+        check()
+        cancel_event.set()
+        with pytest.raises(Cancelled):
+            check()
+        assert cancellation.is_cancelled()
+
+        # other threads run other searches
+        errors = []
+        thread = threading.Thread(target=lambda: errors.append(cancellation.is_cancelled()))
+        thread.start()
+        thread.join()
+        assert errors == [False]
+
+    # later searches are not affected
+    check()
+    assert not cancellation.is_cancelled()
+
+    # deadlines only apply in steps
+    with scope(deadline=time.monotonic() - 1):
+        check()
+        assert not cancellation.is_cancelled()
+
+
+def test_iter_cancellable():
+    cancel_event = threading.Event()
+
+    def numbers():
+        for ii in range(10):
+            check()
+            yield ii
+
+    found = []
+    for ii in iter_cancellable(numbers(), cancel_event):
+        # the scope does not leak into the consumer
+        assert not cancellation.is_cancelled()
+        found.append(ii)
+        if ii == 3:
+            cancel_event.set()
+            assert not cancellation.is_cancelled()
+
+    assert found == [0, 1, 2, 3]
+
+
+def test_resumable():
+    attempts = []
+
+    def step():
+        attempts.append(cancellation.is_cancelled())
+        check()
+        return len(attempts)
+
+    def search():
+        for ii in range(2):
+            result = yield from resumable(step)
+            yield result
+
+    # a step after the deadline pauses the search, and runs once resumed
+    iterator = search()
+    with scope(deadline=time.monotonic() - 1):
+        assert next(iterator) is PAUSED
+    assert attempts == []
+    assert next(iterator) == 1
+    assert attempts == [False]
+
+    # steps within the deadline are not paused
+    with scope(deadline=time.monotonic() + 60):
+        assert next(iterator) == 2
+    assert list(iterator) == []
+
+    # other threads pause searches with an event
+    pause_event = threading.Event()
+    pause_event.set()
+    with scope(pause_event=pause_event):
+        assert next(search()) is PAUSED
+
+    # cancellation is not a pause
+    cancel_event = threading.Event()
+    cancel_event.set()
+    with scope(cancel_event, deadline=time.monotonic() - 1):
+        with pytest.raises(Cancelled) as info:
+            next(search())
+    assert not isinstance(info.value, DeadlineExceeded)
+
+
+def test_cancelled_jedi_search():
+    from load_test_modules import root_node
+    from call_map.config import user_config
+
+    user_config.session_overrides['EXPERIMENTAL_MODE'] = False
+
+    node = next(node for node in root_node.children if node.code_element.name == 'use_comprehension')
+
+    cancel_event = threading.Event()
+    cancel_event.set()
+    with scope(cancel_event):
+        cancelled = list(node.children)
+
+    # stops quietly, and does not stop the next search
+    assert cancelled == []
+    assert [child.code_element for child in node.children]
+
+
+def test_paused_jedi_search():
+    from load_test_modules import root_node
+    from call_map.config import user_config
+
+    user_config.session_overrides['EXPERIMENTAL_MODE'] = False
+
+    module_node = next(node for node in root_node.children if node.code_element.name == 'use_comprehension')
+    ff_node, fn_node = [next(node for node in module_node.children if node.code_element.name == name)
+                        for name in ['ff', 'fn_with_comprehension']]
+
+    for search in [lambda: fn_node.children, ff_node.iter_parents]:
+        expected = [node.code_element for node in search()]
+
+        # each step runs out of time, and is repeated when the search is resumed
+        iterator = iter(search())
+        found = []
+        while True:
+            with scope(deadline=time.monotonic() - 1):
+                item = next(iterator, None)
+            if item is None:
+                break
+            found.append(item)
+
+        assert PAUSED in found
+        assert [node.code_element for node in found if node is not PAUSED] == expected
@@ -0,0 +1,97 @@
+import pytest
+
+from call_map.config import UserConfig
+
+
+@pytest.fixture
+def rc_dir(tmpdir):
+    tmpdir.join('call_map_rc.py').write('EXC_INFO = True\n')
+    return tmpdir
+
+
+def counting_user_config(rc_dir):
+    config = UserConfig(rc_dir=str(rc_dir))
+    config.reads = 0
+    read_user_config = config.read_user_config
+
+    def _read_user_config():
+        config.reads += 1
+        return read_user_config()
+
+    config.read_user_config = _read_user_config
+    return config
+
+
+def test_config_is_cached(rc_dir):
+    config = counting_user_config(rc_dir)
+
+    assert config.get_config()['EXC_INFO'] is True
+    assert config.get_config()['MULTITHREADING'] is True
+    assert config.reads == 1
+
+    config.session_overrides['MULTITHREADING'] = False
+    assert config.get_config()['MULTITHREADING'] is False
+    assert config.reads == 1
+
+
+def test_reload(rc_dir):
+    config = counting_user_config(rc_dir)
+
+    snapshot = config.snapshot()
+    assert snapshot['EXC_INFO'] is True
+
+    rc_dir.join('call_map_rc.py').write('EXC_INFO = False\n')
+    assert config.get_config()['EXC_INFO'] is True  # file watcher signal not processed yet
+
+    config.clear_cache(())
+    assert config.get_config()['EXC_INFO'] is False
+    assert config.reads == 2
+
+    rc_dir.join('call_map_rc.py').write('PREFETCH_DEPTH = 3\n')
+    assert config.reload()['PREFETCH_DEPTH'] == 3
+    assert snapshot['EXC_INFO'] is True
+
+    with pytest.raises(TypeError):
+        snapshot['EXC_INFO'] = False
+
+
+def test_broken_config_file(rc_dir):
+    rc_dir.join('call_map_rc.py').write('EXC_INFO = \n')
+    config = counting_user_config(rc_dir)
+
+    assert config.get_config() == config.default_user_config
+    assert config.get_config() == config.default_user_config
+    assert config.reads == 1
+
+
+def test_config_file_created_later(tmpdir):
+    config = counting_user_config(tmpdir)
+    assert config.get_config()['EXC_INFO'] is False
+    assert str(tmpdir) in config.watcher.directories()
+
+    # changes to other files in the directory keep the cache
+    tmpdir.join('other.py').write('')
+    config.directory_changed(str(tmpdir))
+    assert config.get_config()['EXC_INFO'] is False
+    assert config.reads == 1
+
+    tmpdir.join('call_map_rc.py').write('EXC_INFO = True\n')
+    config.directory_changed(str(tmpdir))
+    assert config.get_config()['EXC_INFO'] is True
+    assert config.reads == 2
+    assert str(tmpdir.join('call_map_rc.py')) in config.watcher.files()
+
+
+def test_held_snapshot(rc_dir):
+    config = counting_user_config(rc_dir)
+
+    with config.held() as snapshot:
+        config.session_overrides['EXC_INFO'] = False
+        assert config.get_config() is snapshot
+        assert config.get_config()['EXC_INFO'] is True
+
+        with config.held(config.snapshot()) as nested:
+            assert nested is snapshot
+
+    assert config.get_config()['EXC_INFO'] is False
+    assert config.reads == 1
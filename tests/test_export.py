@@ -0,0 +1,106 @@
+import io
+import json
+import struct
+import subprocess
+import sys
+
+from load_test_modules import root_node, test_modules_dir
+from call_map import export
+from call_map.config import user_config
+
+
+def edges_by_name(lines):
+    nodes = {}
+    edges = set()
+    for line in lines:
+        record = json.loads(line)
+        if 'node' in record:
+            nodes[record['node']] = record
+        else:
+            source, target = record['edge']
+            edges.add((nodes[source]['name'], nodes[target]['name'], record['role']))
+    return nodes, edges
+
+
+def test_export_jsonl():
+    user_config.session_overrides['EXPERIMENTAL_MODE'] = False
+
+    stream = io.StringIO()
+    n_nodes, n_edges = export.export(root_node.children, export.JsonLinesWriter(stream),
+                                     depth=2, direction=export.both)
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == n_nodes + n_edges
+
+    nodes, edges = edges_by_name(lines)
+    assert ('use_comprehension', 'ff', 'definition') in edges
+    assert ('ff', 'fn_with_comprehension', 'parent') in edges
+
+
+def test_export_binary():
+    stream = io.BytesIO()
+    n_nodes, n_edges = export.export(root_node.children, export.BinaryWriter(stream),
+                                     depth=1, direction=export.children)
+
+    data = stream.getvalue()
+    assert data.startswith(export.BINARY_MAGIC)
+
+    offset = len(export.BINARY_MAGIC)
+    counts = {0: 0, 1: 0}
+    while offset < len(data):
+        tag = data[offset]
+        counts[tag] += 1
+        if tag == 0:
+            _, node_id, length = struct.unpack_from('<BII', data, offset)
+            offset += struct.calcsize('<BII') + length
+        else:
+            offset += struct.calcsize('<BIIBii')
+
+    assert counts == {0: n_nodes, 1: n_edges}
+
+
+def test_export_command_line(tmpdir):
+    output = tmpdir.join('graph.jsonl')
+    subprocess.check_call([sys.executable, '-m', 'call_map', 'export',
+                           '--no-interpreter-sys-path',
+                           '-p', str(test_modules_dir),
+                           '-m', 'simple_test_package',
+                           '--depth', '3',
+                           '-o', str(output)])
+
+    nodes, edges = edges_by_name(output.read().splitlines())
+    assert ('foo', 'bar', 'child') in edges
+
+
+def test_walk_queues_each_definition_once(monkeypatch):
+    from call_map.core import OrganizerNode
+
+    # every node calls every other node
+    nodes = [OrganizerNode('n{}'.format(ii)) for ii in range(20)]
+    for node in nodes:
+        node.children.extend(other for other in nodes if other is not node)
+
+    expanded = []
+    original = export.connected_nodes
+
+    def counting(node, direction):
+        expanded.append(node.code_element.name)
+        return original(node, direction)
+
+    monkeypatch.setattr(export, 'connected_nodes', counting)
+    edges = list(export.walk(nodes[:1], depth=3, direction=export.children))
+
+    assert sorted(expanded) == sorted(node.code_element.name for node in nodes)
+    assert len(edges) == 20 * 19
+
+
+def test_export_exit_status(tmpdir):
+    output = tmpdir.join('graph.jsonl')
+    arguments = ['--no-interpreter-sys-path', '-p', str(test_modules_dir), '-o', str(output)]
+
+    # a root that cannot be loaded does not fail the export of the others
+    assert export.main(arguments + ['-m', 'simple_test_package', 'no_such_module']) == 0
+    nodes, edges = edges_by_name(output.read().splitlines())
+    assert 'simple_test_package' in {node['name'] for node in nodes.values()}
+
+    assert export.main(arguments + ['-m', 'no_such_module']) == 1
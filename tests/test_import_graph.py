@@ -0,0 +1,67 @@
+from pathlib import Path
+
+from call_map.import_graph import ImportGraph, scan_imports
+
+
+def test_scan_imports():
+    source = (b'import os.path\n'
+              b'from . import sibling\n'
+              b'from ..other import name\n'
+              b'from aa import *\n'
+              b'def ff():\n'
+              b'    import json\n')
+
+    assert scan_imports(source, 'pkg.sub.mod', False) == {
+        'os', 'os.path', 'pkg', 'pkg.sub', 'pkg.sub.sibling', 'pkg.other', 'pkg.other.name', 'aa', 'json'}
+
+    # relative to the package itself in __init__.py
+    assert scan_imports(b'from .mod import ff\n', 'pkg', True) == {'pkg', 'pkg.mod', 'pkg.mod.ff'}
+
+    # importing a submodule imports its parent packages
+    assert scan_imports(b'import aa.bb.cc\n', None, False) == {'aa', 'aa.bb', 'aa.bb.cc'}
+
+
+def test_files_importing(tmpdir):
+    root = Path(str(tmpdir)).resolve()
+    package = root.joinpath('pkg')
+    package.mkdir()
+
+    files = {
+        '__init__.py': 'from .target import target\n',
+        'target.py': 'def target():\n    pass\n',
+        'direct.py': 'from pkg.target import target\ntarget()\n',
+        'reexported.py': 'from pkg import target\ntarget()\n',
+        'transitive.py': 'import pkg.direct\n',
+        'unrelated.py': 'def target():\n    pass\ntarget()\n',
+        'broken.py': 'def (:\n',
+    }
+    for name, source in files.items():
+        package.joinpath(name).write_text(source)
+
+    graph = ImportGraph()
+    paths = {name: str(package.joinpath(name)) for name in files}
+
+    found = graph.files_importing([paths['target.py']], paths.values(), [str(root)], [str(package)])
+
+    assert found == {paths[name] for name in
+                     ['__init__.py', 'target.py', 'direct.py', 'reexported.py', 'transitive.py', 'broken.py']}
+
+    # updated when a file changes
+    package.joinpath('unrelated.py').write_text('import pkg.transitive\n' * 2)
+    found = graph.files_importing([paths['target.py']], [paths['unrelated.py']], [str(root)], [str(package)])
+    assert found == {paths['unrelated.py']}
+
+
+def test_parent_package_imports(tmpdir):
+    root = Path(str(tmpdir)).resolve()
+    package = root.joinpath('pkg')
+    package.mkdir()
+    package.joinpath('__init__.py').write_text('def helper():\n    pass\n')
+    package.joinpath('sub.py').write_text('')
+    uses = root.joinpath('uses.py')
+    uses.write_text('import pkg.sub\n\npkg.helper()\n')
+
+    graph = ImportGraph()
+    init = str(package.joinpath('__init__.py'))
+
+    assert graph.files_importing([init], [str(uses)], [str(root)], [str(root)]) == {str(uses)}
@@ -30,3 +30,87 @@ def test_get_called_functions():
 
     assert len(called_by_ff) == 2
     assert {name.value for role, name, ast_node, start_pos, end_pos in called_by_ff} == {'thunk', 'get_called_functions'}
+
+
+def test_scope_table():
+    test_script = textwrap.dedent("""\
+    class Base(object):
+        def method(self, value=ff()) -> Base:
+            key = lambda item: ff(item)
+            return [ff(x) for x in value]
+
+    @ff
+    def gg():
+        ff()
+    """)
+
+    script = jedi.api.Script(test_script, 1, 0, 'scope_table.py')
+    module_node = script._get_module_node()
+    table = jat.ScopeTable(module_node)
+
+    def scope_name(name):
+        scope = table.scope_of(name)
+        return None if scope is module_node else scope.name.value
+
+    assert [(name.start_pos, scope_name(name)) for name in module_node.used_names['ff']] == [
+        ((2, 27), 'method'),  # default values are evaluated in the scope of the function by jedi
+        ((3, 27), '<lambda>'),
+        ((4, 16), 'method'),
+        ((6, 1), None),
+        ((8, 4), 'gg'),
+    ]
+
+    # names of definitions, and direct children of them, belong to the enclosing scope
+    assert [scope_name(name) for name in module_node.used_names['Base']] == [None, 'Base']
+    assert [scope_name(name) for name in module_node.used_names['object']] == [None]
+    assert [scope_name(name) for name in module_node.used_names['method']] == ['Base']
+
+
+def test_call_site_table():
+    test_script = textwrap.dedent("""\
+    import os
+
+    @decorate(1)
+    class Aa:
+        def method(self, key=lambda item: len(item)):
+            return [os.path.join(x) for x in sorted(self.items, key=key)]
+
+    def ff():
+        def gg():
+            return ff()
+        return gg()
+
+    ff()
+    """)
+
+    module_node = jedi.api.Script(test_script, 1, 0, 'call_site_table.py')._get_module_node()
+    table = jat.CallSiteTable(module_node, test_script)
+
+    scopes = [module_node] + [node for node in jat.walk_nodes(module_node)
+                              if isinstance(node, jat.jedi_python_tree.ClassOrFunc)]
+    assert len(scopes) == 6
+
+    for scope in scopes:
+        assert (list(table.calls(scope))
+                == [(role, name.value, start_pos, end_pos)
+                    for role, name, ast_node, start_pos, end_pos in jat.get_called_functions(scope)])
+
+    assert list(table.calls(module_node)) == [
+        ('child', 'decorate', (3, 1), (3, 9)),
+        ('definition', 'Aa', (4, 6), (4, 8)),
+        ('definition', 'ff', (8, 4), (8, 6)),
+        ('child', 'ff', (13, 0), (13, 2)),
+    ]
+    assert len(table.roles) == len(table.start_lines) == 12
+
+
+def test_name_for_position():
+    from jedi.parser.python.tree import PythonMixin
+    from call_map.jedi_alt import leaf_lookup
+
+    test_script = "import os\nos.path.join(aa[0](bb), cc)\n\ndef ff(x):\n    return x.y\n"
+    module_node = jedi.api.Script(test_script, 1, 0, 'names.py')._get_module_node()
+
+    positions = [(line, column) for line in range(7) for column in range(30)]
+    assert ([leaf_lookup.name_for_position(module_node, position) for position in positions]
+            == [PythonMixin.name_for_position(module_node, position) for position in positions])
@@ -40,3 +40,146 @@ def test_comprehension():
 
     assert any(node.code_element.name == 'fn_with_comprehension' for node in ff_node.parents)
     assert any(node.code_element.name == 'ff' for node in fn_with_comprehension_node.children)
+
+
+def test_many_call_sites(tmpdir):
+    from call_map.jedi_dump import dump_script_nodes
+    from pathlib import Path
+
+    user_config.session_overrides['EXPERIMENTAL_MODE'] = False
+
+    n_functions = 300
+    source = ''.join('def f{}(x):\n    return x\n\n'.format(ii) for ii in range(n_functions))
+    source += 'def hub(x):\n' + ''.join('    x = f{}(x)\n'.format(ii) for ii in range(n_functions))
+
+    script = Path(str(tmpdir)).joinpath('many_calls.py')
+    script.write_text(source)
+
+    nodes, failures = dump_script_nodes([test_modules_dir], [script])
+    hub = tz.first(node for node in nodes[script].children if node.code_element.name == 'hub')
+
+    called = [node.code_element for node in hub.children if node.code_element.role == 'child']
+
+    # every call site resolves with the one script shared by the scope
+    assert [ce.name for ce in called] == ['f{}'.format(ii) for ii in range(n_functions)]
+    assert called[-1].call_pos[1] == (n_functions * 3 + 1 + n_functions, 8)
+
+
+def test_streamed_parents():
+    from call_map.jedi_dump import usage_order
+
+    user_config.session_overrides['EXPERIMENTAL_MODE'] = False
+
+    ff_node = tz.first(node for node in use_comprehension_node.children
+                       if node.code_element.name == 'ff')
+
+    streamed = list(ff_node.iter_parents())
+
+    assert streamed
+    assert ([node.code_element for node in sorted(streamed, key=usage_order)]
+            == [node.code_element for node in ff_node.parents])
+
+
+def test_module_node_cache(tmpdir):
+    import os
+    from pathlib import Path
+    from call_map.jedi_dump import get_module_node
+    from call_map.sys_path_index import sys_path_index
+
+    package = Path(str(tmpdir)).joinpath('cached_package')
+    package.mkdir()
+    package.joinpath('__init__.py').write_text('def ff():\n    pass\n')
+    sys_path = [str(tmpdir)]
+
+    node, err = get_module_node(sys_path, 'cached_package')
+    assert err is None
+    assert get_module_node(sys_path, 'cached_package')[0] is node
+
+    missing, err = get_module_node(sys_path, 'cached_package.missing')
+    assert missing is None and err is not None
+
+    # a changed file is resolved again
+    init = package.joinpath('__init__.py')
+    init.write_text('def gg():\n    pass\n')
+    stat = os.stat(str(init))
+    os.utime(str(init), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    sys_path_index.invalidate([str(init)])
+
+    changed, err = get_module_node(sys_path, 'cached_package')
+    assert changed is not node
+    assert [child.code_element.name for child in changed.children] == ['gg']
+
+
+def test_parents_in_shared_scopes(tmpdir):
+    from call_map.jedi_dump import dump_script_nodes
+    from pathlib import Path
+
+    user_config.session_overrides['EXPERIMENTAL_MODE'] = False
+
+    source = ('def ff(x):\n    return x\n\n'
+              'def gg(x):\n' + '    x = ff(x)\n' * 5 +
+              '    return [ff(y) for y in lambda: ff(x)]\n\n'
+              'class Hh:\n    value = ff(1)\n\n'
+              'ff(2)\n')
+
+    script = Path(str(tmpdir)).joinpath('shared_scopes.py')
+    script.write_text(source)
+
+    nodes, failures = dump_script_nodes([test_modules_dir], [script])
+    ff_node = tz.first(node for node in nodes[script].children if node.code_element.name == 'ff')
+
+    parents = [node for node in ff_node.parents]
+
+    assert [(node.code_element.name, node.code_element.call_pos[1]) for node in parents] == (
+        [('gg', (5 + ii, 8)) for ii in range(5)]
+        + [('gg', (10, 12)), ('<lambda>', (10, 35)), ('Hh', (13, 12)), ('shared_scopes', (15, 0))])
+
+    # parents in one scope share its definition
+    assert len({id(node.definition) for node in parents[:6]}) == 1
+
+
+def test_call_site_table_cache():
+    import jedi
+    from call_map.jedi_ast_tools import CallSiteTableCache
+
+    source = 'def ff():\n    return gg()\n'
+    cache = CallSiteTableCache(10)
+
+    module_node = jedi.api.Script(source, 1, 0, 'aa.py')._get_module_node()
+    table = cache.get('aa.py', module_node)
+    assert cache.get('aa.py', module_node) is table
+
+    # another parse tree of the same source shares the table
+    other_node = jedi.parser.python.parse(source)
+    assert other_node is not module_node
+    assert cache.get('bb.py', other_node) is table
+
+    changed = cache.get('aa.py', jedi.parser.python.parse(source + 'ff()\n'))
+    assert changed is not table
+    assert [name for role, name, start_pos, end_pos in changed.calls(module_node)] == ['ff', 'ff']
+
+    # sources parsed without jedi's caches share tables too
+    assert cache.for_source(source) is table
+
+
+def test_explicit_modules_are_filtered_by_parse_tree(tmpdir, monkeypatch):
+    import jedi
+    from jedi.parser.python import parse
+    from jedi.evaluate.representation import ModuleContext
+    from call_map.jedi_alt import api_usages
+    from call_map.name_index import name_index
+
+    tmpdir.join('has.py').write('def target():\n    pass\n')
+    tmpdir.join('hasnt.py').write('def other():\n    pass\n')
+    evaluator = jedi.Script('', path=str(tmpdir.join('main.py')))._evaluator
+    paths = [str(tmpdir.join(name)) for name in ('has.py', 'hasnt.py')]
+    modules = [ModuleContext(evaluator, parse(path=path), path=path) for path in paths]
+
+    def fail(*args):
+        raise AssertionError('parsed modules must not be looked up in the index')
+
+    monkeypatch.setattr(name_index, 'may_contain', fail)
+    monkeypatch.setattr(jedi.settings, 'dynamic_params_for_other_modules', False)
+
+    found = list(api_usages.get_modules_containing_name(evaluator, modules, 'target'))
+    assert found == modules[:1]
@@ -0,0 +1,64 @@
+from call_map.module_registry import ModuleRegistry
+
+
+class FakeModuleContext:
+    def __init__(self, path):
+        self.path = path
+
+    def py__file__(self):
+        return self.path
+
+
+def test_roots_are_kept(tmpdir):
+    root_path = tmpdir.join('root.py')
+    root_path.write('x = 1\n')
+
+    registry = ModuleRegistry(max_visited=2)
+    root = FakeModuleContext(str(root_path))
+    registry.set_roots([root])
+
+    visited = [FakeModuleContext('/visited/m{}.py'.format(ii)) for ii in range(4)]
+    for module_context in visited:
+        registry.add(module_context)
+
+    assert registry.modules() == (root, visited[2], visited[3])
+    assert registry.stats['evictions'] == 2
+    assert registry.memory_usage()['root_source_bytes'] == len('x = 1\n')
+
+    # the same module from another evaluator is not searched twice, but with the newer context
+    reloaded = FakeModuleContext(str(root_path))
+    registry.add(reloaded)
+    assert registry.modules() == (reloaded, visited[2], visited[3])
+
+
+def test_least_recently_used_is_evicted():
+    registry = ModuleRegistry(max_visited=2)
+    aa, bb, cc = (FakeModuleContext('/{}.py'.format(name)) for name in 'abc')
+
+    registry.add(aa)
+    registry.add(bb)
+    registry.add(aa)
+    registry.add(cc)
+
+    assert set(registry.modules()) == {aa, cc}
+    assert len(registry) == 2
+
+    registry.set_roots([])
+    assert registry.modules() == ()
+
+
+def test_changed_modules_are_replaced():
+    registry = ModuleRegistry(max_visited=3)
+    aa, bb, cc = (FakeModuleContext('/{}.py'.format(name)) for name in 'abc')
+    for module_context in [aa, bb, cc]:
+        registry.add(module_context)
+
+    # a module visited again after it changed is searched in its new version
+    reloaded = FakeModuleContext('/a.py')
+    registry.add(reloaded)
+    assert registry.modules() == (bb, cc, reloaded)
+
+    # changed modules are not searched until they are visited again
+    registry.invalidate_paths(['/b.py', '/unknown.py'])
+    assert registry.modules() == (cc, reloaded)
+    assert registry.paths() == ['/c.py', '/a.py']
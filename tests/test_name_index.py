@@ -0,0 +1,87 @@
+import os
+
+from call_map.name_index import NameIndex, scan_names
+
+
+def test_scan_names():
+    occurrences = scan_names(b'def ff(aa):\n    return gg(aa).ff\n')
+
+    assert occurrences['ff'] == [(1, 4), (2, 18)]
+    assert occurrences['aa'] == [(1, 7), (2, 14)]
+    assert 'def' not in occurrences
+    assert 'return' not in occurrences
+
+
+def test_files_containing(tmpdir):
+    tmpdir.join('aa.py').write('def get():\n    pass\n')
+    tmpdir.join('bb.py').write('from aa import get\nget()\n')
+    tmpdir.join('cc.py').write('def run():\n    pass\n')
+    tmpdir.join('notes.txt').write('get\n')
+
+    index = NameIndex()
+    directory = str(tmpdir)
+
+    assert index.files_containing('get', [directory]) == {os.path.join(directory, 'aa.py'),
+                                                          os.path.join(directory, 'bb.py')}
+    assert index.occurrences('get', os.path.join(directory, 'bb.py')) == [(1, 15), (2, 0)]
+    assert not index.may_contain(os.path.join(directory, 'cc.py'), 'get')
+
+
+def test_incremental_update(tmpdir):
+    index = NameIndex()
+    directory = str(tmpdir)
+    cc = tmpdir.join('cc.py')
+    cc.write('def run():\n    pass\n')
+
+    assert index.files_containing('get', [directory]) == set()
+
+    cc.write('def run():\n    get()\n')
+    # make sure the modification time changes even on coarse filesystems
+    mtime = os.stat(str(cc)).st_mtime + 10
+    os.utime(str(cc), (mtime, mtime))
+    tmpdir.join('dd.py').write('get\n')
+
+    assert index.files_containing('get', [directory]) == {str(cc), os.path.join(directory, 'dd.py')}
+
+    os.remove(str(cc))
+    assert index.files_containing('get', [directory]) == {os.path.join(directory, 'dd.py')}
+
+
+def test_persistent_index(tmpdir):
+    source_dir = tmpdir.mkdir('src')
+    source_dir.join('aa.py').write('def get():\n    pass\n')
+    source_dir.join('bb.py').write('run()\n')
+    directory = str(source_dir)
+    database = str(tmpdir.join('name_index.sqlite3'))
+
+    index = NameIndex()
+    index.open(database)
+    assert index.files_containing('get', [directory]) == {os.path.join(directory, 'aa.py')}
+    index.close()
+
+    # a new session only reads the files that changed since
+    bb = source_dir.join('bb.py')
+    bb.write('get()\n')
+    mtime = os.stat(str(bb)).st_mtime + 10
+    os.utime(str(bb), (mtime, mtime))
+
+    reopened = NameIndex()
+    reopened.open(database)
+    assert reopened.occurrences('get', os.path.join(directory, 'aa.py')) == [(1, 4)]
+    assert reopened.files_containing('get', [directory]) == {os.path.join(directory, 'aa.py'),
+                                                             os.path.join(directory, 'bb.py')}
+    reopened.close()
+
+
+def test_revalidate_interval(tmpdir):
+    index = NameIndex(revalidate_interval=60)
+    directory = str(tmpdir)
+
+    assert index.files_containing('get', [directory]) == set()
+
+    tmpdir.join('aa.py').write('get()\n')
+    # not checked again yet
+    assert index.files_containing('get', [directory]) == set()
+
+    index.update_paths([os.path.join(directory, 'aa.py')])
+    assert index.files_containing('get', [directory]) == {os.path.join(directory, 'aa.py')}
@@ -35,6 +35,8 @@ def testing_ui(testing_project_directory):
         file_names=[],
         include_runtime_sys_path=True,
         add_to_sys_path=[test_modules_dir])
+    # resolve the root nodes before returning
+    user_config.session_overrides['MULTITHREADING'] = False
     ui_toplevel = make_app(user_scope_settings,
                            project_directory=testing_project_directory,
                            enable_ipython_support=True,
@@ -0,0 +1,35 @@
+import toolz as tz
+import threading
+
+from load_test_modules import root_node
+from call_map.resolution_pool import resolution_pool, children, parents
+from call_map.config import user_config
+
+
+def test_resolve():
+    user_config.session_overrides['EXPERIMENTAL_MODE'] = False
+    user_config.session_overrides['PROCESS_POOL_WORKERS'] = 2
+
+    try:
+        use_comprehension_node = tz.first(node for node in root_node.children
+                                          if node.code_element.name == 'use_comprehension')
+        ff_node = tz.first(node for node in use_comprehension_node.children
+                           if node.code_element.name == 'ff')
+
+        assert resolution_pool.accepts(ff_node)
+
+        # both directions are resolved concurrently
+        resolved = resolution_pool.resolve(ff_node, (children, parents), threading.Event())
+
+        assert ([node.code_element for node in resolved[children]]
+                == [node.code_element for node in ff_node.children])
+        assert ([node.code_element for node in resolved[parents]]
+                == [node.code_element for node in ff_node.parents])
+        assert any(node.code_element.name == 'fn_with_comprehension' for node in resolved[parents])
+
+        cancel_event = threading.Event()
+        cancel_event.set()
+        assert resolution_pool.resolve(ff_node, (children, parents), cancel_event) == {children: [], parents: []}
+    finally:
+        user_config.session_overrides.pop('PROCESS_POOL_WORKERS')
+        resolution_pool.shutdown()
@@ -0,0 +1,164 @@
+from pathlib import Path
+
+import toolz as tz
+
+from call_map.core import CodeElement
+from call_map.syntactic import SyntaxCache, callees, callers, syntax_cache
+
+
+def make_package(tmpdir) -> Path:
+    root = Path(str(tmpdir)).resolve()
+    package = root.joinpath('pkg')
+    package.mkdir()
+
+    files = {
+        '__init__.py': 'from .core import helper\n',
+        'core.py': ('def helper(x):\n'
+                    '    return x\n'
+                    '\n'
+                    'class Thing:\n'
+                    '    def method(self):\n'
+                    '        return self.other() + helper(1)\n'
+                    '\n'
+                    '    def other(self):\n'
+                    '        def inner():\n'
+                    '            return 1\n'
+                    '        return inner()\n'),
+        'use.py': ('from . import core\n'
+                   'import pkg\n'
+                   '\n'
+                   'def main():\n'
+                   '    core.helper(1)\n'
+                   '    pkg.helper(2)\n'
+                   '    core.Thing().method()\n'
+                   '    unknown()\n'
+                   '\n'
+                   'main()\n'),
+    }
+    for name, source in files.items():
+        package.joinpath(name).write_text(source)
+
+    return root
+
+
+def definition(path: Path, name: str, type_: str, start_pos) -> CodeElement:
+    return CodeElement(name=name, type=type_, module=path.stem, role='definition', path=str(path),
+                       call_pos=(None, (None, None), (None, None)), start_pos=start_pos,
+                       end_pos=(start_pos[0], start_pos[1] + len(name)))
+
+
+def test_callees(tmpdir):
+    root = make_package(tmpdir)
+    use = root.joinpath('pkg', 'use.py')
+    core = str(root.joinpath('pkg', 'core.py'))
+
+    found = callees(definition(use, 'main', 'function', (4, 4)), [str(root)], [])
+
+    assert [(ce.name, ce.role, ce.path, ce.start_pos, ce.call_pos[1]) for ce in found] == [
+        ('helper', 'child', core, (1, 4), (5, 9)),
+        ('helper', 'child', core, (1, 4), (6, 8)),  # re-exported by the package
+        ('Thing', 'child', core, (4, 6), (7, 9)),
+        # `method` is unique in the searched directories
+    ]
+
+    found = callees(definition(use, 'main', 'function', (4, 4)), [str(root)], [str(root.joinpath('pkg'))])
+    assert found[-1].name == 'method' and found[-1].call_pos[1] == (7, 17)
+
+    # methods of the class, and nested definitions
+    method = callees(definition(Path(core), 'method', 'function', (5, 8)), [str(root)], [])
+    assert [(ce.name, ce.role, ce.start_pos) for ce in method] == [('other', 'child', (8, 8)),
+                                                                   ('helper', 'child', (1, 4))]
+
+    other = callees(definition(Path(core), 'other', 'function', (8, 8)), [str(root)], [])
+    assert [(ce.name, ce.role) for ce in other] == [('inner', 'definition'), ('inner', 'child')]
+
+
+def test_callers(tmpdir):
+    root = make_package(tmpdir)
+    core = root.joinpath('pkg', 'core.py')
+    use = str(root.joinpath('pkg', 'use.py'))
+
+    found = callers(definition(core, 'helper', 'function', (1, 4)), [str(root)], [])
+
+    assert [(ce.name, ce.type, ce.role, ce.call_pos[0], ce.call_pos[1]) for ce in found] == [
+        ('method', 'function', 'parent', str(core), (6, 30)),
+        ('main', 'function', 'parent', use, (5, 9)),
+        ('main', 'function', 'parent', use, (6, 8)),
+    ]
+
+    found = callers(definition(root.joinpath('pkg', 'use.py'), 'main', 'function', (4, 4)), [str(root)], [])
+    assert [(ce.name, ce.type, ce.call_pos[1]) for ce in found] == [('use', 'module', (10, 0))]
+
+
+def test_syntax_cache(tmpdir):
+    root = make_package(tmpdir)
+    path = root.joinpath('pkg', 'use.py')
+    cache = SyntaxCache()
+
+    assert 'main' in cache.get(str(path)).calls_by_name
+
+    # jedi's parser recovers from syntax errors
+    path.write_text('def (:\n    main()\n')
+    assert 'main' in cache.get(str(path)).calls_by_name
+
+    path.write_bytes(b'# -*- coding: no-such-codec -*-\n')
+    assert cache.get(str(path)) is None
+
+    path.write_text('def renamed():\n    pass\n')
+    assert 'main' not in cache.get(str(path)).calls_by_name
+
+    # unchanged content is not parsed again
+    syntax = cache.get(str(path))
+    path.write_text('def renamed():\n    pass\n')
+    cache.invalidate([str(path)])
+    assert cache.get(str(path)) is syntax
+
+
+def test_positions_match_jedi(tmpdir):
+    from call_map.jedi_dump import dump_script_nodes
+
+    root = Path(str(tmpdir)).resolve()
+    script = root.joinpath('mixed.py')
+    script.write_text('def décor(ff):\n'
+                      '    return ff\n'
+                      '\n'
+                      'class Thing:\n'
+                      '    @décor\n'
+                      '    def method(self):\n'
+                      '        return (self\n'
+                      '                .other())\n'
+                      '\n'
+                      '    def other(self):\n'
+                      '        ee = "é"; return décor(lambda: décor(1)).real\n'
+                      '\n'
+                      'def main():\n'
+                      '    Thing().method(); [décor(x) for x in Thing.other(Thing())]\n',
+                      encoding='utf-8')
+
+    nodes, failures = dump_script_nodes([str(root)], [script])
+    module = nodes[script]
+
+    def compare(node):
+        code_element = node.code_element
+        jedi_calls = {(ce.role, ce.call_pos): (ce.name, ce.start_pos)
+                      for ce in (child.code_element for child in node.children)}
+        found = callees(code_element, [str(root)], [])
+
+        # the provisional items are a subset of jedi's, at the same positions and with the same targets
+        assert {(ce.role, ce.call_pos): (ce.name, ce.start_pos) for ce in found}.items() <= jedi_calls.items()
+
+        for child in node.children:
+            if child.code_element.role == 'definition' and child.code_element.name != '<lambda>':
+                compare(child)
+
+        return len(found)
+
+    assert compare(module) == 3
+
+    thing = tz.first(child for child in module.children if child.code_element.name == 'Thing')
+    assert compare(thing) == 3
+
+    found = callers(thing.code_element, [str(root)], [])
+    assert [ce.call_pos[1] for ce in found] == [(14, 4), (14, 53)]
+    assert ({(ce.name, ce.call_pos) for ce in found}
+            <= {(node.code_element.name, node.code_element.call_pos) for node in thing.parents})
@@ -0,0 +1,75 @@
+from pathlib import Path
+
+from call_map.sys_path_index import SysPathIndex
+
+
+def make_tree(tmpdir) -> Path:
+    root = Path(str(tmpdir)).resolve()
+    package = root.joinpath('pkg')
+    package.joinpath('sub').mkdir(parents=True)
+    package.joinpath('data').mkdir()
+    package.joinpath('__init__.py').write_text('')
+    package.joinpath('mod.py').write_text('')
+    package.joinpath('sub', '__init__.py').write_text('')
+    package.joinpath('sub', 'leaf.py').write_text('')
+    root.joinpath('single.py').write_text('')
+    return root
+
+
+def test_module_name(tmpdir):
+    root = make_tree(tmpdir)
+    sys_path = [str(root)]
+    index = SysPathIndex()
+
+    assert index.module_name(sys_path, str(root.joinpath('pkg', 'sub', 'leaf.py'))) == 'pkg.sub.leaf'
+    assert index.module_name(sys_path, str(root.joinpath('pkg', 'sub'))) == 'pkg.sub'
+    assert index.module_name(sys_path, str(root.joinpath('single.py'))) == 'single'
+    assert index.module_name(sys_path, str(root.joinpath('pkg', 'data', 'x.py'))) is None
+    assert index.module_name([str(root.joinpath('missing'))], str(root.joinpath('single.py'))) is None
+
+    # the last entry of sys_path that contains the file wins
+    assert index.module_name(sys_path + [str(root.joinpath('pkg'))],
+                             str(root.joinpath('pkg', 'mod.py'))) == 'mod'
+
+
+def test_module_file(tmpdir):
+    root = make_tree(tmpdir)
+    sys_path = [str(root.joinpath('missing')), str(root)]
+    index = SysPathIndex()
+
+    assert index.module_file(sys_path, 'pkg') == root.joinpath('pkg', '__init__.py')
+    assert index.module_file(sys_path, 'pkg.sub.leaf') == root.joinpath('pkg', 'sub', 'leaf.py')
+    assert index.module_file(sys_path, 'single') == root.joinpath('single.py')
+    assert index.module_file(sys_path, 'pkg.data') is None
+    assert index.module_file(sys_path, 'pkg.nothing') is None
+
+    # packages take precedence over modules
+    root.joinpath('pkg', 'sub.py').write_text('')
+    index.invalidate([str(root.joinpath('pkg', 'sub.py'))])
+    assert index.module_file(sys_path, 'pkg.sub') == root.joinpath('pkg', 'sub', '__init__.py')
+
+
+def test_package_contents(tmpdir):
+    root = make_tree(tmpdir)
+    index = SysPathIndex()
+
+    modules, subpackages, others = index.package_contents(root.joinpath('pkg'))
+
+    assert modules == [root.joinpath('pkg', 'mod.py')]
+    assert subpackages == [root.joinpath('pkg', 'sub')]
+    assert others == [root.joinpath('pkg', 'data')]
+
+
+def test_invalidate(tmpdir):
+    root = make_tree(tmpdir)
+    sys_path = [str(root)]
+    index = SysPathIndex()
+
+    new_module = root.joinpath('pkg', 'new.py')
+    assert index.module_file(sys_path, 'pkg.new') is None
+
+    new_module.write_text('')
+    index.invalidate([str(new_module)])
+
+    assert index.module_file(sys_path, 'pkg.new') == new_module
+    assert new_module in index.package_contents(root.joinpath('pkg'))[0]
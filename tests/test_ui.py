@@ -1,6 +1,7 @@
 from typing import Optional
 from pathlib import Path
 from concurrent.futures import wait
+import toolz as tz
 
 from call_map.gui import make_app
 from call_map.core import UserScopeSettings, ScopeSettings, OrganizerNode, CodeElement
@@ -17,6 +18,8 @@ def create_testing_app(project_directory: Optional[str]):
         file_names=[],
         include_runtime_sys_path=True,
         add_to_sys_path=[test_modules_dir])
+    # resolve the root nodes before returning
+    user_config.session_overrides['MULTITHREADING'] = False
     ui_toplevel = make_app(user_scope_settings, project_directory=project_directory, enable_ipython_support=True)
 
     return ui_toplevel
@@ -83,3 +86,388 @@ def test_definition_resolution_with_script():
 def test_usages_resolution_with_script():
     # TODO: add a script node, test usages resolution.
     pass
+
+
+def test_prefetch():
+    import threading
+
+    ui_toplevel = create_testing_app(project_directory=None)
+
+    map_widget = ui_toplevel.map_widget
+
+    user_config.session_overrides['MULTITHREADING'] = False
+    user_config.session_overrides['EXPERIMENTAL_MODE'] = False
+
+    root_items = {item.node.code_element.name: item for item in iterListWidget(map_widget.callLists[0])}
+    package_node = root_items['simple_test_package'].node
+
+    map_widget.prefetcher.prefetch(package_node, 2, threading.Event())
+
+    items = map_widget.next_nodes_cache.get(package_node.code_element)
+    assert any(node.code_element.name == 'aa' for node in items)
+
+    # one level deeper
+    aa_node = tz.first(node for node in items if node.code_element.name == 'aa')
+    assert aa_node.code_element in map_widget.next_nodes_cache
+
+    # the next column is filled from the cache
+    map_widget.callLists[0].setCurrentItem(root_items['simple_test_package'])
+    assert [item.node for item in iterListWidget(map_widget.callLists[1])] == items
+
+    # cancelled prefetches are not cached
+    cancel_event = threading.Event()
+    cancel_event.set()
+    map_widget.next_nodes_cache.clear()
+    map_widget.prefetcher.prefetch(package_node, 1, cancel_event)
+    assert package_node.code_element not in map_widget.next_nodes_cache
+
+
+def test_streaming_call_list():
+    import threading
+
+    ui_toplevel = create_testing_app(project_directory=None)
+
+    map_widget = ui_toplevel.map_widget
+
+    user_config.session_overrides['MULTITHREADING'] = False
+    user_config.session_overrides['EXPERIMENTAL_MODE'] = False
+
+    # a finished search leaves only nodes
+    map_widget.callLists[0].setCurrentRow(0)
+    ll = map_widget.callLists[1]
+    assert ll.count() > 0
+    assert all(hasattr(item, 'node') for item in iterListWidget(ll))
+    assert ll.stream_token is None
+
+    def names():
+        return [getattr(item, 'node', None) and item.node.code_element.name for item in iterListWidget(ll)]
+
+    token = threading.Event()
+    ll.startNode(OrganizerNode('streaming'), token)
+    assert names() == [None]  # progress indicator
+
+    ll.appendNodes(token, [OrganizerNode('a'), OrganizerNode('b')])
+    assert names() == ['a', 'b', None]
+
+    # stale searches are ignored
+    ll.appendNodes(threading.Event(), [OrganizerNode('stale')])
+    ll.finishNodes(threading.Event())
+    assert names() == ['a', 'b', None]
+
+    ll.finishNodes(token)
+    assert names() == ['a', 'b']
+
+    # a cancelled search does not replace the list
+    cancelled = threading.Event()
+    cancelled.set()
+    ll.startNode(OrganizerNode('cancelled'), cancelled)
+    assert names() == ['a', 'b']
+
+
+def test_provisional_call_list():
+    import threading
+
+    ui_toplevel = create_testing_app(project_directory=None)
+
+    map_widget = ui_toplevel.map_widget
+
+    user_config.session_overrides['MULTITHREADING'] = False
+    user_config.session_overrides['EXPERIMENTAL_MODE'] = False
+
+    map_widget.callLists[0].setCurrentRow(0)
+    ll = map_widget.callLists[1]
+
+    def provisional(name):
+        node = OrganizerNode(name)
+        node.provisional = True
+        return node
+
+    def names():
+        return [getattr(item, 'node', None) and (item.node.code_element.name, item.node.provisional)
+                for item in iterListWidget(ll)]
+
+    token = threading.Event()
+    ll.startNode(OrganizerNode('streaming'), token)
+    ll.showProvisional(token, [provisional('b'), provisional('x')])
+    assert names() == [('b', True), ('x', True), None]
+    assert ll.item(0).font().italic()
+
+    # streamed nodes go before the provisional ones, or confirm them in place
+    b_item = ll.item(0)
+    ll.appendNodes(token, [OrganizerNode('a'), OrganizerNode('b')])
+    assert names() == [('a', False), ('b', False), ('x', True), None]
+    assert ll.item(1) is b_item and not b_item.font().italic()
+
+    # unconfirmed nodes are removed when the search finishes
+    ll.finishNodes(token)
+    assert names()[:2] == [('a', False), ('b', False)]
+    assert ('x', True) not in names()
+
+    # provisional nodes of a finished search are dropped
+    ll.showProvisional(token, [provisional('late')])
+    assert ('late', True) not in names()
+
+    def provisional_parent(name):
+        node = provisional(name)
+        node.code_element = node.code_element._replace(role='parent')
+        return node
+
+    # provisional callers are dropped when the search for callers is cancelled or truncated
+    for stop in ['cancel', 'truncate']:
+        token = threading.Event()
+        ll.startNode(OrganizerNode('streaming'), token)
+        ll.showProvisional(token, [provisional_parent('p')])
+        ll.finishNodes(token)
+        assert ('p', True) in names()
+
+        ll.stream_token = ll.callers_token = callers_token = threading.Event()
+        if stop == 'cancel':
+            ll.cancelCallers()
+        else:
+            ll.truncateNodes(callers_token, iter(()))
+        assert ('p', True) not in names()
+
+
+def test_callers_on_demand():
+    ui_toplevel = create_testing_app(project_directory=None)
+
+    map_widget = ui_toplevel.map_widget
+
+    user_config.session_overrides['MULTITHREADING'] = False
+    user_config.session_overrides['EXPERIMENTAL_MODE'] = False
+    user_config.session_overrides['CALLERS_ON_DEMAND'] = True
+
+    try:
+        for ii, target_name in enumerate(['simple_test_package', 'bb', 'bar']):
+            for item in iterListWidget(map_widget.callLists[ii]):
+                if getattr(item, 'node', None) and item.node.code_element.name == target_name:
+                    map_widget.callLists[ii].setCurrentItem(item)
+                    break
+
+        ll = map_widget.callLists[3]
+        roles = [item.node.code_element.role for item in iterListWidget(ll) if hasattr(item, 'node')]
+        assert 'parent' not in roles
+        assert ll.item(ll.count() - 1) is ll.callers_placeholder
+
+        # selecting the placeholder searches for callers
+        ll.setCurrentItem(ll.callers_placeholder)
+
+        assert ll.callers_placeholder is None
+        assert all(hasattr(item, 'node') for item in iterListWidget(ll))
+        parents = [item.node.code_element for item in iterListWidget(ll)
+                   if item.node.code_element.role == 'parent']
+        assert [(ce.name, ce.module) for ce in parents] == [('foo', 'aa')]
+        assert [node.code_element for node in map_widget.callers_cache.get(ll.node.code_element)] == parents
+    finally:
+        del user_config.session_overrides['CALLERS_ON_DEMAND']
+
+
+def test_progressive_startup():
+    from call_map.qt_compatibility import QtWidgets
+
+    user_config.session_overrides['MULTITHREADING'] = True
+    user_config.session_overrides['EXPERIMENTAL_MODE'] = False
+
+    user_scope_settings = UserScopeSettings(
+        module_names=['simple_test_package', 'no_such_module_anywhere'],
+        file_names=[],
+        include_runtime_sys_path=True,
+        add_to_sys_path=[test_modules_dir])
+
+    try:
+        ui_toplevel = make_app(user_scope_settings, project_directory=None, show_gui=False)
+        wait([ui_toplevel.root_nodes_future])
+        QtWidgets.QApplication.processEvents()
+    finally:
+        user_config.session_overrides['MULTITHREADING'] = False
+
+    root_list = ui_toplevel.map_widget.callLists[0]
+
+    assert [item.node.code_element.name for item in iterListWidget(root_list)] == ['simple_test_package']
+    assert root_list.node.children == ui_toplevel.root_nodes_future.result()
+    assert list(ui_toplevel.project.failures['python']['modules']) == ['no_such_module_anywhere']
+
+
+def test_next_nodes_memo():
+    from call_map.gui import NextNodesCache
+
+    cache = NextNodesCache(2)
+
+    ce = CodeElement(name='ff', type='function', module='mm', role='child', path='/src/mm.py',
+                     call_pos=('/src/aa.py', (3, 4), (3, 6)), start_pos=(1, 4), end_pos=(2, 0))
+    items = [OrganizerNode('callee')]
+    cache.put(ce, items)
+
+    # reached from another caller
+    assert cache.get(ce._replace(call_pos=('/src/bb.py', (8, 0), (8, 2)))) is items
+    assert ce._replace(role='parent') not in cache
+
+    # nodes without a position are only equal to themselves
+    cache.put(OrganizerNode('aa').code_element, [])
+    assert OrganizerNode('bb').code_element not in cache
+
+    cache.invalidate_paths({'/src/mm.py'})
+    assert ce not in cache
+    assert len(cache) == 1
+
+
+def test_search_budget():
+    ui_toplevel = create_testing_app(project_directory=None)
+
+    map_widget = ui_toplevel.map_widget
+
+    user_config.session_overrides['MULTITHREADING'] = False
+    user_config.session_overrides['EXPERIMENTAL_MODE'] = False
+
+    def expand():
+        for ii, target_name in enumerate(['simple_test_package', 'bb', 'bar']):
+            map_widget.callLists[ii].setCurrentRow(-1)
+            for item in iterListWidget(map_widget.callLists[ii]):
+                if getattr(item, 'node', None) and item.node.code_element.name == target_name:
+                    map_widget.callLists[ii].setCurrentItem(item)
+                    break
+        return map_widget.callLists[3]
+
+    def code_elements(ll):
+        return [item.node.code_element for item in iterListWidget(ll)
+                if hasattr(item, 'node') and not item.node.provisional]
+
+    expected = code_elements(expand())
+    assert [ce.role for ce in expected] == ['signature', 'parent']
+
+    map_widget.next_nodes_cache.clear()
+    map_widget.callers_cache.clear()
+    user_config.session_overrides['SEARCH_ITEM_BUDGET'] = 1
+    try:
+        ll = expand()
+
+        # stops after each item, keeping what was found
+        assert ll.truncated
+        assert code_elements(ll) == expected[:1]
+        assert ll.item(ll.count() - 1) is ll.continue_placeholder
+
+        continued = 0
+        while ll.truncated:
+            ll.continueSearch()
+            continued += 1
+
+        assert continued >= len(expected) - 1
+        assert ll.continue_placeholder is None
+        assert code_elements(ll) == expected
+
+        # incomplete results are not memoized
+        assert ll.node.code_element not in map_widget.next_nodes_cache
+    finally:
+        del user_config.session_overrides['SEARCH_ITEM_BUDGET']
+
+
+def test_search_deadline():
+    import time
+    import threading
+    from call_map import cancellation
+    from call_map.gui import SearchBudget, stream_nodes
+
+    ui_toplevel = create_testing_app(project_directory=None)
+
+    map_widget = ui_toplevel.map_widget
+
+    user_config.session_overrides['MULTITHREADING'] = False
+
+    attempts = []
+
+    def blocking_step():
+        # e.g. jedi evaluating one call site, which only checks for cancellation
+        attempts.append(time.monotonic())
+        while len(attempts) == 1:
+            cancellation.check()
+            time.sleep(0.001)
+        return OrganizerNode('slow')
+
+    def search():
+        yield OrganizerNode('fast')
+        node = yield from cancellation.resumable(blocking_step)
+        yield node
+
+    map_widget.callLists[0].setCurrentRow(0)
+    ll = map_widget.callLists[1]
+    token = threading.Event()
+    ll.startNode(OrganizerNode('searching'), token)
+
+    # the step that never yields is paused at the deadline
+    started = time.monotonic()
+    assert stream_nodes(ll, search(), token, True, SearchBudget(seconds=0.05, items=None)) is None
+    assert time.monotonic() - started < 5
+    assert ll.truncated
+    assert [item.node.code_element.name for item in iterListWidget(ll) if hasattr(item, 'node')] == ['fast']
+
+    # and runs again, to the end, when the search is continued
+    ll.continueSearch()
+    assert len(attempts) == 2
+    assert not ll.truncated
+    assert [item.node.code_element.name for item in iterListWidget(ll)] == ['fast', 'slow']
+
+
+def test_paused_callers():
+    import threading
+    from call_map import cancellation
+    from call_map.gui import stream_nodes
+
+    ui_toplevel = create_testing_app(project_directory=None)
+
+    map_widget = ui_toplevel.map_widget
+
+    user_config.session_overrides['MULTITHREADING'] = False
+
+    map_widget.callLists[0].setCurrentRow(0)
+    ll = map_widget.callLists[1]
+
+    token = threading.Event()
+    ll.startNode(OrganizerNode('searching'), token)
+    ll.callers_token = token
+    ll.callers_pause = threading.Event()
+
+    def search():
+        yield OrganizerNode('first')
+        # e.g. the user selects an item while the search runs in another thread
+        ll.pauseCallers()
+        node = yield from cancellation.resumable(lambda: OrganizerNode('second'))
+        yield node
+
+    def names():
+        return [item.node.code_element.name for item in iterListWidget(ll) if hasattr(item, 'node')]
+
+    # a paused search for callers keeps what it found, and is not cancelled
+    assert stream_nodes(ll, search(), token, True, None, ll.callers_pause) is None
+    assert not token.is_set()
+    assert ll.truncated and names() == ['first']
+
+    # and continues where it stopped
+    ll.continueSearch()
+    assert not ll.truncated
+    assert names() == ['first', 'second']
+
+
+def test_large_file_window(monkeypatch):
+    from call_map import gui
+
+    # every file is large; show one line around the target
+    monkeypatch.setattr(gui, 'LARGE_FILE_BYTES', 0)
+    monkeypatch.setattr(gui, 'LARGE_FILE_CONTEXT', 1)
+
+    ui_toplevel = create_testing_app(project_directory=None)
+    map_widget = ui_toplevel.map_widget
+    text_edit = ui_toplevel.main_widget.text_edit
+
+    user_config.session_overrides['EXPERIMENTAL_MODE'] = False
+
+    for ii, target_name in enumerate(['simple_test_package', 'aa', 'foo']):
+        ll = map_widget.callLists[ii]
+        ll.setCurrentItem(tz.first(item for item in iterListWidget(ll)
+                                   if item.node.code_element.name == target_name))
+
+    path, (line, column), _ = map_widget.callLists[2].currentItem().node.code_element.call_pos
+    source_lines = Path(path).read_text().splitlines()
+
+    assert text_edit.current_lines == (max(1, line - 1), line + 2)
+    assert text_edit.toPlainText().splitlines() == source_lines[max(0, line - 2):line + 1]
+    assert text_edit.highlighter.current_highlight_cursor.selectedText() == 'foo'
@@ -0,0 +1,155 @@
+from pathlib import Path
+
+from call_map.gui import make_app
+from call_map.core import UserScopeSettings, CodeElement
+from call_map.config import user_config
+from call_map.cache import read_text_cached, text_cache_stats
+from call_map.project_settings_module import make_project
+from call_map.watcher import ProjectWatcher
+
+original_source = '''
+def foo():
+    pass
+'''
+
+changed_source = '''
+def bar():
+    pass
+
+def foo():
+    bar()
+'''
+
+
+def make_package(tmpdir) -> Path:
+    package = Path(str(tmpdir)).joinpath('watched_package')
+    package.mkdir()
+    package.joinpath('__init__.py').write_text(original_source)
+    return package.joinpath('__init__.py').resolve()
+
+
+def user_scope_settings(tmpdir):
+    return UserScopeSettings(module_names=['watched_package'],
+                             file_names=[],
+                             include_runtime_sys_path=True,
+                             add_to_sys_path=[Path(str(tmpdir))])
+
+
+def names(call_list):
+    return [call_list.item(ii).node.code_element.name for ii in range(call_list.count())]
+
+
+def test_flush_invalidates_and_reports(tmpdir):
+    path = make_package(tmpdir)
+
+    watcher = ProjectWatcher()
+    watcher.watch([str(path), str(path.parent.joinpath('missing.py'))])
+    assert watcher.watched() == {str(path)}
+
+    reported = []
+    watcher.files_changed.connect(reported.append)
+
+    assert read_text_cached(path) == original_source
+    path.write_text(changed_source)
+
+    watcher._on_file_changed(str(path))
+    watcher._on_file_changed(str(path))
+    invalidations = text_cache_stats['invalidations']
+    watcher.flush()
+
+    assert reported == [[str(path)]]
+    assert text_cache_stats['invalidations'] == invalidations + 1
+    assert read_text_cached(path) == changed_source
+
+    watcher.flush()
+    assert reported == [[str(path)]]
+
+
+def test_flush_invalidates_on_executor(tmpdir):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from call_map.qt_compatibility import QtWidgets
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    path = make_package(tmpdir)
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    watcher = ProjectWatcher(executor=executor)
+    reported = []
+    watcher.files_changed.connect(lambda paths: reported.append((paths, threading.current_thread())))
+
+    assert read_text_cached(path) == original_source
+    path.write_text(changed_source)
+
+    # a search running on the executor holds up the invalidation, but not the GUI
+    search_done = threading.Event()
+    executor.submit(search_done.wait)
+    watcher._on_file_changed(str(path))
+    watcher.flush()
+    assert reported == []
+
+    search_done.set()
+    executor.shutdown(wait=True)
+    assert read_text_cached(path) == changed_source
+
+    app.processEvents()
+    assert reported == [([str(path)], threading.main_thread())]
+
+
+def test_project_refresh_paths(tmpdir):
+    path = make_package(tmpdir)
+    project = make_project(user_scope_settings(tmpdir), None)
+
+    assert project.refresh_paths('python', [str(path.parent.joinpath('other.py'))]) == ([], [])
+
+    old_node = project.module_nodes['python']['watched_package']
+    path.write_text(changed_source)
+
+    stale, additional = project.refresh_paths('python', [str(path)])
+
+    assert stale == [old_node]
+    assert additional == [project.module_nodes['python']['watched_package']]
+    assert 'bar' in [node.code_element.name for node in additional[0].children]
+
+
+def test_gui_follows_changed_file(tmpdir):
+    user_config.session_overrides['MULTITHREADING'] = False
+    path = make_package(tmpdir)
+
+    ui_toplevel = make_app(user_scope_settings(tmpdir), project_directory=None, show_gui=False)
+    map_widget = ui_toplevel.map_widget
+
+    assert str(path) in map_widget.file_watcher.watched()
+
+    root_list = map_widget.callLists[0]
+    root_list.setCurrentRow(names(root_list).index('watched_package'))
+    assert names(map_widget.callLists[1]) == ['foo']
+
+    map_widget.callLists[1].setCurrentRow(0)
+    assert 'bar' not in names(map_widget.callLists[2])
+
+    path.write_text(changed_source)
+    map_widget.file_watcher._on_file_changed(str(path))
+    map_widget.file_watcher.flush()
+
+    assert sorted(names(map_widget.callLists[1])) == ['bar', 'foo']
+    assert map_widget.callLists[1].currentItem().node.code_element.name == 'foo'
+    assert 'bar' in names(map_widget.callLists[2])
+
+
+def test_files_are_watched_once_per_batch(tmpdir, monkeypatch):
+    user_config.session_overrides['MULTITHREADING'] = False
+    make_package(tmpdir)
+
+    ui_toplevel = make_app(user_scope_settings(tmpdir), project_directory=None, show_gui=False)
+    map_widget = ui_toplevel.map_widget
+    root_list = map_widget.callLists[0]
+
+    calls = []
+    watch = map_widget.file_watcher.watch
+    monkeypatch.setattr(map_widget.file_watcher, 'watch', lambda paths: calls.append(paths) or watch(paths))
+
+    nodes = [root_list.item(ii).node for ii in range(root_list.count())]
+    root_list.add_nodes(nodes)
+
+    assert calls == [{node.code_element.path for node in nodes}]